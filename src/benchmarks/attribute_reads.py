@@ -0,0 +1,112 @@
+"""
+Measure how reads of different attributes of the requests client affect each other: while many threads share
+the single request of a slow attribute, a read of another attribute must not wait for it.
+Also checks that the concurrent reads of the slow attribute sent a single request.
+
+Run from the src directory: python -m benchmarks.attribute_reads [--delay SECONDS --readers N]
+Requires requests.
+"""
+import argparse
+import importlib.util
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from parser.parser import Parser
+
+SPEC = {
+    'classes': [{'name': 'bench', 'attributes': [{'name': 'slow', 'type': 'int'}, {'name': 'fast', 'type': 'int'}]}],
+}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    delay = 1.0
+    slow_requests = 0
+
+    def do_GET(self):
+        if self.path.endswith('/slow'):
+            type(self).slow_requests += 1
+            time.sleep(self.delay)
+
+        body = json.dumps(1).encode()
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def load_client(host, port, out_dir):
+    """Generate a requests client into out_dir and import its main module"""
+    generator = importlib.import_module('generators.python.client-requests.main').ClientGenerator(host, port)
+    files = generator.generate(Parser().parse(json.dumps(SPEC)))
+    client_dir = os.path.join(out_dir, generator.name)
+
+    for file_path, content in files.items():
+        file_path = os.path.join(client_dir, file_path)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, 'w') as f:
+            f.writelines(line + '\n' for line in content)
+
+    sys.path.insert(0, client_dir)
+    spec = importlib.util.spec_from_file_location('attribute_reads_main', os.path.join(client_dir, 'main.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def main():
+    arguments = argparse.ArgumentParser()
+    arguments.add_argument('--delay', type=float, default=1.0)
+    arguments.add_argument('--readers', type=int, default=8)
+    args = arguments.parse_args()
+
+    _Handler.delay = args.delay
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = 'http://127.0.0.1', server.server_address[1]
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        module = load_client(host, port, out_dir)
+        session = module.session.Session('{}:{}'.format(host, port), pool_maxsize=args.readers + 1)
+        client = module.Interface(session)
+
+        with ThreadPoolExecutor(max_workers=args.readers) as executor:
+            slow_reads = [executor.submit(client.bench.slow) for _ in range(args.readers)]
+            # Let the slow reads start and share a single request.
+            time.sleep(args.delay / 4)
+
+            start = time.perf_counter()
+            client.bench.fast()
+            fast_elapsed = time.perf_counter() - start
+
+            for read in slow_reads:
+                read.result()
+
+        session.close()
+
+    server.shutdown()
+
+    print('{} concurrent reads of a {:.2f} s attribute sent {} request(s)'.format(args.readers, args.delay,
+                                                                                _Handler.slow_requests))
+    print('a read of another attribute meanwhile took {:.1f} ms'.format(fast_elapsed * 1e3))
+
+    assert _Handler.slow_requests == 1
+    assert fast_elapsed < args.delay / 2
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+"""
+Compare the requests/sec of the asyncio client with the threaded requests client over loopback.
+
+Run from the src directory: python -m benchmarks.client_throughput [--calls N --concurrency N]
+The requests client is skipped when requests is not installed.
+"""
+import argparse
+import asyncio
+import importlib.util
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from parser.parser import Parser
+
+SPEC = {
+    'namespaces': [{'name': 'bench', 'methods': [{'name': 'echo', 'arguments': [{'name': 'value', 'type': 'int'}]}]}],
+}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        body = json.dumps(request['arguments']['value']).encode()
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def load_client(generator, out_dir):
+    """Generate a client into out_dir and import its main module"""
+    files = generator.generate(Parser().parse(json.dumps(SPEC)))
+    client_dir = os.path.join(out_dir, generator.name)
+
+    for file_path, content in files.items():
+        file_path = os.path.join(client_dir, file_path)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, 'w') as f:
+            f.writelines(line + '\n' for line in content)
+
+    sys.path.insert(0, client_dir)
+    spec = importlib.util.spec_from_file_location(generator.name + '_main', os.path.join(client_dir, 'main.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def run_asyncio(module, url, calls, concurrency):
+    async def run():
+        session = module.transport.Session(url, pool_maxsize=concurrency, max_concurrency=concurrency)
+        client = module.Interface(session)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(client.bench.echo(value=i) for i in range(calls)))
+        elapsed = time.perf_counter() - start
+
+        await session.close()
+        return elapsed
+
+    return asyncio.run(run())
+
+
+def run_requests(module, url, calls, concurrency):
+    session = module.session.Session(url, pool_maxsize=concurrency)
+    client = module.Interface(session)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        start = time.perf_counter()
+        list(executor.map(lambda i: client.bench.echo(value=i), range(calls)))
+        elapsed = time.perf_counter() - start
+
+    session.close()
+    return elapsed
+
+
+def main():
+    arguments = argparse.ArgumentParser()
+    arguments.add_argument('--calls', type=int, default=5000)
+    arguments.add_argument('--concurrency', type=int, default=32)
+    args = arguments.parse_args()
+
+    server = start_server()
+    host, port = 'http://127.0.0.1', server.server_address[1]
+    url = '{}:{}'.format(host, port)
+
+    from generators.python.client_asyncio.main import ClientGenerator as AsyncioClientGenerator
+    requests_generator = importlib.import_module('generators.python.client-requests.main').ClientGenerator
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        clients = [('asyncio', AsyncioClientGenerator, run_asyncio)]
+
+        if importlib.util.find_spec('requests') is not None:
+            clients.append(('requests', requests_generator, run_requests))
+        else:
+            print('requests is not installed, skipping the requests client')
+
+        for name, generator_class, run in clients:
+            module = load_client(generator_class(host, port), out_dir)
+            elapsed = run(module, url, args.calls, args.concurrency)
+            print('{:<10} {:8.0f} requests/sec'.format(name, args.calls / elapsed))
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
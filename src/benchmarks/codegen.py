@@ -0,0 +1,156 @@
+"""
+Measure how every phase of a code generation run scales with the shape of the specification:
+parsing, the interface generator, every target generator in memory, and every target generator
+writing through to disk. The time (best of --repeat) and the peak memory of every phase are measured
+in separate runs so tracing does not skew the timings.
+
+Run from the src directory: python -m benchmarks.codegen [--depth 1 2 3 --fanout 4 ... --output results.json]
+Every shape option takes a list of values and the benchmark runs over their product. The per-method
+columns stay flat for phases that scale linearly, a growing value points at superlinear behavior.
+"""
+import argparse
+import gc
+import itertools
+import json
+import logging
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from importlib import import_module
+
+from benchmarks.synthetic import count_spec, make_spec
+from common.output import DirectWriter
+from generators.python.common.InterfaceGenerator import InterfaceGenerator
+from generators.sinks import FileSink
+from parser.parser import Parser
+
+SHAPE_DEFAULTS = dict(depth=(1, 2, 3, 4), fanout=(4,), classes=(2,), methods=(8,), arguments=(3,), attributes=(2,))
+
+GENERATORS = {
+    'flask': lambda: import_module('generators.python.server_flask.main').ServerGenerator(),
+    'asgi': lambda: import_module('generators.python.server_asgi.main').ServerGenerator(),
+    'requests': lambda: import_module('generators.python.client-requests.main').ClientGenerator('localhost', 5000),
+    'asyncio': lambda: import_module('generators.python.client_asyncio.main').ClientGenerator('localhost', 5000),
+}
+
+
+def write_generated(make_generator, interface):
+    generator = make_generator()
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        generator.set_sink(FileSink(DirectWriter(out_dir, update=False)))
+        generator.generate(interface)
+        generator.close()
+
+
+def make_phases(spec_str, generator_names):
+    """
+    :return: A list of (phase name, function) tuples, the functions take no arguments.
+    """
+    interface = Parser().parse(spec_str)
+
+    phases = [
+        ('parse', lambda: Parser().parse(spec_str)),
+        ('interface', lambda: InterfaceGenerator().generate(interface)),
+    ]
+
+    for name in generator_names:
+        make_generator = GENERATORS[name]
+        phases.append(('generate:' + name, lambda make_generator=make_generator: make_generator().generate(interface)))
+        phases.append(('write:' + name,
+                       lambda make_generator=make_generator: write_generated(make_generator, interface)))
+
+    return phases
+
+
+def measure_time(function, repeat):
+    best = None
+
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+
+        if best is None or elapsed < best:
+            best = elapsed
+
+    return best
+
+
+def measure_peak_memory(function):
+    gc.collect()
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return peak
+
+
+def run_shape(shape, generator_names, repeat):
+    spec = make_spec(**shape)
+    spec_str = json.dumps(spec)
+    counts = count_spec(spec)
+
+    phases = {}
+    for name, function in make_phases(spec_str, generator_names):
+        seconds = measure_time(function, repeat)
+        peak = measure_peak_memory(function)
+
+        phases[name] = {
+            'seconds': seconds,
+            'peak_bytes': peak,
+            'us_per_method': seconds * 1e6 / max(counts['methods'], 1),
+        }
+
+    return {'shape': shape, 'spec_bytes': len(spec_str), 'counts': counts, 'phases': phases}
+
+
+def print_result(result):
+    print('shape {} ({} namespaces, {} classes, {} methods)'.format(
+        ' '.join('{}={}'.format(key, value) for key, value in result['shape'].items()),
+        result['counts']['namespaces'], result['counts']['classes'], result['counts']['methods']))
+
+    for name, phase in result['phases'].items():
+        print('  {:<18} {:>10.4f} s {:>10.1f} us/method {:>10.2f} MB peak'.format(
+            name, phase['seconds'], phase['us_per_method'], phase['peak_bytes'] / 1e6))
+
+
+def main():
+    arguments = argparse.ArgumentParser()
+    for key, default in SHAPE_DEFAULTS.items():
+        arguments.add_argument('--' + key, type=int, nargs='+', default=list(default))
+    arguments.add_argument('--generators', nargs='+', choices=tuple(GENERATORS), default=list(GENERATORS))
+    arguments.add_argument('--repeat', type=int, default=3)
+    arguments.add_argument('--output', type=str, default=None, help='write the results as json to this file')
+    args = arguments.parse_args()
+
+    # The writers log every file they write.
+    logging.getLogger('common.output').setLevel(logging.WARNING)
+
+    keys = tuple(SHAPE_DEFAULTS)
+    results = []
+
+    for values in itertools.product(*(getattr(args, key) for key in keys)):
+        result = run_shape(dict(zip(keys, values)), args.generators, args.repeat)
+        print_result(result)
+        results.append(result)
+
+    if args.output is not None:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'python': sys.version,
+                'platform': platform.platform(),
+                'time': time.time(),
+                'repeat': args.repeat,
+                'results': results,
+            }, f, indent=1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""
+Measure what the negotiated compression between the generated requests client and the generated Flask
+server costs and saves: the bytes on the wire and the latency of a call that echoes a payload, for payloads
+of growing sizes sent uncompressed, gzipped and deflated.
+
+Run from the src directory: python -m benchmarks.compression [--sizes 1000 100000 --calls N --bandwidth MBIT]
+Over loopback the transfer is almost free, so the latency is also estimated for a link of --bandwidth
+Mbit/s by adding the transfer time of the bytes that were sent and received.
+Requires flask and requests.
+"""
+import argparse
+import importlib
+import random
+import statistics
+import tempfile
+import time
+import types
+
+from benchmarks.server_throughput import free_port, load_module, serve_flask, write_files
+
+SPEC = {
+    'namespaces': [{'name': 'bench', 'methods': [{'name': 'echo', 'return_type': 'dict',
+                                                  'arguments': [{'name': 'value', 'type': 'dict'}]}]}],
+}
+
+MODES = (None, 'gzip', 'deflate')
+
+
+def make_payload(size, seed=0):
+    """Rows of a typical record shape, about size bytes once encoded as JSON"""
+    rng = random.Random(seed)
+    rows = []
+    encoded_size = 12
+
+    while encoded_size < size:
+        row = {'id': len(rows),
+               'name': 'user-{}'.format(rng.randrange(10 ** 6)),
+               'email': 'user{}@example.com'.format(rng.randrange(10 ** 6)),
+               'score': round(rng.random() * 100, 3),
+               'active': rng.random() < 0.5,
+               'tags': rng.sample(['red', 'green', 'blue', 'admin', 'beta', 'trial'], 2)}
+        rows.append(row)
+        encoded_size += len(repr(row))
+
+    return {'rows': rows}
+
+
+def measure(client, session, payload, calls):
+    """:return: The median latency in seconds and the bytes sent and received by a call."""
+    sizes = []
+
+    def record(response, *args, **kwargs):
+        sizes.append((len(response.request.body or b''), int(response.headers.get('Content-Length', 0))))
+
+    session._session.hooks['response'].append(record)
+    interface = client.Interface(session)
+
+    try:
+        interface.bench.echo(value=payload)
+
+        latencies = []
+        for _ in range(calls):
+            start = time.perf_counter()
+            interface.bench.echo(value=payload)
+            latencies.append(time.perf_counter() - start)
+    finally:
+        session._session.hooks['response'].remove(record)
+
+    return statistics.median(latencies), sizes[-1][0], sizes[-1][1]
+
+
+def main():
+    arguments = argparse.ArgumentParser()
+    arguments.add_argument('--sizes', type=int, nargs='+', default=[500, 5000, 50000, 500000, 5000000])
+    arguments.add_argument('--calls', type=int, default=20)
+    arguments.add_argument('--bandwidth', type=float, default=1000, help='The estimated link in Mbit/s.')
+    args = arguments.parse_args()
+
+    from generators.python.server_flask.main import ServerGenerator
+    ClientGenerator = importlib.import_module('generators.python.client-requests.main').ClientGenerator
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        server_dir = write_files(ServerGenerator(metrics=False), out_dir, SPEC)
+        server = load_module(server_dir, 'app.py', 'compression_app')
+        server.interface = types.SimpleNamespace(bench=types.SimpleNamespace(echo=lambda value: value))
+
+        port = free_port()
+        serve_flask(server.app, port)
+        url = 'http://127.0.0.1:{}'.format(port)
+
+        client_dir = write_files(ClientGenerator('127.0.0.1', port), out_dir, SPEC)
+        client = load_module(client_dir, 'main.py', 'client_main')
+
+        print('{:>9} {:<9} {:>11} {:>11} {:>7} {:>14} {:>14}'.format(
+            'size', 'request', 'sent (B)', 'recv (B)', 'ratio', 'loopback (ms)',
+            '{:g} Mbit (ms)'.format(args.bandwidth)))
+
+        for size in args.sizes:
+            payload = make_payload(size)
+            identity_bytes = None
+
+            for mode in MODES:
+                with client.session.Session(url, compression=mode) as session:
+                    latency, sent, received = measure(client, session, payload, args.calls)
+
+                if identity_bytes is None:
+                    identity_bytes = sent + received
+                link_latency = latency + (sent + received) * 8 / (args.bandwidth * 1e6)
+
+                print('{:>9} {:<9} {:>11} {:>11} {:>7.2f} {:>14.2f} {:>14.2f}'.format(
+                    size, mode or 'identity', sent, received, (sent + received) / identity_bytes,
+                    latency * 1e3, link_latency * 1e3))
+
+
+if __name__ == '__main__':
+    main()
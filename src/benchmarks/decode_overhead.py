@@ -0,0 +1,83 @@
+"""
+Measure the per-request overhead of validating method arguments: the generic checks that
+helpers.run_method used to do at runtime versus the decoders generated per method.
+
+Run from the src directory: python -m benchmarks.decode_overhead [--arguments N]
+"""
+import argparse
+import importlib.util
+import json
+import os
+import tempfile
+import timeit
+
+from benchmarks.synthetic import make_method
+from generators.python.common.ServerInterfaceGenerator import ServerInterfaceGenerator
+from generators.python.server_flask.main import ServerGenerator
+from parser.parser import Parser
+
+
+def generic_validate(method_arguments_names, request_args):
+    """The checks helpers.run_method did before the decoders were generated"""
+    assert isinstance(request_args, dict)
+
+    arguments = request_args.get("arguments")
+
+    assert isinstance(arguments, dict)
+    assert method_arguments_names == list(arguments.keys())
+
+    return arguments
+
+
+def specialized_validate(decode, request_args):
+    if not isinstance(request_args, dict):
+        raise ValueError()
+
+    return decode(request_args.get("arguments"))
+
+
+def load_decoders(method):
+    generator = ServerGenerator()
+    files = generator.generate(Parser().parse(json.dumps({'namespaces': [{'name': 'bench', 'methods': [method]}]})))
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        decoders_path = os.path.join(out_dir, 'decoders.py')
+        with open(decoders_path, 'w') as f:
+            f.writelines(line + '\n' for line in files['decoders.py'])
+
+        spec = importlib.util.spec_from_file_location('bench_decoders', decoders_path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+
+    return module
+
+
+def main():
+    arguments = argparse.ArgumentParser()
+    arguments.add_argument('--arguments', type=int, default=6)
+    arguments.add_argument('--number', type=int, default=200000)
+    args = arguments.parse_args()
+
+    method = make_method(0, args.arguments)
+    decode = getattr(load_decoders(method), ServerInterfaceGenerator._decoder_name(['bench', method['name']]))
+
+    sample_values = {'int': 1, 'dict': {'a': 1}, 'list': [1, 2]}
+    request_arguments = {argument['name']: sample_values[argument['type']] for argument in method['arguments']}
+    body = json.dumps({'arguments': request_arguments})
+    names = list(request_arguments)
+
+    request_args = json.loads(body)
+
+    for name, validate, validate_argument in (('generic', generic_validate, names),
+                                              ('specialized', specialized_validate, decode)):
+        total = min(timeit.repeat(lambda: validate(validate_argument, json.loads(body)),
+                                  number=args.number, repeat=3))
+        validation = min(timeit.repeat(lambda: validate(validate_argument, request_args),
+                                       number=args.number, repeat=3))
+
+        print('{:<12} {:6.2f} us/request, {:6.2f} us of it validating'.format(name,
+                                                                               total / args.number * 1e6,
+                                                                               validation / args.number * 1e6))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Compare parsing a specification (cold, the parsed interface is stored in the IR cache) with loading it
+from the IR cache (warm), for synthetic specifications of growing sizes, as main.parse_specification does
+with --ir-cache.
+
+Run from the src directory: python -m benchmarks.ir_cache [--depths 1 2 3 --fanout N --repeat N]
+"""
+import argparse
+import logging
+import os
+import statistics
+import tempfile
+import time
+
+from benchmarks.synthetic import make_spec_str
+from main import parse_specification
+from parser.cache import IRCache
+from parser.parser import Parser
+
+
+def measure(spec_path, cache_dir, stream, repeat):
+    """:return: The median seconds of a cold and of a warm parse, and the size of the cache entry."""
+    colds = []
+    warms = []
+
+    for _ in range(repeat):
+        cache = IRCache(cache_dir)
+        cache.clear()
+
+        start = time.perf_counter()
+        with open(spec_path) as specification:
+            parse_specification(Parser(), specification, stream, cache)
+        colds.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        with open(spec_path) as specification:
+            parse_specification(Parser(), specification, stream, cache)
+        warms.append(time.perf_counter() - start)
+
+        assert cache.hits == 1 and cache.misses == 1
+
+    entry_size = sum(size for _, size, _ in IRCache(cache_dir).entries())
+    return statistics.median(colds), statistics.median(warms), entry_size
+
+
+def main():
+    arguments = argparse.ArgumentParser()
+    arguments.add_argument('--depths', type=int, nargs='+', default=[1, 2, 3, 4])
+    arguments.add_argument('--fanout', type=int, default=6)
+    arguments.add_argument('--classes', type=int, default=4)
+    arguments.add_argument('--methods', type=int, default=16)
+    arguments.add_argument('--arguments', type=int, default=3)
+    arguments.add_argument('--repeat', type=int, default=5)
+    args = arguments.parse_args()
+
+    logging.getLogger('main').setLevel(logging.WARNING)
+
+    print('{:>5} {:>10} {:>10} {:<10} {:>10} {:>10} {:>8}'.format(
+        'depth', 'spec (KB)', 'entry (KB)', 'mode', 'cold (ms)', 'warm (ms)', 'speedup'))
+
+    with tempfile.TemporaryDirectory() as directory:
+        spec_path = os.path.join(directory, 'spec.json')
+        cache_dir = os.path.join(directory, 'cache')
+
+        for depth in args.depths:
+            spec = make_spec_str(depth=depth, fanout=args.fanout, classes=args.classes,
+                                 methods=args.methods, arguments=args.arguments)
+            with open(spec_path, 'w') as spec_file:
+                spec_file.write(spec)
+
+            for mode, stream in (('parse', False), ('parse_file', True)):
+                cold, warm, entry_size = measure(spec_path, cache_dir, stream, args.repeat)
+                print('{:>5} {:>10.1f} {:>10.1f} {:<10} {:>10.2f} {:>10.2f} {:>8.1f}'.format(
+                    depth, len(spec) / 1e3, entry_size / 1e3, mode, cold * 1e3, warm * 1e3, cold / warm))
+
+
+if __name__ == '__main__':
+    main()
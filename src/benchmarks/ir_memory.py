@@ -0,0 +1,65 @@
+"""
+Report the parse time and the memory the parsed IR takes per node.
+
+Run from the src directory: python -m benchmarks.ir_memory
+"""
+import gc
+import time
+import tracemalloc
+
+from benchmarks.synthetic import make_spec_str
+from parser.parser import Parser
+
+SHAPES = (
+    dict(depth=2, fanout=4, classes=2, methods=8, arguments=3),
+    dict(depth=3, fanout=6, classes=4, methods=16, arguments=3),
+    dict(depth=3, fanout=8, classes=4, methods=32, arguments=4),
+)
+
+
+def count_nodes(namespace):
+    count = 1 + len(namespace.namespaces)
+
+    for method in namespace.methods:
+        count += 1 + len(method.arguments)
+
+    for klass in namespace.classes:
+        count += 1 + len(klass.attributes)
+        for method in klass.methods:
+            count += 1 + len(method.arguments)
+
+    for child in namespace.namespaces:
+        count += count_nodes(child) - 1
+
+    return count
+
+
+def measure(spec: str):
+    start = time.perf_counter()
+    Parser().parse(spec)
+    elapsed = time.perf_counter() - start
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        interface = Parser().parse(spec)
+
+        # The json objects are freed by now, only the IR is left.
+        gc.collect()
+        retained, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return elapsed, retained, count_nodes(interface)
+
+
+def main():
+    print('{:>8} {:>10} {:>10} {:>12}'.format('nodes', 'parse (s)', 'IR (MB)', 'bytes/node'))
+
+    for shape in SHAPES:
+        elapsed, retained, nodes = measure(make_spec_str(**shape))
+        print('{:>8} {:>10.3f} {:>10.1f} {:>12.1f}'.format(nodes, elapsed, retained / 1e6, retained / nodes))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+Measure what the lazy namespaces and classes of the generated interface save at startup: the time and the
+memory of creating the root Interface object, which only creates the children that are accessed, against
+creating the whole tree up front as the interface did before (every child created by its parent's __init__).
+The cost of the first access of the deepest path, which creates its chain of namespaces, is reported too.
+
+Run from the src directory: python -m benchmarks.lazy_interface [--repeat N]
+"""
+import argparse
+import functools
+import gc
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.server_throughput import load_module, write_files
+from benchmarks.synthetic import make_spec
+from generators.python.common.InterfaceGenerator import InterfaceGenerator
+
+SHAPES = (
+    ('deep', dict(depth=8, fanout=2, classes=2, methods=4)),
+    ('wide', dict(depth=2, fanout=48, classes=4, methods=4)),
+    ('deep and wide', dict(depth=4, fanout=8, classes=4, methods=4)),
+)
+
+
+def children(obj):
+    """:return: The names of the namespaces and classes of a generated object."""
+    # Every generated module defines its own lazy_child descriptor.
+    return [name for name, value in vars(type(obj)).items() if type(value).__name__ == 'lazy_child']
+
+
+def create_all(obj):
+    """Create every namespace and class under an object, :return: the number of objects."""
+    return 1 + sum(create_all(getattr(obj, name)) for name in children(obj))
+
+
+def deepest_path(obj):
+    """:return: The names of the longest chain of namespaces and classes under an object."""
+    longest = []
+
+    for name in children(obj):
+        path = [name] + deepest_path(getattr(obj, name))
+        if len(path) > len(longest):
+            longest = path
+
+    return longest
+
+
+def measure(function, repeat):
+    """:return: The median seconds of a call and the memory that the result of the last call retains."""
+    samples = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = function()
+        gc.collect()
+        retained, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    del result
+    return statistics.median(samples), retained
+
+
+def main():
+    arguments = argparse.ArgumentParser()
+    arguments.add_argument('--repeat', type=int, default=20)
+    args = arguments.parse_args()
+
+    print('{:<14} {:>8} {:<13} {:>10} {:>12}'.format('shape', 'objects', 'startup', 'time (ms)', 'memory (KB)'))
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        for index, (shape, kwargs) in enumerate(SHAPES):
+            generator_dir = write_files(InterfaceGenerator(), '{}/{}'.format(out_dir, index), make_spec(**kwargs))
+            module = load_module(generator_dir, 'common/interface.py', 'interface_{}'.format(index))
+
+            objects = create_all(module.Interface())
+            path = deepest_path(module.Interface())
+
+            def eager():
+                interface = module.Interface()
+                create_all(interface)
+                return interface
+
+            def first_access():
+                interface = module.Interface()
+                functools.reduce(getattr, path, interface)
+                return interface
+
+            for name, function in (('eager', eager), ('lazy', module.Interface), ('lazy + path', first_access)):
+                elapsed, retained = measure(function, args.repeat)
+                print('{:<14} {:>8} {:<13} {:>10.3f} {:>12.1f}'.format(shape, objects, name, elapsed * 1e3,
+                                                                       retained / 1e3))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+Compare the peak memory and time of Parser.parse and Parser.parse_file.
+
+Run from the src directory: python -m benchmarks.parser_memory [--depth N --fanout N ...]
+"""
+import argparse
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.synthetic import make_spec_str
+from parser.parser import Parser
+
+
+def measure(function):
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        function()
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return elapsed, peak
+
+
+def main():
+    arguments = argparse.ArgumentParser()
+    arguments.add_argument('--depth', type=int, default=3)
+    arguments.add_argument('--fanout', type=int, default=8)
+    arguments.add_argument('--classes', type=int, default=4)
+    arguments.add_argument('--methods', type=int, default=16)
+    arguments.add_argument('--arguments', type=int, default=3)
+    args = arguments.parse_args()
+
+    spec = make_spec_str(depth=args.depth, fanout=args.fanout, classes=args.classes,
+                         methods=args.methods, arguments=args.arguments)
+
+    with tempfile.NamedTemporaryFile('w', suffix='.json') as spec_file:
+        spec_file.write(spec)
+        spec_file.flush()
+        del spec
+
+        def parse():
+            with open(spec_file.name) as f:
+                Parser().parse(f.read())
+
+        def parse_file():
+            with open(spec_file.name) as f:
+                Parser().parse_file(f)
+
+        print('spec size: {:.1f} MB'.format(len(open(spec_file.name).read()) / 1e6))
+
+        for name, function in (('parse', parse), ('parse_file', parse_file)):
+            elapsed, peak = measure(function)
+            print('{:<12} {:8.3f} s  peak {:8.1f} MB'.format(name, elapsed, peak / 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,169 @@
+"""
+Compare CPU bound methods that run inline in the generated Flask server with the same methods run in its
+process pool ({"executor": {"type": "process"}} in the spec): the throughput of the calls by the number of
+concurrent calls, and the latency of a light inline method that is called while the CPU bound calls run.
+
+Run from the src directory: python -m benchmarks.process_pool [--work-ms 20 --calls 64 --concurrency 1 2 4 8]
+The server runs in a separate process with as many pool workers as CPUs (--workers), the load comes from the
+fan-out (<method>_map) of the generated requests client. Requires flask and requests.
+"""
+import argparse
+import importlib
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks.server_throughput import free_port, load_module, serve_flask, write_files
+from benchmarks.streaming import wait_for_port
+
+SPEC = {
+    'namespaces': [{'name': 'cpu', 'methods': [
+        {'name': 'burn', 'return_type': 'int', 'arguments': [{'name': 'n', 'type': 'int'}]},
+        {'name': 'burn_process', 'return_type': 'int', 'arguments': [{'name': 'n', 'type': 'int'}],
+         'executor': {'type': 'process'}},
+        {'name': 'ping', 'return_type': 'int', 'arguments': []},
+    ]}],
+}
+
+MODES = (('inline', 'burn'), ('process', 'burn_process'))
+
+
+def burn(n):
+    total = 0
+    for i in range(n):
+        total += i * i
+    return total
+
+
+class Cpu:
+    burn = staticmethod(burn)
+    burn_process = staticmethod(burn)
+
+    @staticmethod
+    def ping():
+        return 1
+
+
+class Interface:
+    """Importable by the pool workers whatever their start method"""
+
+    def __init__(self):
+        self.cpu = Cpu()
+
+
+def calibrate(work):
+    """:return: The n that burn takes about work seconds for."""
+    n = 10000
+    while True:
+        start = time.perf_counter()
+        burn(n)
+        elapsed = time.perf_counter() - start
+
+        if elapsed > 0.05:
+            return max(1, int(n * work / elapsed))
+        n *= 2
+
+
+def serve(server_dir, port, workers):
+    # The pool workers import the generated modules by name.
+    sys.path.append(server_dir)
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+
+    app_module = load_module(server_dir, 'app.py', 'process_pool_app')
+    app_module.interface = Interface()
+    app_module.processes.MAX_WORKERS = workers
+
+    serve_flask(app_module.app, port)
+    while True:
+        time.sleep(3600)
+
+
+def measure(interface, method, n, calls, concurrency):
+    """:return: The calls per second of a fan-out and the median latency of the pings that ran meanwhile."""
+    pings = []
+    done = threading.Event()
+
+    def ping():
+        while not done.is_set():
+            start = time.perf_counter()
+            interface.cpu.ping()
+            pings.append(time.perf_counter() - start)
+
+    pinger = threading.Thread(target=ping)
+    start = time.perf_counter()
+    pinger.start()
+
+    try:
+        for result in getattr(interface.cpu, method + '_map')(({'n': n} for _ in range(calls)), concurrency):
+            result.result()
+        elapsed = time.perf_counter() - start
+    finally:
+        done.set()
+        pinger.join()
+
+    return calls / elapsed, statistics.median(pings) if pings else float('nan')
+
+
+def main():
+    arguments = argparse.ArgumentParser()
+    arguments.add_argument('--work-ms', type=float, default=20, help='The CPU time of a call.')
+    arguments.add_argument('--calls', type=int, default=64)
+    arguments.add_argument('--concurrency', type=int, nargs='+', default=[1, 2, 4, 8])
+    arguments.add_argument('--workers', type=int, default=os.cpu_count())
+    arguments.add_argument('--serve', nargs=3, metavar=('SERVER_DIR', 'PORT', 'WORKERS'), help=argparse.SUPPRESS)
+    args = arguments.parse_args()
+
+    if args.serve:
+        serve(args.serve[0], int(args.serve[1]), int(args.serve[2]))
+        return
+
+    from generators.python.server_flask.main import ServerGenerator
+    ClientGenerator = importlib.import_module('generators.python.client-requests.main').ClientGenerator
+
+    n = calibrate(args.work_ms / 1000)
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        server_dir = write_files(ServerGenerator(metrics=False), out_dir, SPEC)
+        client_dir = write_files(ClientGenerator('127.0.0.1', 0), out_dir, SPEC)
+        client = load_module(client_dir, 'main.py', 'client_main')
+
+        port = free_port()
+        server = subprocess.Popen([sys.executable, '-m', 'benchmarks.process_pool',
+                                   '--serve', server_dir, str(port), str(args.workers)])
+
+        try:
+            wait_for_port(port)
+            print('{} CPUs, {} pool workers, {:g} ms of CPU per call'.format(os.cpu_count(), args.workers,
+                                                                             args.work_ms))
+            print('{:<8} {:>11} {:>10} {:>8} {:>15}'.format('mode', 'concurrency', 'calls/s', 'speedup',
+                                                            'ping p50 (ms)'))
+
+            url = 'http://127.0.0.1:{}'.format(port)
+            max_concurrency = max(args.concurrency)
+
+            for mode, method in MODES:
+                with client.session.Session(url, pool_maxsize=max_concurrency + 1) as session:
+                    interface = client.Interface(session)
+                    # Warm the pool up.
+                    getattr(interface.cpu, method)(n=1)
+
+                    baseline = None
+                    for concurrency in args.concurrency:
+                        throughput, ping = measure(interface, method, n, args.calls, concurrency)
+                        if baseline is None:
+                            baseline = throughput
+
+                        print('{:<8} {:>11} {:>10.1f} {:>8.2f} {:>15.2f}'.format(
+                            mode, concurrency, throughput, throughput / baseline, ping * 1e3))
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == '__main__':
+    main()
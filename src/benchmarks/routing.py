@@ -0,0 +1,127 @@
+"""
+Compare the Flask server's routing modes at 100, 1k and 10k paths: the import time of the generated app
+(including building the URL map on the first match) and the per-request routing overhead, which is the
+URL map match plus, in dispatch mode, the path lookup in the generated dict.
+
+Run from the src directory: python -m benchmarks.routing [--endpoints 100 1000 10000]
+Every measurement runs in a new interpreter. Requires flask.
+"""
+import argparse
+import importlib.util
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+
+from benchmarks.synthetic import make_method
+from parser.parser import Parser
+
+METHODS_PER_NAMESPACE = 100
+
+
+def make_spec(endpoints):
+    namespaces = []
+
+    for index in range(0, endpoints, METHODS_PER_NAMESPACE):
+        count = min(METHODS_PER_NAMESPACE, endpoints - index)
+        namespaces.append({'name': 'N{}'.format(index // METHODS_PER_NAMESPACE),
+                           'methods': [make_method(i, 1) for i in range(count)]})
+
+    return {'namespaces': namespaces}
+
+
+def write_server(spec, routing, out_dir):
+    from generators.python.server_flask.main import ServerGenerator
+
+    files = ServerGenerator(metrics=False, routing=routing).generate(Parser().parse(json.dumps(spec)))
+    server_dir = os.path.join(out_dir, routing)
+
+    for file_path, content in files.items():
+        file_path = os.path.join(server_dir, file_path)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, 'w') as f:
+            f.writelines(line + '\n' for line in content)
+
+    return server_dir
+
+
+def measure_server(server_dir, paths_file, requests):
+    """Run in the server's own interpreter, print the measurements as json"""
+    import flask  # noqa: F401, the framework's import is not part of the app's
+
+    sys.path.insert(0, server_dir)
+
+    start = time.perf_counter()
+    import app
+    adapter = app.app.url_map.bind('localhost')
+    adapter.match('/_batch', method='POST')
+    import_time = time.perf_counter() - start
+
+    with open(paths_file) as f:
+        paths = json.load(f)
+
+    routes = getattr(app, 'ROUTES', None)
+    urls = ['/' + path for path in paths]
+
+    if routes is None:
+        def route():
+            for url in urls:
+                adapter.match(url, method='POST')
+    else:
+        def route():
+            for url in urls:
+                _, arguments = adapter.match(url, method='POST')
+                routes.get(arguments['path'])
+
+    per_request = min(timeit.repeat(route, number=1, repeat=requests)) / len(urls)
+
+    print(json.dumps({'import_s': import_time, 'route_us': per_request * 1e6}))
+
+
+def main():
+    arguments = argparse.ArgumentParser()
+    arguments.add_argument('--endpoints', type=int, nargs='+', default=[100, 1000, 10000])
+    arguments.add_argument('--requests', type=int, default=5, help='the rounds over the sampled paths')
+    arguments.add_argument('--sample', type=int, default=2000, help='the number of paths routed per round')
+    arguments.add_argument('--measure', nargs=3, metavar=('SERVER_DIR', 'PATHS_FILE', 'REQUESTS'),
+                           help=argparse.SUPPRESS)
+    args = arguments.parse_args()
+
+    if args.measure:
+        server_dir, paths_file, requests = args.measure
+        measure_server(server_dir, paths_file, int(requests))
+        return
+
+    if importlib.util.find_spec('flask') is None:
+        print('flask is not installed')
+        sys.exit(1)
+
+    print('{:>9} {:<10} {:>12} {:>14}'.format('endpoints', 'routing', 'import (ms)', 'routing (us)'))
+
+    for endpoints in args.endpoints:
+        spec = make_spec(endpoints)
+        paths = ['{}/{}'.format(namespace['name'], method['name'])
+                 for namespace in spec['namespaces'] for method in namespace['methods']]
+
+        with tempfile.TemporaryDirectory() as out_dir:
+            paths_file = os.path.join(out_dir, 'paths.json')
+            with open(paths_file, 'w') as f:
+                json.dump(random.Random(0).choices(paths, k=args.sample), f)
+
+            for routing in ('routes', 'dispatch'):
+                server_dir = write_server(spec, routing, out_dir)
+                output = subprocess.run([sys.executable, '-m', 'benchmarks.routing', '--measure',
+                                         server_dir, paths_file, str(args.requests)],
+                                        check=True, stdout=subprocess.PIPE, universal_newlines=True).stdout
+                result = json.loads(output)
+
+                print('{:>9} {:<10} {:>12.1f} {:>14.2f}'.format(endpoints, routing, result['import_s'] * 1e3,
+                                                                result['route_us']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,242 @@
+"""
+Compare the throughput and the p99 latency of the generated ASGI server with the generated Flask server
+over loopback, while every call blocks (or awaits) for --work milliseconds.
+
+Run from the src directory: python -m benchmarks.server_throughput [--calls N --concurrency N --work MS]
+The ASGI app is served by uvicorn when it is installed, by a minimal HTTP/1.1 adapter otherwise.
+The Flask server is skipped when flask is not installed. The load comes from the generated asyncio client.
+"""
+import argparse
+import asyncio
+import importlib.util
+import json
+import logging
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+import types
+
+from benchmarks.client_throughput import SPEC
+from parser.parser import Parser
+
+# Modules that every generated output imports by the same name.
+_GENERATED_MODULES = ('wire', 'decoders', 'helpers', 'flask_app', 'asgi', 'transport', 'session')
+
+
+def write_files(generator, out_dir, spec=SPEC):
+    files = generator.generate(Parser().parse(json.dumps(spec)))
+    generator_dir = os.path.join(out_dir, generator.name)
+
+    for file_path, content in files.items():
+        file_path = os.path.join(generator_dir, file_path)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, 'w') as f:
+            f.writelines(line + '\n' for line in content)
+
+    return generator_dir
+
+
+def load_module(generator_dir, file_name, module_name):
+    """Import a generated module, its siblings shadow the ones of previously loaded outputs"""
+    for name in _GENERATED_MODULES:
+        sys.modules.pop(name, None)
+
+    sys.path.insert(0, generator_dir)
+    try:
+        spec = importlib.util.spec_from_file_location(module_name, os.path.join(generator_dir, file_name))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    finally:
+        sys.path.remove(generator_dir)
+
+    return module
+
+
+def make_interface(work, is_async):
+    if is_async:
+        async def echo(value):
+            await asyncio.sleep(work)
+            return value
+    else:
+        def echo(value):
+            time.sleep(work)
+            return value
+
+    return types.SimpleNamespace(bench=types.SimpleNamespace(echo=echo))
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+async def _serve_connection(app, reader, writer):
+    """
+    Serve keep-alive HTTP/1.1 requests with a known Content-Length, enough for the benchmark clients.
+    Responses without a Content-Length are sent chunked.
+    """
+    try:
+        while True:
+            try:
+                head = await reader.readuntil(b'\r\n\r\n')
+            except (asyncio.IncompleteReadError, ConnectionError):
+                return
+
+            request_line, *header_lines = head[:-4].decode('latin-1').split('\r\n')
+            method, target, _ = request_line.split(' ', 2)
+
+            headers = []
+            for header_line in header_lines:
+                name, _, value = header_line.partition(':')
+                headers.append((name.strip().lower().encode('latin-1'), value.strip().encode('latin-1')))
+
+            body = await reader.readexactly(int(dict(headers).get(b'content-length', b'0')))
+
+            async def receive():
+                return {'type': 'http.request', 'body': body, 'more_body': False}
+
+            is_chunked = False
+
+            async def send(message):
+                nonlocal is_chunked
+
+                if message['type'] == 'http.response.start':
+                    response_headers = message.get('headers', ())
+                    lines = ['HTTP/1.1 {} -'.format(message['status'])]
+                    lines.extend('{}: {}'.format(name.decode('latin-1'), value.decode('latin-1'))
+                                 for name, value in response_headers)
+
+                    if not any(name.lower() == b'content-length' for name, _ in response_headers):
+                        is_chunked = True
+                        lines.append('Transfer-Encoding: chunked')
+
+                    writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+                    return
+
+                body = message.get('body', b'')
+                if is_chunked:
+                    if body:
+                        writer.write('{:x}\r\n'.format(len(body)).encode('latin-1') + body + b'\r\n')
+                    if not message.get('more_body', False):
+                        writer.write(b'0\r\n\r\n')
+                else:
+                    writer.write(body)
+
+                await writer.drain()
+
+            scope = {'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': method,
+                     'path': target.split('?', 1)[0], 'query_string': b'', 'headers': headers}
+            await app(scope, receive, send)
+    finally:
+        writer.close()
+
+
+def serve_asgi(app, port):
+    """Serve an ASGI app from a background thread"""
+    if importlib.util.find_spec('uvicorn') is not None:
+        import uvicorn
+
+        server = uvicorn.Server(uvicorn.Config(app, host='127.0.0.1', port=port, log_level='warning'))
+        threading.Thread(target=server.run, daemon=True).start()
+        while not server.started:
+            time.sleep(0.01)
+        return 'uvicorn'
+
+    started = threading.Event()
+
+    async def run():
+        await asyncio.start_server(lambda reader, writer: _serve_connection(app, reader, writer),
+                                   '127.0.0.1', port)
+        started.set()
+        await asyncio.Event().wait()
+
+    threading.Thread(target=asyncio.run, args=(run(),), daemon=True).start()
+    started.wait()
+    return 'asyncio adapter'
+
+
+def serve_flask(app, port):
+    from werkzeug.serving import make_server
+
+    # The development server logs every request.
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+
+    server = make_server('127.0.0.1', port, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return 'werkzeug'
+
+
+def run_load(client_module, url, calls, concurrency):
+    """:return: The elapsed time and the sorted latencies of the calls."""
+    async def worker(client, values, latencies):
+        # Every worker keeps one call in flight so the latencies do not include queueing in the client.
+        for value in values:
+            start = time.perf_counter()
+            await client.bench.echo(value=value)
+            latencies.append(time.perf_counter() - start)
+
+    async def run():
+        session = client_module.transport.Session(url, pool_maxsize=concurrency, max_concurrency=concurrency)
+        client = client_module.Interface(session)
+        latencies = []
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client, range(i, calls, concurrency), latencies) for i in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+        await session.close()
+        return elapsed, sorted(latencies)
+
+    return asyncio.run(run())
+
+
+def main():
+    arguments = argparse.ArgumentParser()
+    arguments.add_argument('--calls', type=int, default=2000)
+    arguments.add_argument('--concurrency', type=int, default=64)
+    arguments.add_argument('--work', type=float, default=5, help='The duration of every call in milliseconds')
+    arguments.add_argument('--max-workers', type=int, default=64, help='The thread pool size of the ASGI app')
+    args = arguments.parse_args()
+
+    from generators.python.client_asyncio.main import ClientGenerator
+    from generators.python.server_asgi.main import ServerGenerator as AsgiServerGenerator
+    from generators.python.server_flask.main import ServerGenerator as FlaskServerGenerator
+
+    work = args.work / 1000
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        asgi_dir = write_files(AsgiServerGenerator(), out_dir)
+        servers = [('asgi (sync)', asgi_dir, serve_asgi, False),
+                   ('asgi (async)', asgi_dir, serve_asgi, True)]
+
+        if importlib.util.find_spec('flask') is not None:
+            servers.append(('flask', write_files(FlaskServerGenerator(), out_dir), serve_flask, False))
+        else:
+            print('flask is not installed, skipping the Flask server')
+
+        client_dir = write_files(ClientGenerator('http://127.0.0.1', 0), out_dir)
+
+        for index, (name, server_dir, serve, is_async) in enumerate(servers):
+            app_module = load_module(server_dir, 'app.py', 'server_app_{}'.format(index))
+            app_module.interface = make_interface(work, is_async)
+            if hasattr(app_module.app, 'max_workers'):
+                app_module.app.max_workers = args.max_workers
+
+            port = free_port()
+            served_by = serve(app_module.app, port)
+
+            client_module = load_module(client_dir, 'main.py', 'client_main_{}'.format(index))
+            elapsed, latencies = run_load(client_module, 'http://127.0.0.1:{}'.format(port),
+                                          args.calls, args.concurrency)
+            p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+
+            print('{:<14} {:<16} {:8.0f} requests/sec  p99 {:7.2f} ms'.format(name, served_by, args.calls / elapsed,
+                                                                               p99 * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Measure the startup of the command line: a cold `python main.py --help` and a run of a single generator
+over a small specification, every sample in a new interpreter.
+
+Run from the src directory: python -m benchmarks.startup [--runs N --max-help-ms MS --max-run-ms MS]
+With --max-help-ms/--max-run-ms the benchmark exits with an error when the median is above the limit,
+so it can guard against startup regressions.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import make_spec_str
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure(command, runs):
+    """:return: The wall time of every run of a command in seconds."""
+    samples = []
+
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=SRC_DIR, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        samples.append(time.perf_counter() - start)
+
+    return samples
+
+
+def main():
+    arguments = argparse.ArgumentParser()
+    arguments.add_argument('--runs', type=int, default=10)
+    arguments.add_argument('--generator', default='python-flask')
+    arguments.add_argument('--max-help-ms', type=float, default=None)
+    arguments.add_argument('--max-run-ms', type=float, default=None)
+    arguments.add_argument('--output', type=str, default=None, help='write the results as json to this file')
+    args = arguments.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        spec_path = os.path.join(temp_dir, 'spec.json')
+        with open(spec_path, 'w') as f:
+            f.write(make_spec_str(depth=1, fanout=1, classes=1, methods=1))
+
+        # The interpreter alone, the other numbers include it.
+        commands = {
+            'python': [sys.executable, '-c', 'pass'],
+            'help': [sys.executable, 'main.py', '--help'],
+            'run': [sys.executable, 'main.py', spec_path, os.path.join(temp_dir, 'out'), '--update',
+                    '-g', args.generator],
+        }
+
+        results = {}
+        for name, command in commands.items():
+            samples = measure(command, args.runs)
+            results[name] = {'median_ms': statistics.median(samples) * 1e3, 'min_ms': min(samples) * 1e3}
+            print('{:<8} median {:7.1f} ms  min {:7.1f} ms'.format(name, results[name]['median_ms'],
+                                                                   results[name]['min_ms']))
+
+    if args.output is not None:
+        with open(args.output, 'w') as f:
+            json.dump({'python': sys.version, 'runs': args.runs, 'results': results}, f, indent=1)
+
+    failed = False
+    for name, limit in (('help', args.max_help_ms), ('run', args.max_run_ms)):
+        if limit is not None and results[name]['median_ms'] > limit:
+            print('{} took {:.1f} ms, more than {:.1f} ms'.format(name, results[name]['median_ms'], limit))
+            failed = True
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
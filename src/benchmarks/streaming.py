@@ -0,0 +1,168 @@
+"""
+Compare a list result that is sent whole with the same result streamed as NDJSON: the client's
+time to the first item, the total time and the client's peak memory while it consumes every item.
+
+Run from the src directory: python -m benchmarks.streaming [--items 10000 100000 1000000]
+The generated ASGI server runs in a separate process (see benchmarks.server_throughput.serve_asgi),
+the load comes from the generated asyncio client.
+First checks that both clients send a streamed call right away: an invalid call raises where it is made.
+"""
+import argparse
+import asyncio
+import importlib.util
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import types
+
+from benchmarks.server_throughput import free_port, load_module, serve_asgi, write_files
+
+SPEC = {
+    'namespaces': [{'name': 'data', 'methods': [{'name': 'rows', 'return_type': 'list',
+                                                 'arguments': [{'name': 'count', 'type': 'int'}]}]}],
+}
+
+
+def serve(server_dir, port):
+    def rows(count):
+        for index in range(count):
+            yield {'index': index, 'name': 'item-{}'.format(index)}
+
+    app_module = load_module(server_dir, 'app.py', 'streaming_app')
+    app_module.interface = types.SimpleNamespace(data=types.SimpleNamespace(rows=rows))
+
+    serve_asgi(app_module.app, port)
+    while True:
+        time.sleep(3600)
+
+
+def wait_for_port(port, timeout=10):
+    deadline = time.monotonic() + timeout
+
+    while True:
+        try:
+            socket.create_connection(('127.0.0.1', port)).close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.05)
+
+
+def check_call_errors(clients, url):
+    """Assert that the call of a stream with invalid arguments raises CallError before its items are read"""
+    for name, client in clients:
+        if name == 'asyncio':
+            call_error = client.transport.CallError
+
+            async def call():
+                session = client.transport.Session(url)
+                try:
+                    await client.Interface(session).data.rows(count='invalid')
+                finally:
+                    await session.close()
+        else:
+            call_error = client.session.CallError
+
+            def call():
+                with client.session.Session(url) as session:
+                    client.Interface(session).data.rows(count='invalid')
+
+        try:
+            if asyncio.iscoroutinefunction(call):
+                asyncio.run(call())
+            else:
+                call()
+        except call_error as err:
+            print('{}: the invalid call raised {}'.format(name, err))
+        else:
+            raise AssertionError('{}: the invalid call did not raise'.format(name))
+
+
+def measure(consume):
+    """:return: The time to the first item, the total time and the peak memory of consuming a result."""
+    async def run():
+        start = time.perf_counter()
+        first = None
+
+        async for _ in consume():
+            if first is None:
+                first = time.perf_counter() - start
+
+        return first, time.perf_counter() - start
+
+    tracemalloc.start()
+    try:
+        first, total = asyncio.run(run())
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return first, total, peak
+
+
+def main():
+    arguments = argparse.ArgumentParser()
+    arguments.add_argument('--items', type=int, nargs='+', default=[10000, 100000, 1000000])
+    arguments.add_argument('--serve', nargs=2, metavar=('SERVER_DIR', 'PORT'), help=argparse.SUPPRESS)
+    args = arguments.parse_args()
+
+    if args.serve:
+        serve(args.serve[0], int(args.serve[1]))
+        return
+
+    from generators.python.client_asyncio.main import ClientGenerator
+    from generators.python.server_asgi.main import ServerGenerator
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        server_dir = write_files(ServerGenerator(), out_dir, SPEC)
+        client_dir = write_files(ClientGenerator('http://127.0.0.1', 0), out_dir, SPEC)
+        client = load_module(client_dir, 'main.py', 'client_main')
+        clients = [('asyncio', client)]
+
+        if importlib.util.find_spec('requests') is not None:
+            requests_generator = importlib.import_module('generators.python.client-requests.main').ClientGenerator
+            requests_dir = write_files(requests_generator('http://127.0.0.1', 0), out_dir, SPEC)
+            clients.append(('requests', load_module(requests_dir, 'main.py', 'requests_client_main')))
+
+        port = free_port()
+        url = 'http://127.0.0.1:{}'.format(port)
+        server = subprocess.Popen([sys.executable, '-m', 'benchmarks.streaming', '--serve', server_dir, str(port)])
+
+        try:
+            wait_for_port(port)
+            check_call_errors(clients, url)
+
+            print('{:>9} {:<9} {:>12} {:>10} {:>11}'.format('items', 'mode', 'first (ms)', 'total (s)', 'peak (MB)'))
+
+            for count in args.items:
+                async def whole():
+                    session = client.transport.Session(url)
+                    try:
+                        for item in await session.call('data/rows', {'count': count}):
+                            yield item
+                    finally:
+                        await session.close()
+
+                async def streamed():
+                    session = client.transport.Session(url)
+                    try:
+                        async for item in await client.Interface(session).data.rows(count=count):
+                            yield item
+                    finally:
+                        await session.close()
+
+                for mode, consume in (('whole', whole), ('streamed', streamed)):
+                    first, total, peak = measure(consume)
+                    print('{:>9} {:<9} {:>12.1f} {:>10.2f} {:>11.1f}'.format(count, mode, first * 1e3, total,
+                                                                              peak / 1e6))
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == '__main__':
+    main()
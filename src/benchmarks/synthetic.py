@@ -0,0 +1,86 @@
+"""Synthetic specifications for the benchmarks."""
+import json
+
+_TYPES = ('int', 'dict', 'list')
+
+
+def make_method(index, arguments):
+    return {
+        'name': 'method_{}'.format(index),
+        'return_type': _TYPES[index % len(_TYPES)],
+        'arguments': [{'name': 'argument_{}'.format(i), 'type': _TYPES[i % len(_TYPES)]}
+                      for i in range(arguments)],
+    }
+
+
+def make_class(index, methods, arguments, attributes):
+    return {
+        'name': 'Class{}'.format(index),
+        'methods': [make_method(i, arguments) for i in range(methods)],
+        'attributes': [{'name': 'attribute_{}'.format(i), 'type': _TYPES[i % len(_TYPES)]}
+                       for i in range(attributes)],
+    }
+
+
+def make_namespace(name, depth, fanout, classes, methods, arguments, attributes):
+    namespace = {
+        'name': name,
+        'methods': [make_method(i, arguments) for i in range(methods)],
+        'classes': [make_class(i, methods, arguments, attributes) for i in range(classes)],
+    }
+
+    if depth > 1:
+        namespace['namespaces'] = [make_namespace('{}_{}'.format(name, i), depth - 1, fanout,
+                                                  classes, methods, arguments, attributes)
+                                   for i in range(fanout)]
+
+    return namespace
+
+
+def make_spec(depth=2, fanout=4, classes=2, methods=8, arguments=3, attributes=2):
+    """
+    Build a specification dict.
+    :param depth: The depth of the namespace tree.
+    :param fanout: The number of child namespaces of every namespace.
+    :param classes: The number of classes in every namespace.
+    :param methods: The number of methods in every namespace and class.
+    :param arguments: The number of arguments of every method.
+    :param attributes: The number of attributes of every class.
+    """
+    return {
+        'namespaces': [make_namespace('N{}'.format(i), depth, fanout, classes, methods, arguments, attributes)
+                       for i in range(fanout)],
+    }
+
+
+def make_spec_str(**kwargs):
+    return json.dumps(make_spec(**kwargs))
+
+
+def count_spec(spec: dict):
+    """
+    Count the elements of a specification dict.
+    :return: A dict of the number of namespaces, classes, methods, arguments and attributes.
+    """
+    counts = dict(namespaces=0, classes=0, methods=0, arguments=0, attributes=0)
+
+    def count_methods(methods):
+        counts['methods'] += len(methods)
+        counts['arguments'] += sum(len(method.get('arguments', ())) for method in methods)
+
+    def count_namespace(namespace):
+        counts['namespaces'] += 1
+        count_methods(namespace.get('methods', ()))
+
+        for klass in namespace.get('classes', ()):
+            counts['classes'] += 1
+            counts['attributes'] += len(klass.get('attributes', ()))
+            count_methods(klass.get('methods', ()))
+
+        for child in namespace.get('namespaces', ()):
+            count_namespace(child)
+
+    for namespace in spec.get('namespaces', ()):
+        count_namespace(namespace)
+
+    return counts
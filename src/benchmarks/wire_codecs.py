@@ -0,0 +1,39 @@
+"""
+Compare the payload size and the encode/decode time of the wire codecs.
+
+Run from the src directory: python -m benchmarks.wire_codecs
+"""
+import timeit
+
+from generators.python.common.static import wire
+
+PAYLOADS = {
+    'int list': list(range(-5000, 5000)),
+    'float list': [i / 7 for i in range(10000)],
+    'str dict': {'key_{}'.format(i): 'value_{}'.format(i) for i in range(5000)},
+    'records': [{'id': i, 'name': 'name_{}'.format(i), 'tags': ['a', 'b'], 'active': i % 2 == 0}
+                for i in range(2000)],
+}
+
+
+def main():
+    codecs = [wire.JsonCodec, wire.PureMsgpackCodec]
+    if wire.msgpack is not None:
+        codecs.append(wire.NativeMsgpackCodec)
+
+    print('{:<12} {:<20} {:>10} {:>12} {:>12}'.format('payload', 'codec', 'bytes', 'encode (ms)', 'decode (ms)'))
+
+    for payload_name, payload in PAYLOADS.items():
+        for codec in codecs:
+            data = codec.encode(payload)
+            assert codec.decode(data) == payload
+
+            encode = min(timeit.repeat(lambda: codec.encode(payload), number=5, repeat=3)) / 5
+            decode = min(timeit.repeat(lambda: codec.decode(data), number=5, repeat=3)) / 5
+
+            print('{:<12} {:<20} {:>10} {:>12.2f} {:>12.2f}'.format(payload_name, codec.__name__, len(data),
+                                                                    encode * 1e3, decode * 1e3))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,244 @@
+import hashlib
+import json
+import logging
+import os
+from os import path
+
+logger = logging.getLogger(__name__)
+
+
+def render_lines(content):
+    """Render a list of lines the same way they are written to disk"""
+    return ''.join(line + '\n' for line in content).encode()
+
+
+def content_hash(data: bytes):
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_hash(file_path: str):
+    digest = hashlib.sha256()
+
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+class DirectWriter:
+    """
+    Write generated files as they are produced.
+    :param update: Overwrite existing files instead of failing.
+    """
+
+    def __init__(self, out_dir: str, update: bool):
+        self.out_dir = out_dir
+        self.written = 0
+
+        if update:
+            self._open_mode = 'w'
+        else:
+            self._open_mode = 'x'
+
+    def path(self, file: str):
+        return path.join(self.out_dir, file)
+
+    def open(self, file: str):
+        """
+        Open a file for writing line by line.
+        :return: An object with write(line) and close() methods.
+        """
+        file_path = self.path(file)
+
+        logger.info('writing {} to {}'.format(path.basename(file_path), file_path))
+
+        os.makedirs(path.dirname(file_path), exist_ok=True)
+        self.written += 1
+        return _LineFile(open(file_path, self._open_mode))
+
+    def write(self, file: str, content):
+        f = self.open(file)
+        for line in content:
+            f.write(line)
+        f.close()
+
+    def finish(self):
+        """:return: A (written, skipped, deleted) tuple."""
+        return self.written, 0, 0
+
+
+class _LineFile:
+    def __init__(self, f):
+        self._file = f
+
+    def write(self, line: str):
+        self._file.write(line)
+        self._file.write('\n')
+
+    def close(self):
+        self._file.close()
+
+
+class IncrementalWriter:
+    """
+    Write generated files only when their content changed.
+
+    The hash, size and mtime of every written file are kept in a manifest inside the output directory,
+    a file whose size or mtime changed since (e.g. edited by hand) is hashed again;
+    files that were listed in the previous manifest but are not emitted anymore are removed.
+    """
+    MANIFEST_NAME = '.keepcalm-manifest.json'
+
+    def __init__(self, out_dir: str):
+        self.out_dir = out_dir
+        self.written = 0
+        self.skipped = 0
+        self.deleted = 0
+
+        self._previous = self._load_manifest()
+        self._current = {}
+
+    def _manifest_path(self):
+        return path.join(self.out_dir, self.MANIFEST_NAME)
+
+    def _load_manifest(self):
+        try:
+            with open(self._manifest_path()) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+        if not isinstance(manifest, dict):
+            return {}
+
+        return manifest
+
+    def _save_manifest(self):
+        os.makedirs(self.out_dir, exist_ok=True)
+        with open(self._manifest_path(), 'w') as f:
+            json.dump(self._current, f, indent=1, sort_keys=True)
+
+    def _known_hash(self, file: str, file_path: str):
+        """
+        Get the hash of the file currently on disk, prefer the manifest over reading the file
+        when the size and mtime that it recorded still match.
+        """
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+
+        known = self._previous.get(file)
+        if isinstance(known, list) and known[1:] == [stat.st_size, stat.st_mtime_ns]:
+            return known[0]
+
+        return file_hash(file_path)
+
+    def _record(self, file: str, digest: str):
+        """Keep the hash of a file that is now on disk in the new manifest, with its size and mtime"""
+        stat = os.stat(self.path(file))
+        self._current[file] = [digest, stat.st_size, stat.st_mtime_ns]
+
+    def path(self, file: str):
+        return path.join(self.out_dir, file)
+
+    def open(self, file: str):
+        """
+        Open a file for writing line by line.
+        The lines go to a temporary file that replaces the target only if the content changed.
+        :return: An object with write(line) and close() methods.
+        """
+        return _PendingFile(self, file)
+
+    def _is_up_to_date(self, file: str, digest: str):
+        file_path = self.path(file)
+
+        if self._known_hash(file, file_path) == digest:
+            logger.debug('{} is up to date'.format(file_path))
+            self.skipped += 1
+            return True
+
+        logger.info('writing {} to {}'.format(path.basename(file_path), file_path))
+        self.written += 1
+        return False
+
+    def write(self, file: str, content):
+        """
+        Write a file (a list of lines) relative to the output directory.
+        :return: True if the file was written, False if it was already up to date.
+        """
+        data = render_lines(content)
+
+        digest = content_hash(data)
+
+        if self._is_up_to_date(file, digest):
+            self._record(file, digest)
+            return False
+
+        file_path = self.path(file)
+        os.makedirs(path.dirname(file_path), exist_ok=True)
+        with open(file_path, 'wb') as f:
+            f.write(data)
+
+        self._record(file, digest)
+        return True
+
+    def _commit(self, file: str, temp_path: str, digest: str):
+        if self._is_up_to_date(file, digest):
+            os.remove(temp_path)
+            self._record(file, digest)
+            return False
+
+        os.replace(temp_path, self.path(file))
+        self._record(file, digest)
+        return True
+
+    def _remove_stale_files(self):
+        for file in self._previous:
+            if file in self._current:
+                continue
+
+            file_path = path.join(self.out_dir, file)
+            try:
+                os.remove(file_path)
+            except FileNotFoundError:
+                continue
+
+            logger.info('removing stale file {}'.format(file_path))
+            self.deleted += 1
+
+    def finish(self):
+        """
+        Remove stale files and store the new manifest.
+        :return: A (written, skipped, deleted) tuple.
+        """
+        self._remove_stale_files()
+        self._save_manifest()
+
+        return self.counts()
+
+    def counts(self):
+        return self.written, self.skipped, self.deleted
+
+
+class _PendingFile:
+    def __init__(self, writer: IncrementalWriter, file: str):
+        self._writer = writer
+        self._file_name = file
+        self._digest = hashlib.sha256()
+
+        file_dir, file_basename = path.split(writer.path(file))
+        os.makedirs(file_dir, exist_ok=True)
+
+        self._temp_path = path.join(file_dir, '.{}.tmp'.format(file_basename))
+        self._file = open(self._temp_path, 'wb')
+
+    def write(self, line: str):
+        data = (line + '\n').encode()
+        self._digest.update(data)
+        self._file.write(data)
+
+    def close(self):
+        self._file.close()
+        self._writer._commit(self._file_name, self._temp_path, self._digest.hexdigest())
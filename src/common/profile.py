@@ -0,0 +1,260 @@
+import json
+import os
+import time
+from contextlib import contextmanager, nullcontext
+
+# The thread ids of the trace, file writes interleave with generation so they get their own row.
+MAIN_THREAD = 0
+WRITES_THREAD = 1
+
+_active = None
+
+
+def active():
+    """:return: The running Profiler, None when not profiling."""
+    return _active
+
+
+def phase(name: str, category='phase', **args):
+    """Time a phase of the run when profiling, do nothing otherwise"""
+    if _active is None:
+        return nullcontext()
+
+    return _active.phase(name, category, **args)
+
+
+def node(category: str, path: str, **args):
+    """Time a node of a traversal (e.g. a namespace) when profiling, do nothing otherwise"""
+    if _active is None:
+        return nullcontext()
+
+    return _active.node(category, path, **args)
+
+
+class Profiler:
+    """
+    Record the wall time, the CPU time and the allocations of the phases of a run, and the time of the
+    namespaces and classes that the generators traverse.
+
+    Every record is a plain dict so the records of worker processes can be sent back and merged.
+    :param trace_allocations: Trace the allocations with tracemalloc, which slows the run down.
+    """
+
+    def __init__(self, trace_allocations=True):
+        self.trace_allocations = trace_allocations
+        self.records = []
+
+        self._started_tracing = False
+        # The time spent in the children of every open node.
+        self._children_time = []
+
+    def start(self):
+        # tracemalloc is only imported when profiling, it slows the startup down.
+        import tracemalloc
+
+        global _active
+        _active = self
+
+        if self.trace_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+
+        return self
+
+    def stop(self):
+        import tracemalloc
+
+        global _active
+        if _active is self:
+            _active = None
+
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    @staticmethod
+    def _allocated():
+        import tracemalloc
+
+        if not tracemalloc.is_tracing():
+            return None
+
+        return tracemalloc.get_traced_memory()[0]
+
+    @contextmanager
+    def phase(self, name: str, category='phase', **args):
+        allocated = self._allocated()
+        cpu = time.process_time()
+        start = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - start
+            record = self._record(name, category, start, wall, args)
+            record['cpu'] = time.process_time() - cpu
+
+            if allocated is not None:
+                current = self._allocated()
+                if current is not None:
+                    record['allocated'] = current - allocated
+
+    @contextmanager
+    def node(self, category: str, path: str, **args):
+        self._children_time.append(0.0)
+        start = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - start
+            children_time = self._children_time.pop()
+            if self._children_time:
+                self._children_time[-1] += wall
+
+            record = self._record(path, category, start, wall, args)
+            record['self'] = wall - children_time
+
+    def add_write(self, file: str, start: float, wall: float, **args):
+        """Record the time spent writing a file, which may be spread over the generation"""
+        self._record(file, 'write', start, wall, args, WRITES_THREAD)
+
+    def _record(self, name, category, start, wall, args, tid=MAIN_THREAD):
+        record = {'name': name, 'category': category, 'start': start, 'wall': wall,
+                  'pid': os.getpid(), 'tid': tid, 'args': args}
+        self.records.append(record)
+        return record
+
+    def extend(self, records):
+        """Add the records of another (e.g. a worker's) profiler"""
+        self.records.extend(records)
+
+    def summary(self, top=10):
+        """:return: The lines of a table of the phases, the write time per generator and the slowest nodes."""
+        lines = ['{:<32} {:>10} {:>10} {:>12}'.format('phase', 'wall (ms)', 'cpu (ms)', 'alloc (KB)')]
+
+        for record in sorted(self.records, key=lambda record: record['start']):
+            if record['category'] not in ('phase', 'generator'):
+                continue
+
+            allocated = record.get('allocated')
+            lines.append('{:<32} {:>10.2f} {:>10.2f} {:>12}'.format(
+                record['name'], record['wall'] * 1e3, record['cpu'] * 1e3,
+                '-' if allocated is None else '{:.1f}'.format(allocated / 1024)))
+
+        writes = {}
+        for record in self.records:
+            if record['category'] == 'write':
+                generator = record['args'].get('generator', '')
+                files, wall = writes.get(generator, (0, 0.0))
+                writes[generator] = (files + 1, wall + record['wall'])
+
+        if writes:
+            lines.append('')
+            lines.append('{:<32} {:>10} {:>10}'.format('writes', 'files', 'wall (ms)'))
+            for generator, (files, wall) in writes.items():
+                lines.append('{:<32} {:>10} {:>10.2f}'.format(generator, files, wall * 1e3))
+
+        nodes = sorted((record for record in self.records if 'self' in record),
+                       key=lambda record: record['self'], reverse=True)[:top]
+
+        if nodes:
+            lines.append('')
+            lines.append('{:<32} {:<10} {:<16} {:>10} {:>10}'.format('slowest nodes', 'kind', 'generator',
+                                                                    'self (ms)', 'total (ms)'))
+            for record in nodes:
+                lines.append('{:<32} {:<10} {:<16} {:>10.2f} {:>10.2f}'.format(
+                    record['name'], record['category'], record['args'].get('generator', ''),
+                    record['self'] * 1e3, record['wall'] * 1e3))
+
+        return lines
+
+    def chrome_trace(self):
+        """:return: The records in the Chrome trace event format (chrome://tracing, Perfetto)."""
+        origin = min((record['start'] for record in self.records), default=0.0)
+        events = []
+
+        for pid in sorted({record['pid'] for record in self.records}):
+            for tid, thread_name in ((MAIN_THREAD, 'generation'), (WRITES_THREAD, 'writes')):
+                events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid,
+                               'args': {'name': thread_name}})
+
+        for record in self.records:
+            args = dict(record['args'])
+            for key in ('cpu', 'allocated', 'self'):
+                if key in record:
+                    args[key] = record[key]
+
+            events.append({'name': record['name'],
+                           'cat': record['category'],
+                           'ph': 'X',
+                           'ts': (record['start'] - origin) * 1e6,
+                           'dur': record['wall'] * 1e6,
+                           'pid': record['pid'],
+                           'tid': record['tid'],
+                           'args': args})
+
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def dump(self, file_path: str):
+        with open(file_path, 'w') as f:
+            json.dump(self.chrome_trace(), f)
+
+
+class ProfiledWriter:
+    """
+    Wrap a common.output writer to record the time spent writing every file.
+    :param generator: The name of the generator that the files belong to.
+    """
+
+    def __init__(self, writer, profiler: Profiler, generator: str):
+        self._writer = writer
+        self._profiler = profiler
+        self._generator = generator
+
+    def path(self, file: str):
+        return self._writer.path(file)
+
+    def open(self, file: str):
+        start = time.perf_counter()
+        return _ProfiledFile(self, file, start, self._writer.open(file))
+
+    def write(self, file: str, content):
+        start = time.perf_counter()
+        try:
+            return self._writer.write(file, content)
+        finally:
+            self._add_write(file, start, time.perf_counter() - start)
+
+    def _add_write(self, file, start, wall):
+        self._profiler.add_write(file, start, wall, generator=self._generator)
+
+    def finish(self):
+        return self._writer.finish()
+
+
+class _ProfiledFile:
+    def __init__(self, writer: ProfiledWriter, file: str, start: float, f):
+        self._writer = writer
+        self._name = file
+        self._start = start
+        self._file = f
+        self._wall = time.perf_counter() - start
+
+    def write(self, line: str):
+        start = time.perf_counter()
+        self._file.write(line)
+        self._wall += time.perf_counter() - start
+
+    def close(self):
+        start = time.perf_counter()
+        self._file.close()
+        self._wall += time.perf_counter() - start
+
+        self._writer._add_write(self._name, self._start, self._wall)
@@ -1,19 +1,54 @@
+from generators.sinks import MemorySink, RecordingSink
 from parser.classes import Interface
 
 
 class Generator:
-    def __init__(self, module_name):
+    def __init__(self, module_name, sink=None):
         self.name = module_name
-        self.__current_file_contents = []
-        self.__files = {}
+        self.__current_file = None
+
+        if sink is None:
+            sink = MemorySink()
+        self.__sink = sink
 
     def print(self):
-        for file in self.__files.values():
+        for file in self.files().values():
             if file:
                 print('\n'.join(file))
 
     def files(self):
-        return self.__files
+        return self.__sink.files()
+
+    def set_sink(self, sink):
+        """
+        Write through another sink, the files that were generated so far are moved to it.
+        """
+        previous_sink, self.__sink = self.__sink, sink
+
+        for path, lines in previous_sink.files().items():
+            if path == self.__current_file:
+                sink.open(path)
+                for line in lines:
+                    sink.write(line)
+            else:
+                sink.add_file(path, lines)
+
+    def close(self):
+        """Flush the current file"""
+        self.__sink.close()
+
+    def _sink(self):
+        return self.__sink
+
+    def _record(self):
+        """
+        Log the lines written from now on.
+        :return: The RecordingSink that keeps the log.
+        """
+        if not isinstance(self.__sink, RecordingSink):
+            self.__sink = RecordingSink(self.__sink)
+
+        return self.__sink
 
     def generate(self, interface: Interface) -> dict:
         """
@@ -27,21 +62,22 @@ class Generator:
         self._add_line('raise NotImplementedError()')
 
     def _add_file(self, filename, content):
-        self.__files[filename] = content
+        self.__sink.add_file(filename, content)
 
     def _add_files(self, files: dict):
-        self.__files.update(files)
+        for filename, content in files.items():
+            self._add_file(filename, content)
 
     def _set_current_file(self, path: str):
         """
         Replace the current file
         """
-        self.__current_file_contents = []
-        self._add_file(path, self.__current_file_contents)
+        self.__current_file = path
+        self.__sink.open(path)
 
     def _add_line(self, content: str):
         """Add line to the current file"""
-        self.__current_file_contents.append(content)
+        self.__sink.write(content)
 
     def _add_lines(self, lines: list):
         for line in lines:
@@ -0,0 +1,87 @@
+from parser.classes import Interface
+from parser.diff import fingerprint, fingerprints
+
+
+class FragmentCache:
+    """
+    The lines that a generator emitted for every namespace and class, kept between runs (e.g. in watch mode)
+    so a node whose subtree did not change is replayed instead of generated again.
+
+    Entries are keyed by the path, the indentation level and the subtree fingerprint of the node; the
+    entries that a run did not use are dropped when it finishes.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+        self._fingerprints = {}
+        self._entries = {}
+        self._used = {}
+        self._children = {}
+
+    def start(self, interface: Interface, node_fingerprints=None):
+        """
+        Start a run over an interface.
+        :param node_fingerprints: The parser.diff.fingerprints of the interface, computed if not given.
+        """
+        if node_fingerprints is None:
+            node_fingerprints = fingerprints(interface)
+
+        self._fingerprints = node_fingerprints
+        self._used = {}
+        self.hits = 0
+        self.misses = 0
+
+        for child in self._children.values():
+            child.start(interface, node_fingerprints)
+
+    def finish(self):
+        self._entries, self._used = self._used, {}
+        self._fingerprints = {}
+
+        for child in self._children.values():
+            child.finish()
+
+    def child(self, name: str):
+        """The cache of a sub-generator (e.g. the interface generator that a server runs)"""
+        cache = self._children.get(name)
+        if cache is None:
+            cache = self._children[name] = FragmentCache()
+            cache._fingerprints = self._fingerprints
+
+        return cache
+
+    def key(self, node, path: str, indentation_level: int):
+        node_fingerprint = self._fingerprints.get(id(node))
+        if node_fingerprint is None:
+            # A node of a previous run, that a replayed fragment kept (e.g. in a generator's method list).
+            node_fingerprint = self._fingerprints[id(node)] = fingerprint(node)
+
+        return path, indentation_level, node_fingerprint
+
+    def get(self, key):
+        """:return: A (lines, appended lists) tuple, None if the node has to be generated."""
+        fragment = self._entries.get(key) or self._used.get(key)
+
+        if fragment is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._used[key] = fragment
+
+        return fragment
+
+    def put(self, key, lines, appended):
+        self._used[key] = (lines, appended)
+
+    def counts(self):
+        """:return: The (hits, misses) of the current run, including the sub-generators."""
+        hits, misses = self.hits, self.misses
+
+        for child in self._children.values():
+            child_hits, child_misses = child.counts()
+            hits += child_hits
+            misses += child_misses
+
+        return hits, misses
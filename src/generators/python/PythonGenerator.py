@@ -2,12 +2,23 @@ from generators.Generator import Generator
 
 
 class PythonGenerator(Generator):
-    def __init__(self, module_name):
-        super().__init__(module_name)
+    INDENTATION = '    '
+
+    # Indentation prefixes by level, shared by all the generators.
+    _indentations = ['']
+
+    def __init__(self, module_name, sink=None):
+        super().__init__(module_name, sink)
         self.current_indentation_level = 0
 
     def __indentation(self):
-        return self.current_indentation_level * '    '
+        level = self.current_indentation_level
+        indentations = self._indentations
+
+        while len(indentations) <= level:
+            indentations.append(indentations[-1] + self.INDENTATION)
+
+        return indentations[level]
 
     class Indent:
         def __init__(self, generator):
@@ -25,14 +36,22 @@ class PythonGenerator(Generator):
     def _add_line(self, content: str):
         return super()._add_line(self.__indentation() + content)
 
-    def _function_definition(self, name, arguments=None):
+    def _function_definition(self, name, arguments=None, is_async: bool=False):
         if arguments is None:
             arguments = ()
 
-        self._add_line('def {name}({arguments}):'.format(name=name, arguments=', '.join(arguments)))
+        if is_async:
+            keyword = 'async def'
+        else:
+            keyword = 'def'
+
+        self._add_line('{keyword} {name}({arguments}):'.format(keyword=keyword,
+                                                               name=name,
+                                                               arguments=', '.join(arguments)))
         return self._indent()
 
-    def _method_definition(self, name, arguments=None, is_static: bool=None, decorators: list=None):
+    def _method_definition(self, name, arguments=None, is_static: bool=None, decorators: list=None,
+                           is_async: bool=False):
         if arguments is None:
             arguments = []
 
@@ -50,7 +69,7 @@ class PythonGenerator(Generator):
         for decorator in decorators:
             self._add_line(decorator)
 
-        return self._function_definition(name, arguments)
+        return self._function_definition(name, arguments, is_async)
 
     def _class_definition(self, name: str, base: [str, None] = None):
         if base is not None:
@@ -1,27 +1,13 @@
-from generators.python.common.InterfaceGenerator import InterfaceGenerator
+from generators.python.common.ClientInterfaceGenerator import ClientInterfaceGenerator
 
-from parser.classes import Interface
+from common.file import file
 
 
-class ClientGenerator(InterfaceGenerator):
-    def __init__(self, host, port, path=''):
-        super().__init__('client-requests')
-
-        self.port = str(port)
-        self.host = host
-
-    def generate(self, interface: Interface):
-        self._set_current_file('main.py')
-        self._add_line('import requests')
+class ClientGenerator(ClientInterfaceGenerator):
+    SESSION_MODULE = 'session'
 
-        return super().generate(interface)
-
-    def _generate_function_body(self, obj, arguments: list):
-        with self._method_definition(obj.name, arguments):
-
-            self._assign('response', 'requests.post("{host}:{port}/{path}", json=kwargs)'
-                         .format(host=self.host,
-                                 port=self.port,
-                                 path='/'.join(self._get_path_list()[1:])))
+    def __init__(self, host, port, path=''):
+        super().__init__('client-requests', host, port)
 
-            self._return_statement('response.json()')
+    def _session_module_lines(self):
+        return file('static/session.py', __file__).read().splitlines()
@@ -0,0 +1,449 @@
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import wire
+from attribute_cache import AttributeCache
+from fanout import CallError, CallResult
+
+
+class BatchCallError(Exception):
+    pass
+
+
+class BatchResult:
+    """The result of a call that was made inside a batch, available after the batch is sent"""
+    _PENDING = object()
+
+    def __init__(self):
+        self._value = self._PENDING
+        self._error = None
+
+    def _set(self, response):
+        self._error = response.get('error')
+        self._value = response.get('result')
+
+    def done(self):
+        return self._value is not self._PENDING or self._error is not None
+
+    def result(self):
+        if self._error is not None:
+            raise BatchCallError(self._error)
+
+        if self._value is self._PENDING:
+            raise RuntimeError('The batch was not sent yet')
+
+        return self._value
+
+
+class Batch:
+    """
+    Collect the calls that are made through a session and send them in a single request.
+
+    with session.batch():
+        first = client.path.to.method(a=1)
+        second = client.path.to.other_method()
+
+    print(first.result(), second.result())
+
+    The server must have a /_batch route, which both the Flask and the ASGI servers generate.
+    """
+    PATH = '_batch'
+
+    def __init__(self, session):
+        self._session = session
+        self._calls = []
+        self._results = []
+
+    def add(self, path, arguments):
+        result = BatchResult()
+
+        self._calls.append({'path': path, 'arguments': arguments})
+        self._results.append(result)
+
+        return result
+
+    def send(self):
+        calls, self._calls = self._calls, []
+        results, self._results = self._results, []
+
+        if not calls:
+            return
+
+        try:
+            response = self._session.post(self.PATH, {'calls': calls})
+        except CallError as err:
+            # The batch as a whole was rejected (e.g. 413 for an oversized batch), so is every call of it.
+            for result in results:
+                result._set({'error': str(err)})
+            return
+
+        call_responses = response.get('results') if isinstance(response, dict) else None
+        if not isinstance(call_responses, list) or len(call_responses) != len(results):
+            call_responses = [{'error': 'Invalid batch response'}] * len(results)
+
+        for result, call_response in zip(results, call_responses):
+            result._set(call_response)
+
+    def __enter__(self):
+        self._session._batches.append(self)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        assert self._session._batches[-1] is self
+        self._session._batches.pop()
+
+        if exc_type is None:
+            self.send()
+
+
+class Session:
+    """
+    The connection pool of a client, shared by all of its namespaces and classes.
+
+    :param base_url: The server's url (e.g. http://localhost:5000).
+    :param pool_connections: The number of hosts to keep connection pools for.
+    :param pool_maxsize: The maximum number of connections to keep open per host.
+    :param pool_block: Wait for a free connection when all the connections to a host are busy,
+                       instead of opening connections that will not be reused.
+    :param keep_alive: Reuse connections between calls.
+    :param timeout: The timeout of every call in seconds, or a (connect, read) tuple.
+    :param max_retries: The number of times to retry failed connections.
+    :param content_type: The wire format of the calls (see wire.CODECS), JSON by default.
+    :param compression: The content encoding of the request bodies (see wire.CONTENT_ENCODINGS), None sends
+                        the requests uncompressed and asks for uncompressed responses.
+    :param compress_threshold: The size from which request bodies are compressed. A server that answers a
+                               compressed request with 415 gets the request again uncompressed, and the
+                               session stops compressing its requests.
+    :param attribute_cache_size: The maximum number of attributes to cache, 0 disables the cache.
+    :param attribute_ttl: How long attributes without a cache policy stay fresh, in seconds; with the
+                          default of 0 every read revalidates (an attribute without an ETag is fetched again).
+    :param max_workers: The size of the thread pool that the <method>_map calls share, pool_maxsize by default
+                        so that every worker has a connection.
+    :param requests_session: A requests.Session to use instead of creating one.
+    """
+
+    def __init__(self, base_url, pool_connections=10, pool_maxsize=10, pool_block=False,
+                 keep_alive=True, timeout=None, max_retries=0, content_type=None, compression='gzip',
+                 compress_threshold=wire.COMPRESS_THRESHOLD, attribute_cache_size=256, attribute_ttl=0,
+                 max_workers=None, requests_session=None):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.max_workers = pool_maxsize if max_workers is None else max_workers
+        self.attribute_ttl = attribute_ttl
+        self.attribute_cache = AttributeCache(attribute_cache_size)
+
+        if compression is not None and compression not in wire.CONTENT_ENCODINGS:
+            raise ValueError('Unsupported compression: {}; choose one from: {}'.format(
+                compression, wire.CONTENT_ENCODINGS))
+
+        self.compression = compression
+        self.compress_threshold = compress_threshold
+        # Off once the server rejects a compressed request.
+        self._compress_requests = compression is not None
+
+        if content_type is None:
+            self.codec = wire.DEFAULT_CODEC
+        else:
+            self.codec = wire.CODECS[content_type]
+
+        accept_encoding = 'identity' if compression is None else wire.ACCEPT_ENCODING
+        self._headers = {'Content-Type': self.codec.content_type,
+                         'Accept': self.codec.content_type,
+                         'Accept-Encoding': accept_encoding}
+        self._stream_headers = {'Content-Type': self.codec.content_type,
+                                'Accept': '{}, {};q=0.9'.format(wire.NDJSON_CONTENT_TYPE, self.codec.content_type),
+                                'Accept-Encoding': accept_encoding}
+        self._attribute_headers = {'Accept': self.codec.content_type,
+                                   'Accept-Encoding': accept_encoding}
+
+        if requests_session is None:
+            requests_session = requests.Session()
+
+        adapter = HTTPAdapter(pool_connections=pool_connections,
+                              pool_maxsize=pool_maxsize,
+                              pool_block=pool_block,
+                              max_retries=max_retries)
+        requests_session.mount('http://', adapter)
+        requests_session.mount('https://', adapter)
+
+        if not keep_alive:
+            requests_session.headers['Connection'] = 'close'
+
+        self._session = requests_session
+        self._local = threading.local()
+
+        # The attribute reads in flight, path->(cache generation, Future).
+        self._lookups = {}
+        self._lookups_lock = threading.Lock()
+
+        # Created by the first fan-out.
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    @property
+    def _batches(self):
+        """The batches that are open in the current thread"""
+        try:
+            return self._local.batches
+        except AttributeError:
+            self._local.batches = []
+            return self._local.batches
+
+    def url(self, path):
+        return '{}/{}'.format(self.base_url, path)
+
+    def _encode(self, obj, headers):
+        """:return: The request body of an object and its headers, compressed from compress_threshold bytes."""
+        data = self.codec.encode(obj)
+
+        if self._compress_requests and len(data) >= self.compress_threshold:
+            data = wire.compress(data, self.compression)
+            headers = dict(headers, **{'Content-Encoding': self.compression})
+
+        return data, headers
+
+    def _send(self, path, obj, headers, stream=False):
+        """POST an object, again uncompressed if the server does not accept compressed requests"""
+        data, request_headers = self._encode(obj, headers)
+        response = self._session.post(self.url(path),
+                                      data=data,
+                                      headers=request_headers,
+                                      timeout=self.timeout,
+                                      stream=stream)
+
+        if response.status_code == 415 and 'Content-Encoding' in request_headers:
+            response.close()
+            self._compress_requests = False
+            response = self._session.post(self.url(path),
+                                          data=self.codec.encode(obj),
+                                          headers=headers,
+                                          timeout=self.timeout,
+                                          stream=stream)
+
+        return response
+
+    def _post(self, path, obj):
+        # The responses are decompressed by requests.
+        return self._send(path, obj, self._headers)
+
+    @staticmethod
+    def _check(response):
+        """Raise CallError if the server answered with an error status"""
+        if response.status_code >= 400:
+            raise CallError.from_response(response.status_code, response.content)
+
+    @staticmethod
+    def _decode(response):
+        codec = wire.codec_for_content_type(response.headers.get('Content-Type')) or wire.JsonCodec
+        return codec.decode(response.content)
+
+    def post(self, path, obj):
+        """:raises CallError: if the server answers with an error status."""
+        response = self._post(path, obj)
+        self._check(response)
+
+        return self._decode(response)
+
+    def call(self, path, arguments):
+        """
+        Call a method, inside a batch the call is deferred and a BatchResult is returned.
+        """
+        batches = self._batches
+        if batches:
+            return batches[-1].add(path, arguments)
+
+        return self.post(path, {'arguments': arguments})
+
+    def stream(self, path, arguments):
+        """
+        Call a method that returns a list. The request is sent and its status checked right away, the items
+        are decoded as they arrive while the returned iterator is consumed; inside a batch the call is
+        deferred and a BatchResult of the whole list is returned.
+        :raises CallError: if the server answers with an error status.
+        """
+        batches = self._batches
+        if batches:
+            return batches[-1].add(path, arguments)
+
+        response = self._send(path, {'arguments': arguments}, self._stream_headers, stream=True)
+
+        try:
+            self._check(response)
+
+            if not wire.is_ndjson(response.headers.get('Content-Type')):
+                return iter(self._decode(response))
+        except BaseException:
+            response.close()
+            raise
+
+        items = self._iter_items(response)
+        # Started so that dropping the iterator closes it, also when it is never iterated.
+        next(items)
+        return items
+
+    @staticmethod
+    def _iter_items(response):
+        # Closing the response returns the connection to the pool, also when the iteration stops early.
+        with response:
+            yield
+            decoder = wire.NdjsonDecoder()
+            for chunk in response.iter_content(chunk_size=None):
+                yield from decoder.feed(chunk)
+            yield from decoder.close()
+
+    def attribute(self, path, ttl=None):
+        """
+        Read an attribute through the attribute cache, concurrent reads of a path share a single request.
+        Attributes are read right away, also inside a batch.
+        :param ttl: How long the value stays fresh, attribute_ttl by default.
+        """
+        entry, is_fresh = self.attribute_cache.lookup(path)
+        if is_fresh:
+            return entry.value
+
+        generation = self.attribute_cache.generation
+
+        with self._lookups_lock:
+            lookup = self._lookups.get(path)
+            is_shared = lookup is not None and lookup[0] == generation
+            if not is_shared:
+                lookup = self._lookups[path] = (generation, Future())
+
+        future = lookup[1]
+
+        # Wait outside of the lock, which the reads of the other paths take too.
+        if is_shared:
+            return future.result()
+
+        try:
+            value = self._get_attribute(path, entry, self.attribute_ttl if ttl is None else ttl, generation)
+        except BaseException as err:
+            future.set_exception(err)
+            raise
+        else:
+            future.set_result(value)
+        finally:
+            with self._lookups_lock:
+                if self._lookups.get(path) is lookup:
+                    del self._lookups[path]
+
+        return value
+
+    def _get_attribute(self, path, entry, ttl, generation):
+        headers = self._attribute_headers
+        if entry is not None and entry.etag is not None:
+            headers = dict(headers, **{'If-None-Match': entry.etag})
+
+        response = self._session.get(self.url(path), headers=headers, timeout=self.timeout)
+
+        if response.status_code == 304 and entry is not None:
+            self.attribute_cache.refresh(path, entry, ttl, generation)
+            return entry.value
+
+        self._check(response)
+
+        value = self._decode(response)
+        self.attribute_cache.store(path, value, response.headers.get('ETag'), ttl, generation)
+
+        return value
+
+    def _run_call(self, index, path, arguments):
+        try:
+            return CallResult(index, arguments, value=self.post(path, {'arguments': arguments}))
+        except Exception as err:
+            return CallResult(index, arguments, error=err)
+
+    @property
+    def executor(self):
+        """The thread pool that the fan-outs share"""
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix='keepcalm-map')
+
+        return self._executor
+
+    def map(self, path, arguments, max_in_flight=None, ordered=True):
+        """
+        Call a method once per set of arguments, concurrently over the shared thread pool.
+        A CallResult is yielded per call, the failed calls carry their error instead of stopping the others.
+        List results are returned whole.
+
+        :param arguments: An iterable of keyword argument dicts, consumed as calls are started.
+        :param max_in_flight: The maximum number of calls to start before one completes, max_workers by default.
+        :param ordered: Yield in the order of the arguments, otherwise as the calls complete.
+        """
+        if max_in_flight is None:
+            max_in_flight = self.max_workers
+        if max_in_flight < 1:
+            raise ValueError('max_in_flight must be at least 1')
+
+        executor = self.executor
+        pending = enumerate(arguments)
+        in_flight = deque()
+
+        def submit():
+            while len(in_flight) < max_in_flight:
+                try:
+                    index, call_arguments = next(pending)
+                except StopIteration:
+                    return
+
+                in_flight.append(executor.submit(self._run_call, index, path, call_arguments))
+
+        try:
+            submit()
+
+            while in_flight:
+                if ordered:
+                    future = in_flight[0]
+                    wait((future,))
+                else:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    future = next(iter(done))
+
+                in_flight.remove(future)
+                submit()
+                yield future.result()
+        finally:
+            # Stopping early drops the calls that did not start yet.
+            for future in in_flight:
+                future.cancel()
+
+    def invalidate(self, path='', names=()):
+        """Drop the cached attributes under a path, or only the named ones (relative to the path)"""
+        self.attribute_cache.invalidate(path, names)
+
+    def batch(self):
+        return Batch(self)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+        self._session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class Client:
+    """
+    The base of the generated namespaces and classes.
+    :param session: The Session to call through, a session to DEFAULT_URL is created if not given.
+    """
+    DEFAULT_URL = None
+
+    def __init__(self, session=None):
+        if session is None:
+            session = Session(self.DEFAULT_URL)
+
+        self._session = session
@@ -0,0 +1,14 @@
+from generators.python.common.ClientInterfaceGenerator import ClientInterfaceGenerator
+
+from common.file import file
+
+
+class ClientGenerator(ClientInterfaceGenerator):
+    SESSION_MODULE = 'transport'
+    IS_ASYNC = True
+
+    def __init__(self, host, port):
+        super().__init__('client_asyncio', host, port)
+
+    def _session_module_lines(self):
+        return file('static/transport.py', __file__).read().splitlines()
@@ -0,0 +1,478 @@
+import asyncio
+from collections import deque
+from urllib.parse import urlsplit
+
+import wire
+from attribute_cache import AttributeCache
+from fanout import CallError, CallResult
+
+
+class TransportError(Exception):
+    pass
+
+
+class _Connection:
+    READ_SIZE = 1 << 16
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.is_reused = False
+
+    async def request(self, request_bytes):
+        """
+        Send a request and read the response.
+        :return: A (status, headers, body, keep_alive) tuple.
+        """
+        status, headers, keep_alive = await self.request_head(request_bytes)
+        body, keep_alive = await self.read_body(headers, keep_alive, status)
+
+        return status, headers, body, keep_alive
+
+    async def request_head(self, request_bytes):
+        """
+        Send a request and read the status line and the headers of the response.
+        :return: A (status, headers, keep_alive) tuple.
+        """
+        self.writer.write(request_bytes)
+        await self.writer.drain()
+
+        head = await self.reader.readuntil(b'\r\n\r\n')
+        status_line, *header_lines = head[:-4].decode('latin-1').split('\r\n')
+
+        try:
+            version, status = status_line.split(' ', 2)[:2]
+            status = int(status)
+        except ValueError:
+            raise TransportError('Invalid status line: {}'.format(status_line))
+
+        headers = {}
+        for header_line in header_lines:
+            name, _, value = header_line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+
+        return status, headers, keep_alive
+
+    async def read_body(self, headers, keep_alive, status=200):
+        """:return: The whole body and whether the connection can be reused."""
+        if status in (204, 304) or 100 <= status < 200:
+            body = b''
+        elif headers.get('transfer-encoding', '').lower() == 'chunked':
+            body = b''.join([chunk async for chunk in self._iter_chunked()])
+        elif 'content-length' in headers:
+            body = await self.reader.readexactly(int(headers['content-length']))
+        else:
+            body = await self.reader.read()
+            keep_alive = False
+
+        return body, keep_alive
+
+    async def iter_body(self, headers):
+        """
+        Read the body chunk by chunk as it arrives.
+        A body without a length ends with the connection, which can not be reused then.
+        """
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            async for chunk in self._iter_chunked():
+                yield chunk
+            return
+
+        if 'content-length' in headers:
+            remaining = int(headers['content-length'])
+
+            while remaining:
+                chunk = await self.reader.read(min(remaining, self.READ_SIZE))
+                if not chunk:
+                    raise asyncio.IncompleteReadError(b'', remaining)
+
+                remaining -= len(chunk)
+                yield chunk
+            return
+
+        while True:
+            chunk = await self.reader.read(self.READ_SIZE)
+            if not chunk:
+                return
+
+            yield chunk
+
+    async def _iter_chunked(self):
+        while True:
+            size_line = await self.reader.readuntil(b'\r\n')
+            size = int(size_line.split(b';', 1)[0], 16)
+
+            if size == 0:
+                # Skip the trailers
+                while await self.reader.readuntil(b'\r\n') != b'\r\n':
+                    pass
+                return
+
+            yield await self.reader.readexactly(size)
+            await self.reader.readexactly(2)
+
+    def close(self):
+        self.writer.close()
+
+
+class Session:
+    """
+    A pooled HTTP/1.1 keep-alive transport over asyncio streams, shared by all the namespaces of a client.
+
+    :param base_url: The server's url (e.g. http://localhost:5000).
+    :param pool_maxsize: The maximum number of idle connections to keep open.
+    :param max_concurrency: The maximum number of calls in flight, further calls wait for a free slot.
+    :param keep_alive: Reuse connections between calls.
+    :param timeout: The timeout of every call in seconds.
+    :param content_type: The wire format of the calls (see wire.CODECS), JSON by default.
+    :param attribute_cache_size: The maximum number of attributes to cache, 0 disables the cache.
+    :param attribute_ttl: How long attributes without a cache policy stay fresh, in seconds; with the
+                          default of 0 every read revalidates (an attribute without an ETag is fetched again).
+    """
+
+    def __init__(self, base_url, pool_maxsize=10, max_concurrency=100, keep_alive=True, timeout=None,
+                 content_type=None, attribute_cache_size=256, attribute_ttl=0):
+        url = urlsplit(base_url)
+
+        if content_type is None:
+            self.codec = wire.DEFAULT_CODEC
+        else:
+            self.codec = wire.CODECS[content_type]
+
+        self.host = url.hostname
+        self.port = url.port or (443 if url.scheme == 'https' else 80)
+        self.ssl = url.scheme == 'https'
+        self.base_path = url.path.rstrip('/')
+        self.timeout = timeout
+        self.keep_alive = keep_alive
+        self.max_concurrency = max_concurrency
+        self.attribute_ttl = attribute_ttl
+        self.attribute_cache = AttributeCache(attribute_cache_size)
+
+        # The attribute reads in flight, path->(cache generation, future).
+        self._lookups = {}
+
+        self._pool_maxsize = pool_maxsize
+        self._idle = []
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+        if (self.port == 443 and self.ssl) or (self.port == 80 and not self.ssl):
+            self._host_header = self.host
+        else:
+            self._host_header = '{}:{}'.format(self.host, self.port)
+
+    async def _connect(self):
+        reader, writer = await asyncio.open_connection(self.host, self.port, ssl=self.ssl or None)
+        return _Connection(reader, writer)
+
+    async def _acquire(self):
+        if self._idle:
+            connection = self._idle.pop()
+            connection.is_reused = True
+            return connection
+
+        return await self._connect()
+
+    def _release(self, connection, keep_alive):
+        if keep_alive and self.keep_alive and len(self._idle) < self._pool_maxsize:
+            self._idle.append(connection)
+        else:
+            connection.close()
+
+    def _request_bytes(self, path, body: bytes, accept=None):
+        head = ('POST {path} HTTP/1.1\r\n'
+                'Host: {host}\r\n'
+                'Content-Type: {content_type}\r\n'
+                'Accept: {accept}\r\n'
+                'Content-Length: {length}\r\n'
+                'Connection: {connection}\r\n'
+                '\r\n').format(path='{}/{}'.format(self.base_path, path),
+                               host=self._host_header,
+                               content_type=self.codec.content_type,
+                               accept=accept or self.codec.content_type,
+                               length=len(body),
+                               connection='keep-alive' if self.keep_alive else 'close')
+
+        return head.encode('latin-1') + body
+
+    def _get_request_bytes(self, path, etag=None):
+        head = ('GET {path} HTTP/1.1\r\n'
+                'Host: {host}\r\n'
+                'Accept: {accept}\r\n'
+                '{if_none_match}'
+                'Connection: {connection}\r\n'
+                '\r\n').format(path='{}/{}'.format(self.base_path, path),
+                               host=self._host_header,
+                               accept=self.codec.content_type,
+                               if_none_match='' if etag is None else 'If-None-Match: {}\r\n'.format(etag),
+                               connection='keep-alive' if self.keep_alive else 'close')
+
+        return head.encode('latin-1')
+
+    async def _open_response(self, request_bytes):
+        """
+        Send a request and read the head of the response.
+        :return: A (connection, status, headers, keep_alive) tuple, the body is left to read from the connection.
+        """
+        connection = await self._acquire()
+
+        try:
+            return (connection,) + await connection.request_head(request_bytes)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            connection.close()
+            if not connection.is_reused:
+                raise
+
+            # The server closed the idle connection, retry once over a new one.
+            connection = await self._connect()
+            try:
+                return (connection,) + await connection.request_head(request_bytes)
+            except BaseException:
+                connection.close()
+                raise
+        except BaseException:
+            connection.close()
+            raise
+
+    async def _send(self, request_bytes):
+        connection, status, headers, keep_alive = await self._open_response(request_bytes)
+
+        try:
+            body, keep_alive = await connection.read_body(headers, keep_alive, status)
+        except BaseException:
+            connection.close()
+            raise
+
+        self._release(connection, keep_alive)
+        return status, headers, body
+
+    async def call(self, path, arguments):
+        request_bytes = self._request_bytes(path, self.codec.encode({'arguments': arguments}))
+
+        return self._decode(*await self._send_limited(request_bytes))
+
+    @staticmethod
+    def _decode(status, headers, body):
+        """
+        Decode a response by its Content-Type.
+        :raises CallError: if the server answered with an error status.
+        """
+        if status >= 400:
+            raise CallError.from_response(status, body)
+
+        codec = wire.codec_for_content_type(headers.get('content-type')) or wire.JsonCodec
+        return codec.decode(body)
+
+    async def _send_limited(self, request_bytes):
+        """Send a request within the concurrency limit and the timeout"""
+        async with self._semaphore:
+            if self.timeout is None:
+                return await self._send(request_bytes)
+            else:
+                return await asyncio.wait_for(self._send(request_bytes), self.timeout)
+
+    async def attribute(self, path, ttl=None):
+        """
+        Read an attribute through the attribute cache, concurrent reads of a path share a single request.
+        :param ttl: How long the value stays fresh, attribute_ttl by default.
+        """
+        entry, is_fresh = self.attribute_cache.lookup(path)
+        if is_fresh:
+            return entry.value
+
+        generation = self.attribute_cache.generation
+
+        lookup = self._lookups.get(path)
+        if lookup is not None and lookup[0] == generation:
+            # A waiter that is cancelled must not cancel the shared read.
+            return await asyncio.shield(lookup[1])
+
+        lookup = self._lookups[path] = (generation, asyncio.get_running_loop().create_future())
+
+        future = lookup[1]
+        try:
+            value = await self._get_attribute(path, entry, self.attribute_ttl if ttl is None else ttl, generation)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as err:
+            future.set_exception(err)
+            # Nobody may be waiting, the error is raised here anyway.
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+        finally:
+            if self._lookups.get(path) is lookup:
+                del self._lookups[path]
+
+        return value
+
+    async def _get_attribute(self, path, entry, ttl, generation):
+        etag = None if entry is None else entry.etag
+        status, headers, body = await self._send_limited(self._get_request_bytes(path, etag))
+
+        if status == 304 and entry is not None:
+            self.attribute_cache.refresh(path, entry, ttl, generation)
+            return entry.value
+
+        value = self._decode(status, headers, body)
+        self.attribute_cache.store(path, value, headers.get('etag'), ttl, generation)
+
+        return value
+
+    async def _run_call(self, index, path, arguments):
+        try:
+            request_bytes = self._request_bytes(path, self.codec.encode({'arguments': arguments}))
+            value = self._decode(*await self._send_limited(request_bytes))
+            return CallResult(index, arguments, value=value)
+        except Exception as err:
+            return CallResult(index, arguments, error=err)
+
+    async def map(self, path, arguments, max_in_flight=None, ordered=True):
+        """
+        Call a method once per set of arguments concurrently, an async iterator over a CallResult per call.
+        The failed calls carry their error instead of stopping the others, list results are returned whole.
+
+        :param arguments: An iterable of keyword argument dicts, consumed as calls are started.
+        :param max_in_flight: The maximum number of calls to start before one completes, max_concurrency by
+                              default (the calls of all the fan-outs share the max_concurrency limit).
+        :param ordered: Yield in the order of the arguments, otherwise as the calls complete.
+        """
+        if max_in_flight is None:
+            max_in_flight = self.max_concurrency
+        if max_in_flight < 1:
+            raise ValueError('max_in_flight must be at least 1')
+
+        pending = enumerate(arguments)
+        in_flight = deque()
+
+        def submit():
+            while len(in_flight) < max_in_flight:
+                try:
+                    index, call_arguments = next(pending)
+                except StopIteration:
+                    return
+
+                in_flight.append(asyncio.ensure_future(self._run_call(index, path, call_arguments)))
+
+        try:
+            submit()
+
+            while in_flight:
+                if ordered:
+                    task = in_flight[0]
+                    await asyncio.wait((task,))
+                else:
+                    done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                    task = next(iter(done))
+
+                in_flight.remove(task)
+                submit()
+                yield task.result()
+        finally:
+            # Stopping early cancels the calls in flight.
+            for task in in_flight:
+                task.cancel()
+
+    def invalidate(self, path='', names=()):
+        """Drop the cached attributes under a path, or only the named ones (relative to the path)"""
+        self.attribute_cache.invalidate(path, names)
+
+    async def stream(self, path, arguments):
+        """
+        Call a method that returns a list: the request is sent and its status checked when awaited,
+        :return: An async iterator over the items as they arrive.
+        The connection stays busy until the iteration ends, stopping early closes it.
+        :raises CallError: if the server answers with an error status.
+        """
+        request_bytes = self._request_bytes(path,
+                                            self.codec.encode({'arguments': arguments}),
+                                            '{}, {};q=0.9'.format(wire.NDJSON_CONTENT_TYPE, self.codec.content_type))
+
+        await self._semaphore.acquire()
+        try:
+            if self.timeout is None:
+                response = await self._open_response(request_bytes)
+            else:
+                response = await asyncio.wait_for(self._open_response(request_bytes), self.timeout)
+        except BaseException:
+            self._semaphore.release()
+            raise
+
+        connection, status, headers, keep_alive = response
+
+        if status >= 400 or not wire.is_ndjson(headers.get('content-type')):
+            try:
+                body, keep_alive = await connection.read_body(headers, keep_alive, status)
+            except BaseException:
+                connection.close()
+                raise
+            else:
+                self._release(connection, keep_alive)
+            finally:
+                self._semaphore.release()
+
+            return self._iter_list(self._decode(status, headers, body))
+
+        items = self._iter_items(connection, headers, keep_alive)
+        # Started, so that an iterator that is dropped unread is closed and frees its connection.
+        await items.__anext__()
+        return items
+
+    @staticmethod
+    async def _iter_list(items):
+        for item in items:
+            yield item
+
+    async def _iter_items(self, connection, headers, keep_alive):
+        """Read the items of an NDJSON body, :return: after a first None that starts the iterator."""
+        is_complete = False
+
+        try:
+            yield
+
+            decoder = wire.NdjsonDecoder()
+            async for chunk in connection.iter_body(headers):
+                for item in decoder.feed(chunk):
+                    yield item
+            for item in decoder.close():
+                yield item
+
+            is_complete = True
+            if 'content-length' not in headers and headers.get('transfer-encoding', '').lower() != 'chunked':
+                keep_alive = False
+        finally:
+            if is_complete:
+                self._release(connection, keep_alive)
+            else:
+                connection.close()
+
+            self._semaphore.release()
+
+    async def close(self):
+        idle, self._idle = self._idle, []
+
+        for connection in idle:
+            connection.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+
+class Client:
+    """
+    The base of the generated namespaces and classes.
+    :param session: The Session to call through, a session to DEFAULT_URL is created if not given.
+    """
+    DEFAULT_URL = None
+
+    def __init__(self, session=None):
+        if session is None:
+            session = Session(self.DEFAULT_URL)
+
+        self._session = session
@@ -0,0 +1,136 @@
+from generators.python.common.InterfaceGenerator import InterfaceGenerator
+from parser.classes import Interface, Namespace, Attribute, Method
+
+from common.file import file
+
+
+class ClientInterfaceGenerator(InterfaceGenerator):
+    """
+    The base of the client generators.
+
+    The generated main.py derives every namespace and class from a Client base that holds a session,
+    defined by a static module that every client generator provides (SESSION_MODULE).
+    Attributes are read with GET through the session's attribute cache (see static/attribute_cache.py).
+    Every method gets a <method>_map companion that calls it concurrently with many sets of arguments.
+    """
+    BASE_CLASS_NAME = 'Client'
+    SESSION_MODULE = None
+    IS_ASYNC = False
+    INVALIDATE_NAME = 'invalidate_cache'
+    MAP_SUFFIX = '_map'
+
+    def __init__(self, module_name, host, port):
+        super().__init__(module_name)
+
+        self.port = str(port)
+        self.host = host
+
+    def _session_module_lines(self):
+        """The content of the static session module"""
+        raise NotImplementedError()
+
+    def generate(self, interface: Interface):
+        self._add_wire_module()
+        self._add_file('attribute_cache.py', file('static/attribute_cache.py', __file__).read().splitlines())
+        self._add_file('fanout.py', file('static/fanout.py', __file__).read().splitlines())
+        self._add_file('{}.py'.format(self.SESSION_MODULE), self._session_module_lines())
+
+        self._set_current_file('main.py')
+        return super().generate(interface)
+
+    def _generate_header(self, interface: Interface):
+        self._add_line('import {}'.format(self.SESSION_MODULE))
+        super()._generate_header(interface)
+
+        # All the generated classes share a single session, created for the root if not given.
+        with self._class_definition(self.BASE_CLASS_NAME, '{}.Client'.format(self.SESSION_MODULE)):
+            self._assign('DEFAULT_URL', self._str('{host}:{port}'.format(host=self.host, port=self.port)))
+
+    def _base_class(self):
+        return self.BASE_CLASS_NAME
+
+    def _creator_arguments(self):
+        return ['self._session']
+
+    def _call_expression(self, path: str, call_arguments: str):
+        expression = 'self._session.call({path}, {arguments})'.format(path=self._str(path),
+                                                                     arguments=call_arguments)
+        if self.IS_ASYNC:
+            expression = 'await ' + expression
+
+        return expression
+
+    def _attribute_expression(self, attribute: Attribute):
+        """Read an attribute through the cache, fresh for the ttl of its cache policy or the session's default"""
+        arguments = [self._str(self._get_path_string())]
+        if attribute.cache is not None and attribute.cache.ttl is not None:
+            arguments.append(repr(attribute.cache.ttl))
+
+        expression = 'self._session.attribute({})'.format(', '.join(arguments))
+        if self.IS_ASYNC:
+            expression = 'await ' + expression
+
+        return expression
+
+    def _generate_function_body(self, obj, arguments: list):
+        if isinstance(obj, Method) and self._is_streamed(obj):
+            self._generate_stream_body(obj, arguments)
+            return
+
+        with self._method_definition(obj.name, arguments, is_async=self.IS_ASYNC):
+            if isinstance(obj, Attribute):
+                self._return_statement(self._attribute_expression(obj))
+            else:
+                self._return_statement(self._call_expression(self._get_path_string(), 'kwargs'))
+
+    def _generate_method(self, method: Method):
+        super()._generate_method(method)
+
+        with self._add_path(method.name):
+            self._generate_map(method)
+
+    def _generate_map(self, method: Method):
+        """
+        Fan out calls of a method over the session, an iterator of a CallResult per set of arguments
+        (an async iterator in async clients).
+        """
+        with self._method_definition(method.name + self.MAP_SUFFIX, ['arguments', 'max_in_flight=None',
+                                                                     'ordered=True']):
+            self._return_statement('self._session.map({path}, arguments, max_in_flight, ordered)'.format(
+                path=self._str(self._get_path_string())))
+
+    def _generate_stream_body(self, method: Method, arguments: list):
+        """
+        A method that returns a list sends its call right away and gets an iterator over the items as they
+        arrive (in async clients, awaiting the call gives an async iterator).
+        """
+        expression = 'self._session.stream({path}, kwargs)'.format(path=self._str(self._get_path_string()))
+        if self.IS_ASYNC:
+            expression = 'await ' + expression
+
+        with self._method_definition(method.name, arguments, is_async=self.IS_ASYNC):
+            self._return_statement(expression)
+
+    @classmethod
+    def _has_attributes(cls, namespace: Namespace):
+        return (any(klass.attributes for klass in namespace.classes) or
+                any(cls._has_attributes(child) for child in namespace.namespaces))
+
+    def _generate_invalidate(self):
+        """
+        Drop the cached attributes under the current path, or only the named ones (relative to the path).
+        """
+        with self._method_definition(self.INVALIDATE_NAME, ['*names']):
+            self._function_call('self._session.invalidate', [self._str(self._get_path_string()), 'names'])
+
+    def _generate_namespace_children(self, namespace: Namespace):
+        super()._generate_namespace_children(namespace)
+
+        if self._has_attributes(namespace):
+            self._generate_invalidate()
+
+    def _generate_attributes(self, attributes):
+        super()._generate_attributes(attributes)
+
+        if attributes:
+            self._generate_invalidate()
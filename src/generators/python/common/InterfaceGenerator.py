@@ -3,13 +3,68 @@ from typing import Union
 from generators.python.PythonGenerator import PythonGenerator
 from parser.classes import Interface, Namespace, Class, Method, Attribute
 
+from common import profile
+from common.file import file
+
 
 class InterfaceGenerator(PythonGenerator):
-    def __init__(self, module_name=''):
-        super().__init__(module_name)
+    # The lists that generating a namespace or class appends to, replayed along with its cached lines.
+    FRAGMENT_LISTS = ()
+    # Generate the children of the namespaces and classes as lazy_child descriptors (see static/lazy.py).
+    LAZY_CHILDREN = True
+
+    def __init__(self, module_name='', sink=None):
+        super().__init__(module_name, sink)
         self._set_current_file('common/interface.py')
         self.current_path = []
 
+        self._fragments = None
+        self._recording = None
+
+    def set_fragment_cache(self, fragments):
+        """
+        Replay the namespaces and classes that the cache has from a previous run instead of generating them.
+        :param fragments: A started generators.fragments.FragmentCache.
+        """
+        self._fragments = fragments
+        self._recording = self._record()
+
+    def _generate_fragment(self, node, generate, path: str = None):
+        """
+        Generate a node (e.g. a namespace or class), through the fragment cache if there is one.
+        :param path: The path that the node is cached by, the current path by default.
+        """
+        fragments = self._fragments
+        if fragments is None:
+            generate(node)
+            return
+
+        if path is None:
+            path = self._get_path_string()
+
+        key = fragments.key(node, path, self.current_indentation_level)
+
+        fragment = fragments.get(key)
+        if fragment is not None:
+            lines, appended = fragment
+
+            sink = self._sink()
+            for line in lines:
+                sink.write(line)
+
+            for name, items in zip(self.FRAGMENT_LISTS, appended):
+                getattr(self, name).extend(items)
+            return
+
+        position = self._recording.position()
+        lengths = [len(getattr(self, name)) for name in self.FRAGMENT_LISTS]
+
+        generate(node)
+
+        fragments.put(key,
+                      self._recording.lines_since(position),
+                      tuple(getattr(self, name)[length:] for name, length in zip(self.FRAGMENT_LISTS, lengths)))
+
     class AddPath:
         def __init__(self, interface, fragment):
             self._interface = interface
@@ -25,17 +80,27 @@ class InterfaceGenerator(PythonGenerator):
     def _add_path(self, fragment):
         return self.AddPath(self, fragment)
 
+    def _add_wire_module(self):
+        """Add the wire formats module that the generated servers and clients share"""
+        self._add_file('wire.py', file('static/wire.py', __file__).read().splitlines())
+
     def _generate_interface(self, namespace: Namespace):
-        with self._class_definition(namespace.name):
-            self._generate_namespace_initializer(namespace)
+        with self._class_definition(namespace.name, self._base_class()):
+            self._generate_namespace_children(namespace)
             self._generate_namespaces(namespace.namespaces)
             self._generate_methods(namespace.methods)
             self._generate_classes(namespace.classes)
 
     def generate(self, interface: Interface):
+        self._generate_header(interface)
         self._generate_interface(interface)
         return self.files()
 
+    def _generate_header(self, interface: Interface):
+        """The lines of the current file before the interface, e.g. its imports"""
+        if self.LAZY_CHILDREN and (interface.namespaces or interface.classes):
+            self._add_lines(file('static/lazy.py', __file__).read().splitlines())
+
     def _generate_namespaces(self, namespaces: list):
         self._generate_namespaces_classes(namespaces)
 
@@ -50,6 +115,15 @@ class InterfaceGenerator(PythonGenerator):
         for klass in classes:
             self._generate_class(klass)
 
+    def _base_class(self):
+        """The base of the generated namespaces and classes"""
+        return None
+
+    @staticmethod
+    def _is_streamed(method: Method):
+        """The list results of methods stream (as NDJSON) from the generated servers to the clients"""
+        return method.return_value is list
+
     @staticmethod
     def _class_name(klass: Class):
         return 'class_' + klass.name
@@ -71,33 +145,49 @@ class InterfaceGenerator(PythonGenerator):
         name = self._obj_name(obj)
 
         with self._function_definition('create_{name}'.format(name=name), ['self']):
-            self._return_statement('self.{name}()'.format(name=name))
+            self._return_statement('self.{name}({arguments})'.format(name=name,
+                                                                     arguments=', '.join(self._creator_arguments())))
 
-    def _generate_namespace_initializer(self, namespace: Namespace):
-        child_objects = namespace.namespaces + namespace.classes
+    def _creator_arguments(self):
+        """The arguments that child namespaces and classes are created with"""
+        return ()
 
-        if not child_objects:
+    def _generate_namespace_children(self, namespace: Namespace):
+        """
+        Every child namespace and class is a lazy_child (see static/lazy.py), created once by its create_*
+        method on first access so that only the parts of the tree that are used get instantiated.
+        """
+        if not self.LAZY_CHILDREN:
             return
 
+        child_objects = namespace.namespaces + namespace.classes
+
         for obj in child_objects:
             self._generate_creator(obj)
 
-        with self._function_definition('__init__', ['self']):
-            for obj in child_objects:
-                self._assign('self.{}'.format(obj.name),
-                             'self.create_{}()'.format(self._obj_name(obj)))
+        for obj in child_objects:
+            self._assign(obj.name, 'lazy_child({})'.format(self._str('create_' + self._obj_name(obj))))
+
+    def _profile_node(self, category: str):
+        return profile.node(category, self._get_path_string(), generator=self.name or 'interface')
 
     def _generate_class(self, klass: Class):
-        with self._add_path(klass.name):
-            with self._class_definition(self._class_name(klass)):
-                self._generate_methods(klass.methods)
-                self._generate_attributes(klass.attributes)
+        with self._add_path(klass.name), self._profile_node('class'):
+            self._generate_fragment(klass, self._generate_class_definition)
+
+    def _generate_class_definition(self, klass: Class):
+        with self._class_definition(self._class_name(klass), self._base_class()):
+            self._generate_methods(klass.methods)
+            self._generate_attributes(klass.attributes)
 
     def _generate_namespace(self, namespace: Namespace):
-        with self._add_path(namespace.name):
-            original_name, namespace.name = namespace.name, self._namespace_name(namespace)
-            self._generate_interface(namespace)
-            namespace.name = original_name
+        with self._add_path(namespace.name), self._profile_node('namespace'):
+            self._generate_fragment(namespace, self._generate_namespace_definition)
+
+    def _generate_namespace_definition(self, namespace: Namespace):
+        original_name, namespace.name = namespace.name, self._namespace_name(namespace)
+        self._generate_interface(namespace)
+        namespace.name = original_name
 
     def _generate_getters(self, objects: list):
         for obj in objects:
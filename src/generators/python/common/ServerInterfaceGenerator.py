@@ -0,0 +1,138 @@
+from generators.python.common.InterfaceGenerator import InterfaceGenerator
+from parser.classes import Interface, Namespace, Method
+
+from common.file import file
+
+
+class ServerInterfaceGenerator(InterfaceGenerator):
+    """
+    The base of the server generators.
+
+    Besides the server module itself, every server gets the interface the user implements
+    (common/interface.py), the wire formats and a decoders module with a decode function per method.
+    Methods with a process executor in the spec run in a process pool (see static/processes.py).
+    """
+    INTERFACE_NAME = 'interface'
+    DECODERS_MODULE = 'decoders'
+    PROCESSES_MODULE = 'processes'
+    FRAGMENT_LISTS = ('_methods',)
+    # The Interface of the server module only groups the route functions, it is never instantiated.
+    LAZY_CHILDREN = False
+
+    def __init__(self, module_name):
+        super().__init__(module_name)
+
+        # (path list, method) of every generated method.
+        self._methods = []
+        # Set by _generate_common_files.
+        self._uses_processes = False
+
+    def _generate_common_files(self, interface: Interface):
+        interface_generator = InterfaceGenerator(sink=self._sink())
+        if self._fragments is not None:
+            interface_generator.set_fragment_cache(self._fragments.child('interface'))
+
+        interface_generator.generate(interface)
+        self._add_wire_module()
+
+        self._uses_processes = self._has_process_methods(interface)
+        if self._uses_processes:
+            self._add_file('{}.py'.format(self.PROCESSES_MODULE),
+                           file('static/processes.py', __file__).read().splitlines())
+
+    @classmethod
+    def _has_process_methods(cls, namespace: Namespace):
+        return (any(method.executor is not None for method in namespace.methods) or
+                any(method.executor is not None for klass in namespace.classes for method in klass.methods) or
+                any(cls._has_process_methods(child) for child in namespace.namespaces))
+
+    def _process_methods(self):
+        """:return: The (path list, method) of the generated methods that run in the process pool."""
+        return [(path, method) for path, method in self._methods if method.executor is not None]
+
+    def _interface_function(self):
+        """The expression of the interface function of the current path"""
+        return '{interface}.{path}'.format(interface=self.INTERFACE_NAME,
+                                           path='.'.join(self._get_path_list()))
+
+    def _method_function(self, method: Method):
+        """The expression of the function that runs a method of the current path"""
+        if method.executor is None:
+            return self._interface_function()
+
+        arguments = [self.INTERFACE_NAME, self._str(self._get_path_string())]
+        if method.executor.timeout is not None:
+            arguments.append(repr(method.executor.timeout))
+
+        return '{module}.bind({arguments})'.format(module=self.PROCESSES_MODULE, arguments=', '.join(arguments))
+
+    def _add_method(self, method: Method):
+        """
+        Record a method of the current path for the decoders module.
+        :return: The method's path list.
+        """
+        path = list(self._get_path_list())
+        self._methods.append((path, method))
+
+        return path
+
+    @staticmethod
+    def _method_arguments_to_names_list(arguments: list):
+        return [argument.name for argument in arguments]
+
+    @staticmethod
+    def _mangle(path: list):
+        """
+        Join a path into an identifier, e.g. ['A', 'B_C'] -> 'A__B_uC'.
+        Every '_' of a fragment is followed by 'u', so the '__' between fragments is never ambiguous.
+        """
+        return '__'.join(fragment.replace('_', '_u') for fragment in path)
+
+    @classmethod
+    def _decoder_name(cls, path: list):
+        return 'decode_' + cls._mangle(path)
+
+    def _decoder_expression(self, path: list):
+        return '{module}.{decoder}'.format(module=self.DECODERS_MODULE, decoder=self._decoder_name(path))
+
+    @classmethod
+    def _argument_names_name(cls, path: list):
+        return 'ARGUMENTS_' + cls._mangle(path)
+
+    def _generate_decoders(self):
+        """
+        Generate a decode function per method that validates the request arguments against the spec.
+        """
+        self._set_current_file('{}.py'.format(self.DECODERS_MODULE))
+        self._add_lines(file('static/decoders.py', __file__).read().splitlines())
+
+        for path, method in self._methods:
+            self._generate_fragment(method,
+                                    lambda method, path=path: self._generate_decoder(path, method),
+                                    '/'.join(path))
+
+    def _generate_decoder(self, path: list, method: Method):
+        names_constant = self._argument_names_name(path)
+        argument_names = tuple(self._method_arguments_to_names_list(method.arguments))
+
+        self._assign(names_constant, 'frozenset({})'.format(self._str(argument_names)))
+
+        with self._function_definition(self._decoder_name(path), ['arguments']):
+            self._add_line('if type(arguments) is not dict:')
+            with self._indent():
+                self._add_line("raise DecodeError('The arguments must be an object')")
+
+            self._add_line('if arguments.keys() != {}:'.format(names_constant))
+            with self._indent():
+                self._add_line('raise arguments_error(arguments, {})'.format(names_constant))
+
+            for argument in method.arguments:
+                value = 'arguments[{}]'.format(self._str(argument.name))
+
+                self._add_line('if type({value}) is not {type}:'.format(value=value, type=argument.type.__name__))
+                with self._indent():
+                    self._add_line('raise type_error({name}, {type}, {value})'.format(name=self._str(argument.name),
+                                                                                     type=argument.type.__name__,
+                                                                                     value=value))
+
+            self._return_statement('arguments')
@@ -0,0 +1,96 @@
+"""
+The attribute cache of the generated clients.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class CacheEntry:
+    __slots__ = ('value', 'etag', 'expires')
+
+    def __init__(self, value, etag, expires):
+        self.value = value
+        self.etag = etag
+        self.expires = expires
+
+
+class AttributeCache:
+    """
+    A bounded LRU cache of attribute values and their ETags.
+
+    An entry is fresh for the ttl it was stored with, then it is revalidated with If-None-Match when it
+    has an ETag. The cached values are shared between the callers and must not be modified.
+
+    Invalidating advances the generation, the results of requests that started before are not stored.
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def lookup(self, path):
+        """:return: An (entry, is fresh) tuple, the entry is None if the path is not cached."""
+        with self._lock:
+            entry = self._entries.get(path)
+
+            if entry is not None and entry.expires > time.monotonic():
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return entry, True
+
+            self.misses += 1
+            return entry, False
+
+    def _put(self, path, entry):
+        self._entries[path] = entry
+        self._entries.move_to_end(path)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def store(self, path, value, etag, ttl, generation):
+        """Cache a fetched value, unless the cache was invalidated since the fetch started"""
+        if self.max_size <= 0 or (ttl <= 0 and etag is None):
+            return
+
+        with self._lock:
+            if generation == self.generation:
+                self._put(path, CacheEntry(value, etag, time.monotonic() + ttl))
+
+    def refresh(self, path, entry, ttl, generation):
+        """Keep an entry for another ttl after the server answered that it was not modified"""
+        with self._lock:
+            self.revalidations += 1
+
+            if generation == self.generation:
+                entry.expires = time.monotonic() + ttl
+                self._put(path, entry)
+
+    def invalidate(self, path='', names=()):
+        """
+        Drop the cached attributes under a path.
+        :param names: The paths of the attributes to drop relative to the path, all of them if empty.
+        """
+        prefix = path + '/' if path else ''
+
+        with self._lock:
+            self.generation += 1
+
+            if names:
+                paths = [prefix + name for name in names]
+            else:
+                paths = [cached_path for cached_path in self._entries if cached_path.startswith(prefix)]
+
+            for cached_path in paths:
+                self._entries.pop(cached_path, None)
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'revalidations': self.revalidations,
+                'size': len(self._entries)}
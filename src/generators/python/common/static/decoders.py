@@ -0,0 +1,16 @@
+class DecodeError(ValueError):
+    pass
+
+
+def arguments_error(arguments, expected_names):
+    missing = sorted(expected_names - arguments.keys())
+    unexpected = sorted(arguments.keys() - expected_names)
+
+    return DecodeError('Invalid arguments (missing: {}, unexpected: {})'.format(missing, unexpected))
+
+
+def type_error(name, expected_type, value):
+    return DecodeError('Invalid argument {}: got {} instead of {}'.format(name,
+                                                                        type(value).__name__,
+                                                                        expected_type.__name__))
+
@@ -0,0 +1,55 @@
+"""
+The errors of the calls of the generated clients and the results of their concurrent calls (the <method>_map
+companions).
+"""
+import json
+
+
+class CallError(Exception):
+    """A call, attribute read or batch that the server answered with an error status"""
+
+    def __init__(self, status, message):
+        super().__init__('HTTP {}: {}'.format(status, message))
+        self.status = status
+
+    @classmethod
+    def from_response(cls, status, body: bytes):
+        message = body.decode('utf-8', 'replace')
+
+        try:
+            message = json.loads(message)['error']
+        except (ValueError, TypeError, KeyError):
+            pass
+
+        return cls(status, message)
+
+
+class CallResult:
+    """
+    The outcome of one call of a fan-out, a failed call does not stop the others.
+    :param index: The position of the call's arguments in the input.
+    """
+    __slots__ = ('index', 'arguments', 'value', 'error')
+
+    def __init__(self, index, arguments, value=None, error=None):
+        self.index = index
+        self.arguments = arguments
+        self.value = value
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def result(self):
+        """:return: The value of the call, raises its error if it failed."""
+        if self.error is not None:
+            raise self.error
+
+        return self.value
+
+    def __repr__(self):
+        if self.error is not None:
+            return 'CallResult({}, error={!r})'.format(self.index, self.error)
+
+        return 'CallResult({}, value={!r})'.format(self.index, self.value)
@@ -0,0 +1,28 @@
+import threading
+
+
+class lazy_child:
+    """
+    A namespace or class of the interface, created by its create_<name> method on first access.
+    The child is kept in the instance's __dict__, which later accesses read without going through the
+    descriptor; the first access takes a lock so that an instance always gets a single child.
+    """
+
+    def __init__(self, create):
+        self.create = create
+        self.name = None
+        self._lock = threading.RLock()
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+
+        with self._lock:
+            try:
+                return instance.__dict__[self.name]
+            except KeyError:
+                child = instance.__dict__[self.name] = getattr(instance, self.create)()
+                return child
@@ -0,0 +1,169 @@
+"""
+The process pool of the generated server, it runs the methods with {"executor": {"type": "process"}} in the spec
+so that CPU bound implementations do not hold the GIL of the server.
+
+The worker processes get the interface when the pool starts: with the "fork" start method they inherit it,
+with "spawn" and "forkserver" it is pickled, so its class must be importable by the workers.
+The arguments and the results of the methods are pickled too.
+"""
+import functools
+import multiprocessing
+import signal
+import threading
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+# The number of worker processes, the number of CPUs by default.
+MAX_WORKERS = None
+# The multiprocessing start method of the workers, the platform's default if None.
+START_METHOD = None
+# The timeout of the methods that do not set one in seconds, None waits for them as long as they run.
+DEFAULT_TIMEOUT = 60
+# How long to wait past the timeout for a worker that does not stop (e.g. stuck in native code) before the
+# pool is replaced.
+TIMEOUT_GRACE = 5
+
+
+class MethodTimeout(TimeoutError):
+    pass
+
+
+# The interface of a worker process, set by the pool's initializer.
+_worker_interface = None
+
+
+def _on_alarm(signum, frame):
+    raise MethodTimeout('The method did not finish in time')
+
+
+def _initialize_worker(interface):
+    global _worker_interface
+    _worker_interface = interface
+
+    if hasattr(signal, 'setitimer'):
+        signal.signal(signal.SIGALRM, _on_alarm)
+
+
+def _run_in_worker(path, arguments, timeout):
+    function = _worker_interface
+    for fragment in path.split('/'):
+        function = getattr(function, fragment)
+
+    # The worker stops the method itself when it can, the pool keeps the worker.
+    has_alarm = timeout is not None and hasattr(signal, 'setitimer')
+    if has_alarm:
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+
+    try:
+        result = function(**arguments)
+
+        # A lazy result can not leave the process.
+        if isinstance(result, Iterator):
+            result = list(result)
+
+        return result
+    finally:
+        if has_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+class _Pool:
+    def __init__(self):
+        self._executor = None
+        self._interface = None
+        self._lock = threading.Lock()
+
+    def executor(self, interface):
+        """Get the executor of an interface, the pool restarts when the interface is replaced"""
+        with self._lock:
+            if self._executor is None or self._interface is not interface:
+                self._shutdown()
+
+                if START_METHOD is None:
+                    context = None
+                else:
+                    context = multiprocessing.get_context(START_METHOD)
+
+                self._executor = ProcessPoolExecutor(MAX_WORKERS,
+                                                     mp_context=context,
+                                                     initializer=_initialize_worker,
+                                                     initargs=(interface,))
+                self._interface = interface
+
+            return self._executor
+
+    def _shutdown(self, terminate=False):
+        if self._executor is None:
+            return
+
+        if terminate:
+            # ProcessPoolExecutor can not stop a running call, its workers have to go.
+            for process in list((getattr(self._executor, '_processes', None) or {}).values()):
+                process.terminate()
+
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+        self._interface = None
+
+    def reset(self, executor, terminate=False):
+        """Drop an executor that is broken or stuck, unless it was already replaced"""
+        with self._lock:
+            if self._executor is executor:
+                self._shutdown(terminate)
+
+    def shutdown(self):
+        with self._lock:
+            self._shutdown()
+
+
+_pool = _Pool()
+
+
+def run(interface, path, timeout, **arguments):
+    """
+    Run an interface function (by its path, e.g. path/to/method) in the process pool.
+    :param timeout: The timeout in seconds, DEFAULT_TIMEOUT if None.
+    :raises MethodTimeout: if the method does not finish in time.
+    """
+    if timeout is None:
+        timeout = DEFAULT_TIMEOUT
+
+    executor = _pool.executor(interface)
+
+    try:
+        future = executor.submit(_run_in_worker, path, arguments, timeout)
+    except BrokenProcessPool:
+        _pool.reset(executor)
+        executor = _pool.executor(interface)
+        future = executor.submit(_run_in_worker, path, arguments, timeout)
+
+    try:
+        if timeout is None:
+            return future.result()
+
+        try:
+            return future.result(timeout + TIMEOUT_GRACE)
+        except FutureTimeoutError:
+            # The timeout covers the time in the queue.
+            if future.cancel():
+                raise MethodTimeout('{} did not start in {} seconds'.format(path, timeout))
+
+        # The call started late, its worker stops it at its timeout.
+        try:
+            return future.result(timeout + TIMEOUT_GRACE)
+        except FutureTimeoutError:
+            _pool.reset(executor, terminate=True)
+            raise MethodTimeout('{} did not finish in {} seconds'.format(path, timeout))
+    except BrokenProcessPool:
+        _pool.reset(executor)
+        raise
+
+
+def bind(interface, path, timeout=None):
+    """:return: A function that runs an interface function in the process pool with keyword arguments."""
+    return functools.partial(run, interface, path, timeout)
+
+
+def shutdown():
+    _pool.shutdown()
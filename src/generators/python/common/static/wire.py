@@ -0,0 +1,480 @@
+"""
+The wire formats of the generated servers and clients.
+
+A codec is chosen by the Content-Type of a request and by the Accept header for the response,
+JSON is the default.
+"""
+import json
+import struct
+import zlib
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+class CodecError(ValueError):
+    pass
+
+
+class JsonCodec:
+    content_type = 'application/json'
+
+    @staticmethod
+    def encode(obj):
+        return json.dumps(obj).encode()
+
+    @staticmethod
+    def decode(data):
+        try:
+            return json.loads(data)
+        except ValueError as err:
+            raise CodecError(str(err))
+
+
+_UINT8 = struct.Struct('>B')
+_UINT16 = struct.Struct('>H')
+_UINT32 = struct.Struct('>I')
+_UINT64 = struct.Struct('>Q')
+_INT8 = struct.Struct('>b')
+_INT16 = struct.Struct('>h')
+_INT32 = struct.Struct('>i')
+_INT64 = struct.Struct('>q')
+_FLOAT32 = struct.Struct('>f')
+_FLOAT64 = struct.Struct('>d')
+
+
+def _encode_header(parts, length, fix_base, fix_limit, code8, code16, code32):
+    if length < fix_limit:
+        parts.append(_UINT8.pack(fix_base | length))
+    elif code8 is not None and length < 0x100:
+        parts.append(bytes((code8, length)))
+    elif length < 0x10000:
+        parts.append(bytes((code16,)) + _UINT16.pack(length))
+    elif length < 0x100000000:
+        parts.append(bytes((code32,)) + _UINT32.pack(length))
+    else:
+        raise CodecError('Object too large')
+
+
+def _encode_int(parts, obj):
+    if 0 <= obj < 0x80:
+        parts.append(_UINT8.pack(obj))
+    elif -0x20 <= obj < 0:
+        parts.append(_INT8.pack(obj))
+    elif obj >= 0:
+        if obj < 0x100:
+            parts.append(b'\xcc' + _UINT8.pack(obj))
+        elif obj < 0x10000:
+            parts.append(b'\xcd' + _UINT16.pack(obj))
+        elif obj < 0x100000000:
+            parts.append(b'\xce' + _UINT32.pack(obj))
+        elif obj < 0x10000000000000000:
+            parts.append(b'\xcf' + _UINT64.pack(obj))
+        else:
+            raise CodecError('Integer too large')
+    else:
+        if obj >= -0x80:
+            parts.append(b'\xd0' + _INT8.pack(obj))
+        elif obj >= -0x8000:
+            parts.append(b'\xd1' + _INT16.pack(obj))
+        elif obj >= -0x80000000:
+            parts.append(b'\xd2' + _INT32.pack(obj))
+        elif obj >= -0x8000000000000000:
+            parts.append(b'\xd3' + _INT64.pack(obj))
+        else:
+            raise CodecError('Integer too large')
+
+
+def _encode(parts, obj):
+    obj_type = type(obj)
+
+    if obj_type is str:
+        data = obj.encode()
+        _encode_header(parts, len(data), 0xa0, 0x20, 0xd9, 0xda, 0xdb)
+        parts.append(data)
+    elif obj_type is int:
+        _encode_int(parts, obj)
+    elif obj_type is dict:
+        _encode_header(parts, len(obj), 0x80, 0x10, None, 0xde, 0xdf)
+        for key, value in obj.items():
+            _encode(parts, key)
+            _encode(parts, value)
+    elif obj_type is list or obj_type is tuple:
+        _encode_header(parts, len(obj), 0x90, 0x10, None, 0xdc, 0xdd)
+        for item in obj:
+            _encode(parts, item)
+    elif obj is None:
+        parts.append(b'\xc0')
+    elif obj is False:
+        parts.append(b'\xc2')
+    elif obj is True:
+        parts.append(b'\xc3')
+    elif obj_type is float:
+        parts.append(b'\xcb' + _FLOAT64.pack(obj))
+    elif obj_type is bytes:
+        _encode_header(parts, len(obj), 0, 0, 0xc4, 0xc5, 0xc6)
+        parts.append(obj)
+    else:
+        raise CodecError('Can not encode {}'.format(obj_type.__name__))
+
+
+_SIZED_CODES = {
+    # code: (unpacker of the length or value, kind)
+    0xc4: (_UINT8, 'bin'),
+    0xc5: (_UINT16, 'bin'),
+    0xc6: (_UINT32, 'bin'),
+    0xca: (_FLOAT32, 'value'),
+    0xcb: (_FLOAT64, 'value'),
+    0xcc: (_UINT8, 'value'),
+    0xcd: (_UINT16, 'value'),
+    0xce: (_UINT32, 'value'),
+    0xcf: (_UINT64, 'value'),
+    0xd0: (_INT8, 'value'),
+    0xd1: (_INT16, 'value'),
+    0xd2: (_INT32, 'value'),
+    0xd3: (_INT64, 'value'),
+    0xd9: (_UINT8, 'str'),
+    0xda: (_UINT16, 'str'),
+    0xdb: (_UINT32, 'str'),
+    0xdc: (_UINT16, 'array'),
+    0xdd: (_UINT32, 'array'),
+    0xde: (_UINT16, 'map'),
+    0xdf: (_UINT32, 'map'),
+}
+
+_CONSTANTS = {0xc0: None, 0xc2: False, 0xc3: True}
+
+# The deepest nesting of arrays and maps that the pure python codec decodes.
+MAX_DEPTH = 256
+
+
+def _decode(data, position, depth=0):
+    """
+    Decode the object at a position.
+    :return: An (object, end position) tuple.
+    """
+    code = data[position]
+    position += 1
+
+    if code < 0x80:
+        return code, position
+    elif code >= 0xe0:
+        return code - 0x100, position
+    elif code >= 0xc0:
+        if code in _CONSTANTS:
+            return _CONSTANTS[code], position
+
+        try:
+            unpacker, kind = _SIZED_CODES[code]
+        except KeyError:
+            raise CodecError('Unsupported type code 0x{:02x}'.format(code))
+
+        value = unpacker.unpack_from(data, position)[0]
+        position += unpacker.size
+
+        if kind == 'value':
+            return value, position
+        length = value
+    else:
+        length = code & (0x1f if code >= 0xa0 else 0x0f)
+        kind = ('map', 'array', 'str', 'str')[(code >> 4) - 8]
+
+    # Every element takes a byte at least, a length that the data can not hold is rejected before allocating.
+    if length * (2 if kind == 'map' else 1) > len(data) - position:
+        raise CodecError('Truncated data')
+
+    if kind == 'str':
+        end = position + length
+        return data[position:end].decode(), end
+    elif kind == 'bin':
+        end = position + length
+        return bytes(data[position:end]), end
+
+    if depth >= MAX_DEPTH:
+        raise CodecError('Too deeply nested')
+
+    if kind == 'array':
+        result = [None] * length
+        for i in range(length):
+            result[i], position = _decode(data, position, depth + 1)
+        return result, position
+    else:
+        result = {}
+        for _ in range(length):
+            key, position = _decode(data, position, depth + 1)
+            result[key], position = _decode(data, position, depth + 1)
+        return result, position
+
+
+class PureMsgpackCodec:
+    """A pure python implementation of the MessagePack format (without extension types)"""
+    content_type = 'application/msgpack'
+
+    @staticmethod
+    def encode(obj):
+        parts = []
+        _encode(parts, obj)
+        return b''.join(parts)
+
+    @staticmethod
+    def decode(data):
+        try:
+            result, position = _decode(data, 0)
+        except (IndexError, struct.error):
+            raise CodecError('Truncated data')
+        except UnicodeDecodeError as err:
+            raise CodecError(str(err))
+        except TypeError:
+            raise CodecError('Invalid map key')
+        except RecursionError:
+            raise CodecError('Too deeply nested')
+
+        if position != len(data):
+            raise CodecError('Extra data')
+
+        return result
+
+
+class NativeMsgpackCodec:
+    """MessagePack through the msgpack package"""
+    content_type = 'application/msgpack'
+
+    @staticmethod
+    def encode(obj):
+        try:
+            return msgpack.packb(obj, use_bin_type=True)
+        except (TypeError, OverflowError) as err:
+            raise CodecError(str(err))
+
+    @staticmethod
+    def decode(data):
+        try:
+            return msgpack.unpackb(data, raw=False, strict_map_key=False)
+        except (ValueError, TypeError, msgpack.UnpackException) as err:
+            raise CodecError(str(err))
+
+
+# The pure python codec is a fallback for when msgpack is not installed.
+if msgpack is not None:
+    MsgpackCodec = NativeMsgpackCodec
+else:
+    MsgpackCodec = PureMsgpackCodec
+
+DEFAULT_CODEC = JsonCodec
+
+CODECS = {codec.content_type: codec for codec in (JsonCodec, MsgpackCodec)}
+
+
+def _media_type(value):
+    return value.split(';', 1)[0].strip().lower()
+
+
+def codec_for_content_type(content_type):
+    """
+    Get the codec of a Content-Type header.
+    :return: The codec, the default one if there is no content type, None if it is not supported.
+    """
+    if not content_type:
+        return DEFAULT_CODEC
+
+    return CODECS.get(_media_type(content_type))
+
+
+def _quality_values(header):
+    """:return: The (value, quality) of every element of an Accept or Accept-Encoding header."""
+    for element in header.split(','):
+        value, *parameters = element.split(';')
+
+        quality = 1.0
+        for parameter in parameters:
+            name, _, parameter_value = parameter.partition('=')
+            if name.strip() == 'q':
+                try:
+                    quality = float(parameter_value)
+                except ValueError:
+                    quality = 0.0
+
+        yield value.strip().lower(), quality
+
+
+def negotiate(accept):
+    """
+    Choose the codec of a response by an Accept header, fall back to the default codec.
+    """
+    if not accept:
+        return DEFAULT_CODEC
+
+    best_codec, best_quality = None, 0.0
+
+    for media_type, quality in _quality_values(accept):
+        if media_type in ('*/*', 'application/*'):
+            codec = DEFAULT_CODEC
+        else:
+            codec = CODECS.get(media_type)
+
+        if codec is not None and quality > best_quality:
+            best_codec, best_quality = codec, quality
+
+    return best_codec or DEFAULT_CODEC
+
+
+# The list results of methods stream as newline delimited JSON, one item per line.
+NDJSON_CONTENT_TYPE = 'application/x-ndjson'
+
+
+def accepts(accept, content_type):
+    """:return: True if an Accept header explicitly takes a media type."""
+    if not accept:
+        return False
+
+    return any(media_type == content_type and quality > 0 for media_type, quality in _quality_values(accept))
+
+
+def is_ndjson(content_type):
+    return bool(content_type) and _media_type(content_type) == NDJSON_CONTENT_TYPE
+
+
+def encode_ndjson(items):
+    """Encode the items of an iterable one line at a time"""
+    for item in items:
+        yield json.dumps(item).encode() + b'\n'
+
+
+class NdjsonDecoder:
+    """Decode NDJSON items from chunks of bytes as they arrive"""
+
+    def __init__(self):
+        # The chunks of the line that is not complete yet.
+        self._pending = []
+
+    @staticmethod
+    def _decode_lines(lines):
+        try:
+            return [json.loads(line) for line in lines if line.strip()]
+        except ValueError as err:
+            raise CodecError(str(err))
+
+    def feed(self, chunk):
+        """:return: The items of the lines that were completed by a chunk."""
+        lines = chunk.split(b'\n')
+
+        if len(lines) == 1:
+            self._pending.append(chunk)
+            return []
+
+        self._pending.append(lines[0])
+        lines[0] = b''.join(self._pending)
+        self._pending = [lines.pop()]
+
+        return self._decode_lines(lines)
+
+    def close(self):
+        """:return: The item of a last line that does not end with a newline, if any."""
+        pending, self._pending = b''.join(self._pending), []
+        return self._decode_lines([pending])
+
+
+# Bodies of at least COMPRESS_THRESHOLD bytes are compressed when the other side accepts it.
+COMPRESS_THRESHOLD = 1024
+COMPRESS_LEVEL = 1
+
+# The zlib window bits of every content encoding, "deflate" is the zlib format (RFC 9110).
+_WBITS = {'gzip': 16 + zlib.MAX_WBITS, 'deflate': zlib.MAX_WBITS}
+
+CONTENT_ENCODINGS = tuple(_WBITS)
+ACCEPT_ENCODING = ', '.join(CONTENT_ENCODINGS)
+
+
+def choose_encoding(accept_encoding):
+    """
+    Choose the content encoding of a response by an Accept-Encoding header.
+    :return: The encoding, None to send the body as is.
+    """
+    if not accept_encoding:
+        return None
+
+    qualities = dict(_quality_values(accept_encoding))
+    wildcard = qualities.get('*', 0.0)
+
+    best_encoding, best_quality = None, 0.0
+    for encoding in CONTENT_ENCODINGS:
+        quality = qualities.get(encoding, wildcard)
+        if quality > best_quality:
+            best_encoding, best_quality = encoding, quality
+
+    return best_encoding
+
+
+def content_encoding(value):
+    """
+    Get the encoding of a Content-Encoding header.
+    :return: The encoding, None for an uncompressed body.
+    :raises CodecError: if the encoding is not supported.
+    """
+    if not value:
+        return None
+
+    encoding = value.strip().lower()
+    if encoding == 'identity':
+        return None
+    if encoding not in _WBITS:
+        raise CodecError('Unsupported content encoding: {}'.format(value))
+
+    return encoding
+
+
+def _compressor(encoding, level):
+    return zlib.compressobj(level, zlib.DEFLATED, _WBITS[encoding])
+
+
+def compress(data, encoding, level=None):
+    compressor = _compressor(encoding, COMPRESS_LEVEL if level is None else level)
+    return compressor.compress(data) + compressor.flush()
+
+
+def compress_chunks(chunks, encoding, flush_size=1 << 16, level=None):
+    """
+    Compress a stream of chunks, flushing every flush_size bytes of input so the other side can
+    decode what was sent so far.
+    """
+    compressor = _compressor(encoding, COMPRESS_LEVEL if level is None else level)
+    pending = 0
+
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        pending += len(chunk)
+
+        if pending >= flush_size:
+            data += compressor.flush(zlib.Z_SYNC_FLUSH)
+            pending = 0
+
+        if data:
+            yield data
+
+    yield compressor.flush()
+
+
+def decompress(data, encoding, max_size=None):
+    """
+    :param max_size: The maximum size of the decompressed data.
+    :raises CodecError: if the data is invalid or decompresses to more than max_size bytes.
+    """
+    decompressor = zlib.decompressobj(_WBITS[encoding])
+
+    try:
+        if max_size is None:
+            result = decompressor.decompress(data) + decompressor.flush()
+        else:
+            result = decompressor.decompress(data, max_size + 1)
+    except zlib.error as err:
+        raise CodecError(str(err))
+
+    if max_size is not None and len(result) > max_size:
+        raise CodecError('The decompressed data is larger than {} bytes'.format(max_size))
+
+    if not decompressor.eof:
+        raise CodecError('Truncated compressed data')
+
+    return result
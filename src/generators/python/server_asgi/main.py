@@ -0,0 +1,53 @@
+from typing import Union
+
+from generators.python.common.ServerInterfaceGenerator import ServerInterfaceGenerator
+from parser.classes import Interface, Attribute, Method
+
+from common.file import file
+
+
+class ServerGenerator(ServerInterfaceGenerator):
+    APP_MODULE = 'asgi'
+
+    def __init__(self):
+        super().__init__('server_asgi')
+
+    def generate(self, interface: Interface):
+        self._generate_common_files(interface)
+        self._add_file('{}.py'.format(self.APP_MODULE),
+                       file('static/asgi.py', __file__).read().splitlines())
+
+        # Generate the ASGI application for that interface.
+        self._set_current_file('app.py')
+        self._add_line('import {}'.format(self.APP_MODULE))
+        self._add_line('import {}'.format(self.DECODERS_MODULE))
+        if self._uses_processes:
+            self._add_line('import {}'.format(self.PROCESSES_MODULE))
+        self._assign('app', '{}.App()'.format(self.APP_MODULE))
+
+        super().generate(interface)
+        self._generate_decoders()
+
+        return self.files()
+
+    def _route_decorator(self, obj: Union[Method, Attribute]):
+        path = self._str('/{path}'.format(path=self._get_path_string()))
+
+        if isinstance(obj, Attribute):
+            return '@app.attribute({})'.format(path)
+
+        arguments = [path, self._decoder_expression(self._add_method(obj))]
+        if self._is_streamed(obj):
+            arguments.append('stream=True')
+
+        return '@app.method({})'.format(', '.join(arguments))
+
+    def _generate_function_body(self, obj: Union[Method, Attribute], arguments):
+        # The routes resolve the interface function on every request, the app calls it.
+        with self._method_definition(obj.name,
+                                     is_static=True,
+                                     decorators=[self._route_decorator(obj)]):
+            if isinstance(obj, Method):
+                self._return_statement(self._method_function(obj))
+            else:
+                self._return_statement(self._interface_function())
@@ -0,0 +1,324 @@
+import asyncio
+import functools
+import inspect
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import wire
+
+
+class App:
+    """
+    A dependency-free ASGI application that routes every path of the interface to its function.
+
+    Coroutine functions are awaited on the event loop, plain functions run in a bounded thread pool.
+    A list of {"path": ..., "arguments": ...} method calls can be posted to BATCH_PATH and run in one request.
+    :param max_workers: The size of the thread pool of the plain functions.
+    """
+    BATCH_PATH = '/_batch'
+    # The size that the NDJSON lines of a streamed result are grouped up to before they are sent.
+    STREAM_CHUNK_SIZE = 1 << 16
+    # The largest request body that a compressed request is inflated to.
+    MAX_REQUEST_SIZE = 64 * 1024 * 1024
+
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers
+        self._routes = {}
+        self._executor = None
+
+    def method(self, path, decode, stream=False):
+        """
+        Register a method, the decorated function returns the interface function to call.
+        :param decode: The method's generated decode function.
+        :param stream: The method returns a list, that is streamed as NDJSON to the clients that accept it;
+                       the interface function may return any iterable or async iterable.
+        """
+        def decorator(resolve):
+            self._routes[path] = ('POST', resolve, decode, stream)
+            return resolve
+
+        return decorator
+
+    def attribute(self, path):
+        """Register an attribute, the decorated function returns the interface function to call"""
+        def decorator(resolve):
+            self._routes[path] = ('GET', resolve, None, False)
+            return resolve
+
+        return decorator
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='interface')
+
+        return self._executor
+
+    async def _run(self, function, arguments):
+        if inspect.iscoroutinefunction(function):
+            return await function(**arguments)
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), functools.partial(function, **arguments))
+
+    def _next_chunk(self, iterator):
+        """Encode the next items of a result, up to STREAM_CHUNK_SIZE bytes, b'' at the end"""
+        lines = []
+        size = 0
+
+        for line in wire.encode_ndjson(iterator):
+            lines.append(line)
+            size += len(line)
+            if size >= self.STREAM_CHUNK_SIZE:
+                break
+
+        return b''.join(lines)
+
+    async def _iter_chunks(self, result):
+        if hasattr(result, '__aiter__'):
+            lines = []
+            size = 0
+
+            async for item in result:
+                line = json.dumps(item).encode() + b'\n'
+                lines.append(line)
+                size += len(line)
+
+                if size >= self.STREAM_CHUNK_SIZE:
+                    yield b''.join(lines)
+                    lines = []
+                    size = 0
+
+            if lines:
+                yield b''.join(lines)
+            return
+
+        # Producing the items may block, e.g. a generator that reads a database.
+        loop = asyncio.get_running_loop()
+        iterator = iter(result)
+
+        while True:
+            chunk = await loop.run_in_executor(self._get_executor(), self._next_chunk, iterator)
+            if not chunk:
+                return
+
+            yield chunk
+
+    async def _send_stream(self, receive, send, result):
+        await send({'type': 'http.response.start',
+                    'status': 200,
+                    'headers': [(b'content-type', wire.NDJSON_CONTENT_TYPE.encode('latin-1'))]})
+
+        # The request body was read, the next message is the client disconnecting.
+        disconnected = asyncio.ensure_future(receive())
+        chunks = self._iter_chunks(result)
+
+        try:
+            async for chunk in chunks:
+                if disconnected.done():
+                    return
+
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+
+            await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            disconnected.cancel()
+            await chunks.aclose()
+
+    async def _materialize(self, result):
+        """Collect the items of a streamable result that is sent whole"""
+        if isinstance(result, (list, tuple)):
+            return result
+
+        if hasattr(result, '__aiter__'):
+            return [item async for item in result]
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), list, result)
+
+    @staticmethod
+    async def _read_body(receive):
+        chunks = []
+
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return None
+
+            chunks.append(message.get('body', b''))
+            if not message.get('more_body', False):
+                return b''.join(chunks)
+
+    @staticmethod
+    async def _send(send, status, body, content_type):
+        await send({'type': 'http.response.start',
+                    'status': status,
+                    'headers': [(b'content-type', content_type.encode('latin-1')),
+                                (b'content-length', str(len(body)).encode('latin-1'))]})
+        await send({'type': 'http.response.body', 'body': body})
+
+    async def _send_error(self, send, message, status=400):
+        await self._send(send, status, json.dumps({'error': message}).encode(), 'application/json')
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                if self._executor is not None:
+                    self._executor.shutdown(wait=False)
+                    self._executor = None
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def _decode_request(self, headers, body):
+        """
+        :return: The decoded request object and an error message, one of them is None.
+        """
+        codec = wire.codec_for_content_type(headers.get('content-type'))
+        if codec is None:
+            return None, ('Unsupported content type', 415)
+
+        try:
+            encoding = wire.content_encoding(headers.get('content-encoding'))
+        except wire.CodecError:
+            return None, ('Unsupported content encoding', 415)
+
+        if encoding is not None:
+            try:
+                body = wire.decompress(body, encoding, self.MAX_REQUEST_SIZE)
+            except wire.CodecError as err:
+                return None, ('Could not decompress request data: {}'.format(err), 400)
+
+        try:
+            request_args = codec.decode(body)
+        except wire.CodecError:
+            return None, ('Could not parse request data', 400)
+
+        if not isinstance(request_args, dict):
+            return None, ('The request must be an object', 400)
+
+        return request_args, None
+
+    def _decode_arguments(self, headers, body, decode):
+        """
+        :return: The decoded arguments and an error message, one of them is None.
+        """
+        request_args, error = self._decode_request(headers, body)
+        if error is not None:
+            return None, error
+
+        try:
+            return decode(request_args.get('arguments')), None
+        except ValueError as err:
+            return None, (str(err), 400)
+
+    async def _run_batch(self, headers, body):
+        """
+        Run the calls of a batch one after another.
+        Every call gets either {"result": ...} or {"error": ...}, a failed call does not stop the others.
+        :return: The results and an error message, one of them is None.
+        """
+        request_args, error = self._decode_request(headers, body)
+        if error is not None:
+            return None, error
+
+        calls = request_args.get('calls')
+        if not isinstance(calls, list):
+            return None, ('The calls must be a list', 400)
+
+        results = []
+        for call in calls:
+            try:
+                path = call['path']
+                route = self._routes.get('/{}'.format(path))
+                if route is None or route[0] != 'POST':
+                    raise LookupError('No such method: {}'.format(path))
+
+                _, resolve, decode, stream = route
+                result = await self._run(resolve(), decode(call.get('arguments', {})))
+                if stream:
+                    result = await self._materialize(result)
+            except Exception as err:
+                results.append({'error': '{}: {}'.format(type(err).__name__, err)})
+            else:
+                results.append({'result': result})
+
+        return results, None
+
+    async def _batch(self, scope, receive, send):
+        if scope['method'] != 'POST':
+            await self._send_error(send, 'Method not allowed', 405)
+            return
+
+        headers = {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in scope['headers']}
+
+        body = await self._read_body(receive)
+        if body is None:
+            return
+
+        results, error = await self._run_batch(headers, body)
+        if error is not None:
+            await self._send_error(send, *error)
+            return
+
+        codec = wire.negotiate(headers.get('accept'))
+        await self._send(send, 200, codec.encode({'results': results}), codec.content_type)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+
+        if scope['type'] != 'http':
+            raise NotImplementedError('Unsupported scope type: {}'.format(scope['type']))
+
+        if scope['path'] == self.BATCH_PATH:
+            await self._batch(scope, receive, send)
+            return
+
+        route = self._routes.get(scope['path'])
+        if route is None:
+            await self._send_error(send, 'No such path', 404)
+            return
+
+        http_method, resolve, decode, stream = route
+        if scope['method'] != http_method:
+            await self._send_error(send, 'Method not allowed', 405)
+            return
+
+        headers = {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in scope['headers']}
+
+        body = await self._read_body(receive)
+        if body is None:
+            return
+
+        if decode is None:
+            arguments = {}
+        else:
+            arguments, error = self._decode_arguments(headers, body, decode)
+            if error is not None:
+                await self._send_error(send, *error)
+                return
+
+        accept = headers.get('accept')
+        streamed = stream and wire.accepts(accept, wire.NDJSON_CONTENT_TYPE)
+
+        try:
+            result = await self._run(resolve(), arguments)
+            if stream and not streamed:
+                result = await self._materialize(result)
+        except TimeoutError as err:
+            await self._send_error(send, str(err), 504)
+            return
+        except Exception as err:
+            await self._send_error(send, '{}: {}'.format(type(err).__name__, err), 500)
+            return
+
+        if streamed:
+            await self._send_stream(receive, send, result)
+            return
+
+        codec = wire.negotiate(accept)
+        await self._send(send, 200, codec.encode(result), codec.content_type)
@@ -1,49 +1,193 @@
 from typing import Union
 
-from generators.python.common.InterfaceGenerator import InterfaceGenerator
+from generators.python.common.ServerInterfaceGenerator import ServerInterfaceGenerator
 from parser.classes import Interface, Attribute, Method
 
 from common.file import file
 
 
-class ServerGenerator(InterfaceGenerator):
-    INTERFACE_NAME = 'interface'
+class ServerGenerator(ServerInterfaceGenerator):
     POST_ARG_NAME = 'data'
-
-    def __init__(self):
+    BATCH_PATH = '_batch'
+    BATCH_METHODS_NAME = 'BATCH_METHODS'
+    CACHE_STATS_PATH = '_cache'
+    METRICS_PATH = 'metrics'
+    METRICS_MODULE = 'metrics'
+    PROCESS_METHODS_NAME = 'PROCESS_METHODS'
+    FRAGMENT_LISTS = ('_methods', '_cached_attributes', '_dispatch_routes')
+
+    ROUTING_ROUTES = 'routes'
+    ROUTING_DISPATCH = 'dispatch'
+    DISPATCH_ROUTES_NAME = 'ROUTES'
+
+    def __init__(self, metrics=True, routing=ROUTING_ROUTES):
+        """
+        :param metrics: Instrument the routes and expose them at /metrics, the instrumentation is not
+                        generated at all when false ("false", "no", "off" or "0" from the command line).
+        :param routing: "routes" registers a Flask route per method and attribute, "dispatch" registers a
+                        single route that looks the path up in a generated dict, which keeps the import
+                        and the matching time flat for interfaces with thousands of paths.
+        """
         super().__init__('server_flask')
         self._assert_expr = None
+        # The paths of the attributes with a response cache.
+        self._cached_attributes = []
+
+        if isinstance(metrics, str):
+            metrics = metrics.strip().lower() not in ('false', 'no', 'off', '0')
+        self._metrics = metrics
+
+        routing = routing.strip().lower()
+        if routing not in (self.ROUTING_ROUTES, self.ROUTING_DISPATCH):
+            raise ValueError('Invalid routing: {}; choose one from: {}'.format(
+                routing, (self.ROUTING_ROUTES, self.ROUTING_DISPATCH)))
+        self._dispatch = routing == self.ROUTING_DISPATCH
+
+        # The (path, HTTP method, handler) of every path in dispatch mode.
+        self._dispatch_routes = []
+        # The generated classes that enclose the current path.
+        self._definitions = []
 
     def generate(self, interface: Interface):
-        self._add_files(InterfaceGenerator().generate(interface))
+        self._generate_common_files(interface)
         self._add_file('flask_app.py',
                        file('static/app.py', __file__).read().splitlines())
         self._add_file('helpers.py',
                        file('static/helpers.py', __file__).read().splitlines())
+        if self._metrics:
+            self._add_file('{}.py'.format(self.METRICS_MODULE),
+                           file('static/metrics.py', __file__).read().splitlines())
 
         # Generate the REST API for that interface.
         self._set_current_file('app.py')
         self._add_line('from flask_app import app')
         self._add_line('import helpers')
+        self._add_line('import {}'.format(self.DECODERS_MODULE))
+        if self._metrics:
+            self._add_line('import {}'.format(self.METRICS_MODULE))
+        if self._uses_processes:
+            self._add_line('import {}'.format(self.PROCESSES_MODULE))
+
+        super().generate(interface)
+        if self._dispatch:
+            self._generate_dispatch_route()
+        self._generate_batch_route()
+        if self._cached_attributes:
+            self._generate_cache_stats_route()
+        if self._metrics:
+            self._generate_metrics_route()
+        self._generate_decoders()
+
+        return self.files()
+
+    def _generate_interface(self, namespace):
+        self._definitions.append(namespace.name)
+        super()._generate_interface(namespace)
+        self._definitions.pop()
+
+    def _generate_class_definition(self, klass):
+        self._definitions.append(self._class_name(klass))
+        super()._generate_class_definition(klass)
+        self._definitions.pop()
+
+    def _generate_dispatch_route(self):
+        """
+        Generate the path->(HTTP method, handler) dict and the single route that dispatches through it.
+        """
+        self._add_line('{} = {{'.format(self.DISPATCH_ROUTES_NAME))
+        with self._indent():
+            for path, http_method, handler in self._dispatch_routes:
+                self._add_line('{path}: ({method}, {handler}),'.format(path=self._str(path),
+                                                                      method=self._str(http_method),
+                                                                      handler=handler))
+        self._add_line('}')
+
+        self._add_line(self._route_decorator('/<path:path>', ['GET', 'POST']))
+        with self._function_definition('dispatch', ['path']):
+            self._return_statement('helpers.dispatch({}, path)'.format(self.DISPATCH_ROUTES_NAME))
+
+    def _generate_batch_route(self):
+        """
+        Generate a single route that runs a list of {path, arguments} calls in one request.
+        """
+        self._add_line('{} = {{'.format(self.BATCH_METHODS_NAME))
+        with self._indent():
+            for path, _ in self._methods:
+                self._add_line('{path}: {decoder},'.format(path=self._str('/'.join(path)),
+                                                           decoder=self._decoder_expression(path)))
+        self._add_line('}')
+
+        batch_arguments = [self.INTERFACE_NAME, self.BATCH_METHODS_NAME]
+
+        process_methods = self._process_methods()
+        if process_methods:
+            self._add_line('{} = {{'.format(self.PROCESS_METHODS_NAME))
+            with self._indent():
+                for path, method in process_methods:
+                    self._add_line('{path}: {timeout},'.format(path=self._str('/'.join(path)),
+                                                               timeout=repr(method.executor.timeout)))
+            self._add_line('}')
+            batch_arguments.append(self.PROCESS_METHODS_NAME)
+
+        self._add_line(self._route_decorator('/' + self.BATCH_PATH, ['POST']))
+        with self._function_definition('batch'):
+            self._generate_measured_call(self.BATCH_PATH, 'helpers.run_batch', batch_arguments)
+
+    def _generate_cache_stats_route(self):
+        """Generate a route that exposes the hit/miss counters of the attribute caches"""
+        self._add_line(self._route_decorator('/' + self.CACHE_STATS_PATH, ['GET']))
+        with self._function_definition('cache_stats'):
+            self._return_statement('helpers.encode_response(helpers.cache_stats())')
+
+    def _generate_metrics_route(self):
+        """Generate a route that exposes the metrics of every route in the Prometheus text format"""
+        self._add_line(self._route_decorator('/' + self.METRICS_PATH, ['GET']))
+        with self._function_definition('prometheus_metrics'):
+            self._return_statement('{}.metrics_response()'.format(self.METRICS_MODULE))
+
+    def _generate_measured_call(self, path: str, function: str, arguments):
+        """
+        Return the value of a call, the call is measured as a whole when the routes are instrumented.
+        """
+        if self._metrics:
+            arguments = (self._str(path), function) + tuple(arguments)
+            function = '{}.run_measured'.format(self.METRICS_MODULE)
+
+        self._function_call(function, arguments, 'value')
+        self._return_statement('value')
 
-        return super().generate(interface)
+    def _route_decorator(self, route: str, methods: list, endpoint: str = None):
+        arguments = [self._str(route),
+                     'methods={methods}'.format(methods=self._str(methods))]
 
-    def _path_line_decorator(self, methods: list):
-        arguments = (self._str('/{path}'.format(path=self._get_path_string())),
-                     'methods={methods}'.format(methods=self._str(methods)))
+        if endpoint is not None:
+            arguments.append('endpoint={}'.format(self._str(endpoint)))
 
         return '@app.route({})'.format(', '.join(arguments))
 
+    def _path_line_decorator(self, methods: list):
+        # The functions of different paths share names, Flask needs a distinct endpoint for every route.
+        return self._route_decorator('/{path}'.format(path=self._get_path_string()),
+                                     methods,
+                                     endpoint=self._get_path_string())
+
     def _generate_function_body(self, obj: Union[Method, Attribute], arguments):
         if isinstance(obj, Attribute):
             methods = ['GET']
         else:
             methods = ['POST']
 
+        if self._dispatch:
+            handler = '.'.join(self._definitions + [obj.name])
+            self._dispatch_routes.append((self._get_path_string(), methods[0], handler))
+            decorators = []
+        else:
+            decorators = [self._path_line_decorator(methods)]
+
         with self._method_definition(obj.name,
                                      arguments,
                                      is_static=True,
-                                     decorators=[self._path_line_decorator(methods)]):
+                                     decorators=decorators):
             if isinstance(obj, Attribute):
                 self._generate_attribute_body(obj)
             elif isinstance(obj, Method):
@@ -52,24 +196,42 @@ class ServerGenerator(InterfaceGenerator):
                 raise NotImplementedError
 
     def _generate_attribute_body(self, attribute: Attribute):
+        if attribute.cache is not None:
+            self._generate_cached_attribute_body(attribute)
+            return
+
+        if self._metrics:
+            self._function_call('{}.run_attribute'.format(self.METRICS_MODULE),
+                                (self._str(self._get_path_string()), self._interface_function()),
+                                'value')
+            self._return_statement('value')
+            return
+
         # evaluate the attribute
-        self._assign('result', '{interface}.{path}()'
-                     .format(interface=self.INTERFACE_NAME,
-                             path='.'.join(self._get_path_list())))
-        self._encapsulate_to_json('result', 'json_result')
-        self._return_statement('json_result')
+        self._assign('result', self._interface_function() + '()')
+        self._return_statement('helpers.encode_response(result)')
 
-    @staticmethod
-    def _method_arguments_to_names_list(arguments: list):
-        return [argument.name for argument in arguments]
+    def _generate_cached_attribute_body(self, attribute: Attribute):
+        self._cached_attributes.append(self._get_path_string())
+
+        self._generate_measured_call(self._get_path_string(),
+                                     'helpers.run_cached_attribute',
+                                     (self._str(self._get_path_string()),
+                                      self._interface_function(),
+                                      'ttl={}'.format(self._str(attribute.cache.ttl)),
+                                      'max_size={}'.format(self._str(attribute.cache.max_size))))
 
     def _generate_method_body(self, method: Method):
-        function_obj = '{interface}.{path}'.format(interface=self.INTERFACE_NAME,
-                                                   path='.'.join(self._get_path_list()))
-        method_argument_names_list = self._method_arguments_to_names_list(method.arguments)
-
-        self._function_call('helpers.run_method',
-                            (str(method_argument_names_list),
-                             function_obj),
-                            'value')
+        path = self._add_method(method)
+
+        arguments = [self._decoder_expression(path), self._method_function(method)]
+        if self._is_streamed(method):
+            arguments.append('encode=helpers.encode_list_response')
+
+        if self._metrics:
+            self._function_call('{}.run_decoded'.format(self.METRICS_MODULE),
+                                [self._str(self._get_path_string())] + arguments,
+                                'value')
+        else:
+            self._function_call('helpers.run_decoded', arguments, 'value')
         self._return_statement('value')
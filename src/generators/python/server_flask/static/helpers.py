@@ -1,22 +1,357 @@
+import hashlib
 import json
-from flask import request
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Iterator
+from flask import request, Response
 
-def run_method(method_arguments_names, interface_function):
-    request_args = request.get_data()
+import wire
+
+# Response bodies of at least COMPRESS_THRESHOLD bytes are compressed when the client accepts it (see
+# wire.choose_encoding), None disables the compression of responses.
+COMPRESS_THRESHOLD = wire.COMPRESS_THRESHOLD
+# Compressed streams are flushed every STREAM_FLUSH_SIZE bytes of items.
+STREAM_FLUSH_SIZE = 1 << 16
+# The maximum size of a request body once it is decompressed.
+MAX_REQUEST_SIZE = 64 * 1024 * 1024
+
+
+class RequestError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def error_response(message, status=400):
+    return json.dumps({"error": message}), status, {"Content-Type": "application/json"}
+
+
+def request_body():
+    """
+    Get the request body, decompressed by its Content-Encoding.
+    :raises RequestError: if the encoding is not supported or the body can not be decompressed.
+    """
+    try:
+        encoding = wire.content_encoding(request.headers.get("Content-Encoding"))
+    except wire.CodecError:
+        raise RequestError("Unsupported content encoding", 415)
+
+    data = request.get_data()
+    if encoding is None:
+        return data
+
+    try:
+        return wire.decompress(data, encoding, MAX_REQUEST_SIZE)
+    except wire.CodecError as err:
+        raise RequestError("Could not decompress request data: {}".format(err))
+
+
+def parse_request():
+    """
+    Decode the request body by its Content-Type.
+    :raises RequestError: if the body can not be decoded.
+    """
+    codec = wire.codec_for_content_type(request.headers.get("Content-Type"))
+    if codec is None:
+        raise RequestError("Unsupported content type", 415)
+
+    body = request_body()
+
+    try:
+        request_args = codec.decode(body)
+    except wire.CodecError:
+        raise RequestError("Could not parse request data")
+
+    if not isinstance(request_args, dict):
+        raise RequestError("The request must be an object")
+
+    return request_args
+
+
+def accepted_encoding():
+    """:return: The encoding to compress the response with, None if compression is off or not accepted."""
+    if COMPRESS_THRESHOLD is None:
+        return None
+
+    return wire.choose_encoding(request.headers.get("Accept-Encoding"))
+
+
+def compressible_response(body, content_type, encoding=None, headers=None):
+    """
+    Make the response of an encoded body, compressed when it reaches COMPRESS_THRESHOLD.
+    :param encoding: The encoding that the client accepts (see accepted_encoding).
+    """
+    headers = dict(headers or ())
+
+    if encoding is not None and len(body) >= COMPRESS_THRESHOLD:
+        body = wire.compress(body, encoding)
+        headers["Content-Encoding"] = encoding
+        headers["Vary"] = "Accept-Encoding"
+
+    return Response(body, content_type=content_type, headers=headers)
+
+
+def encode_response(obj):
+    """Encode a result with the codec that the Accept header asks for"""
+    codec = wire.negotiate(request.headers.get("Accept"))
+    return compressible_response(codec.encode(obj), codec.content_type, accepted_encoding())
+
+
+def encode_list_response(result):
+    """
+    Encode the result of a method that returns a list.
+    When the client accepts NDJSON the items are streamed as they are produced, so an interface
+    function can return an iterator (e.g. a generator) without building the whole list.
+    """
+    if wire.accepts(request.headers.get("Accept"), wire.NDJSON_CONTENT_TYPE):
+        chunks = wire.encode_ndjson(result)
+        headers = {}
+
+        # The size of a stream is not known in advance, it is compressed whenever the client accepts it.
+        encoding = accepted_encoding()
+        if encoding is not None:
+            chunks = wire.compress_chunks(chunks, encoding, STREAM_FLUSH_SIZE)
+            headers = {"Content-Encoding": encoding, "Vary": "Accept-Encoding"}
+
+        return Response(chunks, content_type=wire.NDJSON_CONTENT_TYPE, headers=headers)
+
+    if not isinstance(result, (list, tuple)):
+        result = list(result)
+
+    return encode_response(result)
+
+
+def decode_arguments(decode):
+    """
+    Decode the arguments of a method call from the request.
+    :param decode: The method's generated decode function, raises ValueError on invalid arguments.
+    :raises RequestError: if the request or the arguments are invalid.
+    """
+    request_args = parse_request()
+
+    try:
+        return decode(request_args.get("arguments"))
+    except ValueError as err:
+        raise RequestError(str(err))
+
+
+def run_decoded(decode, interface_function, encode=encode_response):
+    """
+    Run a method with the request arguments.
+    :param decode: The method's generated decode function, raises ValueError on invalid arguments.
+    :param encode: The function that makes the response of the result.
+    """
+    try:
+        arguments = decode_arguments(decode)
+    except RequestError as err:
+        return error_response(str(err), err.status)
+
+    try:
+        exec_result = interface_function(**arguments)
+    except TimeoutError as err:
+        return error_response(str(err), 504)
+
+    return encode(exec_result)
+
+
+def dispatch(routes, path):
+    """
+    Run the handler of a path, a GET path answers HEAD too (Flask drops the body) as its own route would.
+    :param routes: A path->(HTTP method, handler) dict.
+    """
+    route = routes.get(path)
+    if route is None:
+        return error_response("No such path", 404)
+
+    http_method, handler = route
+    allowed = (http_method, "HEAD") if http_method == "GET" else (http_method,)
+    if request.method not in allowed:
+        body, status, headers = error_response("Method not allowed", 405)
+        headers["Allow"] = ", ".join(allowed)
+        return body, status, headers
+
+    return handler()
+
+
+def resolve_path(interface, path):
+    """Get the interface function of a path (e.g. path/to/method)"""
+    obj = interface
+    for fragment in path.split('/'):
+        obj = getattr(obj, fragment)
+
+    return obj
+
+
+def run_batch(interface, methods, process_methods=None):
+    """
+    Run a list of {"path": ..., "arguments": ...} calls.
+    Every call gets either {"result": ...} or {"error": ...}, a failed call does not stop the others.
+    :param methods: A path->decode function dict of the methods that can be called.
+    :param process_methods: A path->timeout dict of the methods that run in the process pool.
+    """
+    if process_methods:
+        import processes
 
     try:
-        request_args = json.loads(request_args)
-    except json.JSONDecodeError:
-        return "Error: Could not parse request data"
+        request_args = parse_request()
+    except RequestError as err:
+        return error_response(str(err), err.status)
+
+    calls = request_args.get("calls")
+    if not isinstance(calls, list):
+        return error_response("The calls must be a list")
+
+    results = []
+    for call in calls:
+        try:
+            path = call["path"]
+            decode = methods.get(path)
+            if decode is None:
+                raise LookupError("No such method: {}".format(path))
+
+            arguments = decode(call.get("arguments", {}))
+            if process_methods and path in process_methods:
+                result = processes.run(interface, path, process_methods[path], **arguments)
+            else:
+                result = resolve_path(interface, path)(**arguments)
+            if isinstance(result, Iterator):
+                result = list(result)
+        except Exception as err:
+            results.append({"error": "{}: {}".format(type(err).__name__, err)})
+        else:
+            results.append({"result": result})
+
+    return encode_response({"results": results})
+
+
+class CachedAttribute:
+    """
+    The value of an attribute, evaluated once per entry, and an LRU of at most max_size bodies that it was
+    sent as, encoded on demand per (content type, content encoding) with their ETags.
+    """
+    __slots__ = ("value", "expires", "max_size", "bodies", "_lock")
+
+    def __init__(self, value, expires, max_size):
+        self.value = value
+        self.expires = expires
+        self.max_size = max_size
+        self.bodies = OrderedDict()
+        self._lock = threading.Lock()
+
+    def body(self, codec, encoding):
+        """:return: A (body, etag, content encoding) tuple, the content encoding is None if not compressed."""
+        key = (codec.content_type, encoding)
+
+        with self._lock:
+            body = self.bodies.get(key)
+            if body is not None:
+                self.bodies.move_to_end(key)
+                return body
+
+        data = codec.encode(self.value)
+        if encoding is None or len(data) < COMPRESS_THRESHOLD:
+            encoding = None
+        else:
+            data = wire.compress(data, encoding)
+
+        body = (data, '"{}"'.format(hashlib.sha1(data).hexdigest()), encoding)
+
+        with self._lock:
+            self.bodies[key] = body
+            self.bodies.move_to_end(key)
+
+            while len(self.bodies) > self.max_size:
+                self.bodies.popitem(last=False)
+
+        return body
+
+
+class ResponseCache:
+    """
+    The cached attributes of the server by path, entries expire ttl seconds after they are stored.
+    Every attribute bounds its own encoded bodies, so the max_size of one never evicts another.
+    """
+
+    def __init__(self):
+        self.hits = {}
+        self.misses = {}
+
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, path):
+        """:return: The CachedAttribute of a path, None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(path)
+
+            if entry is None or entry.expires <= time.monotonic():
+                self.misses[path] = self.misses.get(path, 0) + 1
+                return None
+
+            self.hits[path] = self.hits.get(path, 0) + 1
+            return entry
+
+    def put(self, path, value, ttl, max_size):
+        entry = CachedAttribute(value, time.monotonic() + ttl, max_size)
+
+        with self._lock:
+            self._entries[path] = entry
+
+        return entry
+
+    def stats(self):
+        now = time.monotonic()
+
+        with self._lock:
+            stats = {}
+            for path in set(self.hits) | set(self.misses):
+                entry = self._entries.get(path)
+                stats[path] = {"hits": self.hits.get(path, 0),
+                               "misses": self.misses.get(path, 0),
+                               "cached": entry is not None and entry.expires > now,
+                               "bodies": 0 if entry is None else len(entry.bodies)}
+
+            return stats
+
+
+_response_cache = ResponseCache()
+
+
+def cache_stats():
+    return _response_cache.stats()
+
+
+def etag_matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate == etag or candidate == "W/" + etag:
+            return True
+
+    return False
+
 
-    assert isinstance(request_args, dict)
+def run_cached_attribute(path, interface_function, ttl, max_size):
+    """
+    Evaluate an attribute through the response cache, once per ttl whatever the codecs of the clients.
+    The response carries a strong ETag, a matching If-None-Match gets 304 Not Modified.
+    """
+    entry = _response_cache.get(path)
+    if entry is None:
+        entry = _response_cache.put(path, interface_function(), ttl, max_size)
 
-    arguments = request_args.get("arguments")
+    codec = wire.negotiate(request.headers.get("Accept"))
+    body, etag, encoding = entry.body(codec, accepted_encoding())
 
-    assert isinstance(arguments, dict)
-    assert method_arguments_names == list(arguments.keys())
+    # The body depends on both headers, whether it is compressed or not.
+    headers = {"ETag": etag, "Vary": "Accept, Accept-Encoding"}
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
 
-    exec_result = interface_function(**arguments)
-    str_json = json.dumps(exec_result)
+    if etag_matches(request.headers.get("If-None-Match"), etag):
+        return Response(status=304, headers=headers)
 
-    return str_json
+    return Response(body, content_type=codec.content_type, headers=headers)
@@ -0,0 +1,200 @@
+import threading
+from bisect import bisect_left
+from time import perf_counter
+
+import helpers
+
+# The upper bounds of the histogram buckets in seconds.
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PREFIX = "keepcalm"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Histogram:
+    """A histogram over fixed buckets, the caller holds the lock of its endpoint"""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative_counts(self):
+        total = 0
+        for count in self.counts:
+            total += count
+            yield total
+
+
+class EndpointMetrics:
+    """The counters and the decode/execute/encode histograms of a route"""
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.decode = Histogram()
+        self.execute = Histogram()
+        self.encode = Histogram()
+        self._lock = threading.Lock()
+
+    def observe(self, decode, execute, encode):
+        with self._lock:
+            self.requests += 1
+            if decode is not None:
+                self.decode.observe(decode)
+            self.execute.observe(execute)
+            if encode is not None:
+                self.encode.observe(encode)
+
+    def observe_error(self):
+        with self._lock:
+            self.requests += 1
+            self.errors += 1
+
+
+_endpoints = {}
+_endpoints_lock = threading.Lock()
+
+
+def endpoint(path):
+    metrics = _endpoints.get(path)
+    if metrics is None:
+        with _endpoints_lock:
+            metrics = _endpoints.setdefault(path, EndpointMetrics())
+
+    return metrics
+
+
+def run_decoded(path, decode, interface_function, encode=helpers.encode_response):
+    """
+    Run a method like helpers.run_decoded, measuring every phase.
+    The encode time of a streamed response only covers starting the stream.
+    """
+    metrics = endpoint(path)
+
+    start = perf_counter()
+    try:
+        arguments = helpers.decode_arguments(decode)
+    except helpers.RequestError as err:
+        metrics.observe_error()
+        return helpers.error_response(str(err), err.status)
+
+    decoded = perf_counter()
+    try:
+        exec_result = interface_function(**arguments)
+    except TimeoutError as err:
+        metrics.observe_error()
+        return helpers.error_response(str(err), 504)
+    except Exception:
+        metrics.observe_error()
+        raise
+
+    executed = perf_counter()
+    try:
+        response = encode(exec_result)
+    except Exception:
+        metrics.observe_error()
+        raise
+
+    metrics.observe(decoded - start, executed - decoded, perf_counter() - executed)
+    return response
+
+
+def run_attribute(path, interface_function):
+    """Evaluate an attribute, measuring the evaluation and the encoding"""
+    metrics = endpoint(path)
+
+    start = perf_counter()
+    try:
+        result = interface_function()
+    except Exception:
+        metrics.observe_error()
+        raise
+
+    executed = perf_counter()
+    try:
+        response = helpers.encode_response(result)
+    except Exception:
+        metrics.observe_error()
+        raise
+
+    metrics.observe(None, executed - start, perf_counter() - executed)
+    return response
+
+
+def _status(response):
+    """The status of a view's return value, a Response or a (body, status[, headers]) tuple"""
+    if isinstance(response, tuple):
+        return response[1]
+
+    return getattr(response, "status_code", 200)
+
+
+def run_measured(path, function, *args, **kwargs):
+    """
+    Run a whole route (e.g. a batch), its time goes to the execute histogram.
+    A route that answers with an error status counts as an error.
+    """
+    metrics = endpoint(path)
+
+    start = perf_counter()
+    try:
+        result = function(*args, **kwargs)
+    except Exception:
+        metrics.observe_error()
+        raise
+
+    if _status(result) >= 400:
+        metrics.observe_error()
+    else:
+        metrics.observe(None, perf_counter() - start, None)
+
+    return result
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _render_histogram(lines, name, histograms):
+    lines.append("# TYPE {} histogram".format(name))
+
+    for path, histogram in histograms:
+        label = 'path="{}"'.format(_escape(path))
+
+        for bound, count in zip(histogram.buckets + ("+Inf",), histogram.cumulative_counts()):
+            lines.append('{}_bucket{{{},le="{}"}} {}'.format(name, label, bound, count))
+
+        lines.append("{}_sum{{{}}} {!r}".format(name, label, histogram.sum))
+        lines.append("{}_count{{{}}} {}".format(name, label, histogram.count))
+
+
+def render():
+    """Render every endpoint in the Prometheus text format"""
+    endpoints = sorted(_endpoints.items())
+    lines = []
+
+    for name, help_text, counter in (("requests_total", "Requests per interface path.", "requests"),
+                                     ("errors_total", "Failed requests per interface path.", "errors")):
+        name = "{}_{}".format(PREFIX, name)
+        lines.append("# HELP {} {}".format(name, help_text))
+        lines.append("# TYPE {} counter".format(name))
+        for path, metrics in endpoints:
+            lines.append('{}{{path="{}"}} {}'.format(name, _escape(path), getattr(metrics, counter)))
+
+    for phase in ("decode", "execute", "encode"):
+        _render_histogram(lines,
+                          "{}_{}_seconds".format(PREFIX, phase),
+                          [(path, getattr(metrics, phase)) for path, metrics in endpoints])
+
+    return "\n".join(lines) + "\n"
+
+
+def metrics_response():
+    return helpers.compressible_response(render().encode(), CONTENT_TYPE, helpers.accepted_encoding())
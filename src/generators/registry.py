@@ -0,0 +1,93 @@
+from importlib import import_module
+
+# Third-party packages register their generators under this entry point group, e.g. in pyproject.toml:
+# [project.entry-points."keepcalm.generators"]
+# go-server = "my_package.go:ServerGenerator"
+ENTRY_POINT_GROUP = 'keepcalm.generators'
+
+BUILTIN_GENERATORS = {
+    'python-flask': 'generators.python.server_flask.main:ServerGenerator',
+    'python-requests': 'generators.python.client-requests.main:ClientGenerator',
+    'python-asgi': 'generators.python.server_asgi.main:ServerGenerator',
+    'python-asyncio': 'generators.python.client_asyncio.main:ClientGenerator',
+}
+
+
+def resolve(reference: str):
+    """Import a 'module:attribute' reference"""
+    module_name, _, attribute = reference.partition(':')
+    obj = import_module(module_name)
+
+    for name in attribute.split('.'):
+        obj = getattr(obj, name)
+
+    return obj
+
+
+class GeneratorRegistry:
+    """
+    Map generator keys to their classes, the module of a generator is imported when it is first used.
+
+    The keys of the built-in generators are known upfront, the entry points are only looked up for
+    unknown keys and for listing the keys.
+    """
+
+    def __init__(self, references=None, entry_point_group=ENTRY_POINT_GROUP):
+        if references is None:
+            references = BUILTIN_GENERATORS
+
+        self._references = dict(references)
+        self._classes = {}
+        self._entry_point_group = entry_point_group
+        self._entry_points_loaded = entry_point_group is None
+
+    def register(self, key: str, reference):
+        """
+        :param reference: A generator class or a 'module:attribute' reference to it.
+        """
+        self._classes.pop(key, None)
+
+        if isinstance(reference, str):
+            self._references[key] = reference
+        else:
+            self._references[key] = None
+            self._classes[key] = reference
+
+    def _load_entry_points(self):
+        if self._entry_points_loaded:
+            return
+        self._entry_points_loaded = True
+
+        from importlib.metadata import entry_points
+
+        all_entry_points = entry_points()
+        if hasattr(all_entry_points, 'select'):
+            group = all_entry_points.select(group=self._entry_point_group)
+        else:
+            group = all_entry_points.get(self._entry_point_group, ())
+
+        for entry_point in group:
+            # The built-in and the explicitly registered generators win.
+            self._references.setdefault(entry_point.name, entry_point.value)
+
+    def keys(self):
+        self._load_entry_points()
+        return tuple(self._references.keys())
+
+    def __contains__(self, key: str):
+        if key not in self._references:
+            self._load_entry_points()
+
+        return key in self._references
+
+    def get(self, key: str):
+        """:return: The generator class of a key, None if there is no such generator."""
+        generator_class = self._classes.get(key)
+        if generator_class is not None:
+            return generator_class
+
+        if key not in self:
+            return None
+
+        generator_class = self._classes[key] = resolve(self._references[key])
+        return generator_class
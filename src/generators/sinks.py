@@ -0,0 +1,112 @@
+class MemorySink:
+    """Keep the generated files in memory as filename->lines"""
+
+    def __init__(self):
+        self._files = {}
+        self._current_lines = None
+
+    def open(self, path: str):
+        self._current_lines = []
+        self._files[path] = self._current_lines
+
+    def write(self, line: str):
+        self._current_lines.append(line)
+
+    def add_file(self, path: str, lines):
+        self._files[path] = lines
+
+    def close(self):
+        self._current_lines = None
+
+    def files(self):
+        return self._files
+
+
+class FileSink:
+    """
+    Write the generated lines through to disk as soon as they are produced.
+    :param writer: A common.output writer (DirectWriter or IncrementalWriter).
+    """
+
+    def __init__(self, writer):
+        self._writer = writer
+        self._current_path = None
+        self._current_file = None
+        self._paths = {}
+
+    def _close_current(self):
+        if self._current_path is None:
+            return
+
+        if self._current_file is None:
+            self._writer.write(self._current_path, ())
+        else:
+            self._current_file.close()
+
+        self._current_path = None
+        self._current_file = None
+
+    def open(self, path: str):
+        # Reopening a file that has no lines yet keeps a single file.
+        if path == self._current_path and self._current_file is None:
+            return
+
+        self._close_current()
+        self._current_path = path
+        self._paths[path] = self._writer.path(path)
+
+    def write(self, line: str):
+        if self._current_file is None:
+            self._current_file = self._writer.open(self._current_path)
+
+        self._current_file.write(line)
+
+    def add_file(self, path: str, lines):
+        if path == self._current_path:
+            if self._current_file is not None:
+                self._current_file.close()
+
+            self._current_path = None
+            self._current_file = None
+
+        self._writer.write(path, lines)
+        self._paths[path] = self._writer.path(path)
+
+    def close(self):
+        self._close_current()
+
+    def files(self):
+        """The files that were written, mapped to their paths on disk"""
+        return self._paths
+
+
+class RecordingSink:
+    """
+    Forward to another sink, keeping a log of the written lines so the lines of a range can be reused.
+    """
+
+    def __init__(self, sink):
+        self._sink = sink
+        self.lines = []
+
+    def open(self, path: str):
+        self._sink.open(path)
+
+    def write(self, line: str):
+        self._sink.write(line)
+        self.lines.append(line)
+
+    def add_file(self, path: str, lines):
+        self._sink.add_file(path, lines)
+
+    def close(self):
+        self._sink.close()
+
+    def files(self):
+        return self._sink.files()
+
+    def position(self):
+        return len(self.lines)
+
+    def lines_since(self, position: int):
+        return self.lines[position:]
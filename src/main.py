@@ -1,50 +1,287 @@
 import argparse
+import os
+import time
 
 from parser.parser import Parser
+from common import profile
+from common.output import DirectWriter, IncrementalWriter
+from generators.registry import GeneratorRegistry
+from generators.sinks import FileSink
 from argparse import ArgumentParser, FileType
 from os import path
-import os
 import logging
-from importlib import import_module
 
 logger = logging.getLogger(__name__)
 
-logging.basicConfig()
+logging.basicConfig(level=logging.INFO)
 
 logger.setLevel(logging.DEBUG)
 
-generators = {
-    'python-flask': import_module('generators.python.server_flask.main').ServerGenerator,
-    'python-requests': import_module('generators.python.client-requests.main').ClientGenerator,
-}
+# The generator modules are imported when a generator is first used.
+generators = GeneratorRegistry()
 
 
-def write_generated_file(file, content, out_dir, update):
-    if update:
-        file_open_mode = 'w'
+def run_generator(generator, iface, out_dir, update, incremental, fragments=None):
+    """
+    Generate the files of a single generator, writing them through to disk as they are produced.
+    :param fragments: A started FragmentCache to reuse the namespaces and classes of a previous run from.
+    :return: A (written, skipped, deleted) tuple.
+    """
+    generator_dir = path.join(out_dir, generator.name)
+
+    if incremental:
+        writer = IncrementalWriter(generator_dir)
     else:
-        file_open_mode = 'x'
+        writer = DirectWriter(generator_dir, update)
 
-    file_path = path.join(out_dir, file)
-    file_dir = path.dirname(file_path)
+    profiler = profile.active()
+    if profiler is not None:
+        writer = profile.ProfiledWriter(writer, profiler, generator.name)
 
-    logger.info('writing {} to {}'.format(path.basename(file_path), file_path))
+    with profile.phase('generate {}'.format(generator.name), 'generator'):
+        generator.set_sink(FileSink(writer))
+        if fragments is not None:
+            generator.set_fragment_cache(fragments)
+        generator.generate(iface)
+        generator.close()
 
-    os.makedirs(file_dir, exist_ok=True)
-    with open(file_path, file_open_mode) as f:
-        f.writelines((line + '\n' for line in content))
+        return writer.finish()
 
 
-def main(args):
+# The interface of the current run, set once per worker process.
+_worker_interface = None
+
+
+def _init_worker(iface):
+    global _worker_interface
+    _worker_interface = iface
+
+
+def _run_worker_generator(generator, out_dir, update, incremental, profiled):
+    """:return: The counts of the generator and the profile records of the run."""
+    if not profiled:
+        return run_generator(generator, _worker_interface, out_dir, update, incremental), ()
+
+    with profile.Profiler() as profiler:
+        counts = run_generator(generator, _worker_interface, out_dir, update, incremental)
+
+    return counts, profiler.records
+
+
+def run_generators_parallel(generators_list, iface, jobs, out_dir, update, incremental):
+    """
+    Run the generators over a process pool, every worker receives the parsed interface once.
+    The profile records of the workers are merged into the active profiler.
+    :return: The counts of every generator, in the same order as the generators.
+    """
+    profiler = profile.active()
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    jobs = min(jobs, len(generators_list))
+
+    with ProcessPoolExecutor(max_workers=jobs,
+                             initializer=_init_worker,
+                             initargs=(iface,)) as executor:
+        futures = [executor.submit(_run_worker_generator, generator, out_dir, update, incremental,
+                                   profiler is not None)
+                   for generator in generators_list]
+
+        all_counts = []
+        for future in futures:
+            counts, records = future.result()
+            all_counts.append(counts)
+            if profiler is not None:
+                profiler.extend(records)
+
+        return all_counts
+
+
+def parse_specification(parser, specification, stream, ir_cache=None):
+    """
+    :param ir_cache: A parser.cache.IRCache to load the interface from instead of parsing it, the parsed
+    interface is stored in it.
+    """
+    if ir_cache is not None and stream and not specification.seekable():
+        ir_cache = None
+
+    if stream and ir_cache is None:
+        with profile.phase('read and parse specification'):
+            return parser.parse_file(specification)
+
+    if stream:
+        with profile.phase('hash specification'):
+            key = ir_cache.key(iter(lambda: specification.read(1 << 16), ''))
+            specification.seek(0)
+    else:
+        with profile.phase('read specification'):
+            text = specification.read()
+
+        if ir_cache is not None:
+            with profile.phase('hash specification'):
+                key = ir_cache.key((text,))
+
+    if ir_cache is not None:
+        with profile.phase('load cached interface'):
+            iface = ir_cache.load(key)
+
+        if iface is not None:
+            logger.info('loaded the interface from the IR cache')
+            return iface
+
+    if stream:
+        with profile.phase('read and parse specification'):
+            iface = parser.parse_file(specification)
+    else:
+        with profile.phase('parse specification'):
+            iface = parser.parse(text)
+
+    if ir_cache is not None:
+        with profile.phase('store cached interface'):
+            try:
+                ir_cache.store(key, iface)
+            except OSError as err:
+                logger.warning('could not write the IR cache: {}'.format(err))
+
+    return iface
+
+
+def run_watch_cycle(generators_list, fragment_caches, iface, out_dir):
+    """
+    Regenerate every generator from a pristine copy, replaying the unchanged namespaces and classes.
+    :return: The summed (written, skipped, deleted) counts and the (reused, generated) fragment counts.
+    """
+    from copy import deepcopy
+    from parser.diff import fingerprints
+
+    node_fingerprints = fingerprints(iface)
+    all_counts = []
+    all_fragments = []
+
+    for generator, fragments in zip(generators_list, fragment_caches):
+        fragments.start(iface, node_fingerprints)
+        all_counts.append(run_generator(deepcopy(generator), iface, out_dir,
+                                        update=True, incremental=True, fragments=fragments))
+        all_fragments.append(fragments.counts())
+        fragments.finish()
+
+    return [sum(counts) for counts in zip(*all_counts)], [sum(counts) for counts in zip(*all_fragments)]
+
+
+def watch(args):
+    """
+    Regenerate whenever the specification is saved, keeping the last interface and the lines generated
+    for every namespace and class in memory so only the changed parts are generated again.
+    """
+    from generators.fragments import FragmentCache
+    from parser.diff import diff
+
+    spec_path = args.specification.name
+    args.specification.close()
+
     parser = Parser()
-    iface = parser.parse(args.specification.read())
+    ir_cache = make_ir_cache(args)
+    fragment_caches = [FragmentCache() for _ in args.generators]
+    last_iface = None
+    last_mtime = None
+    cycle = 0
+
+    logger.info('watching {}'.format(spec_path))
+
+    while True:
+        try:
+            mtime = os.stat(spec_path).st_mtime
+        except FileNotFoundError:
+            mtime = None
+
+        if mtime is None or mtime == last_mtime:
+            time.sleep(args.watch_interval)
+            continue
+
+        last_mtime = mtime
+        start = time.perf_counter()
+
+        try:
+            with open(spec_path) as specification:
+                iface = parse_specification(parser, specification, args.stream, ir_cache)
+        except (OSError, Parser.ParserError, AssertionError) as err:
+            logger.error('could not parse {}: {}'.format(spec_path, err))
+            continue
+
+        if last_iface is None:
+            changes = 'full generation'
+        else:
+            changes = diff(last_iface, iface)
+            if not changes:
+                logger.info('no changes')
+                continue
+
+        last_iface = iface
+        cycle += 1
+
+        counts, fragment_counts = run_watch_cycle(args.generators, fragment_caches, iface, args.out_directory)
+
+        logger.info('cycle {}: {}; {} fragments reused, {} generated; {} written, {} skipped, {} deleted; '
+                    'done in {:.1f} ms, {:.1f} ms after the save'.format(cycle, changes,
+                                                                        *fragment_counts,
+                                                                        *counts,
+                                                                        (time.perf_counter() - start) * 1e3,
+                                                                        (time.time() - mtime) * 1e3))
+
+
+def main(args):
+    if args.watch:
+        try:
+            watch(args)
+        except KeyboardInterrupt:
+            pass
+        return
+
+    if args.profile:
+        profiler = profile.Profiler().start()
+        try:
+            generate(args)
+        finally:
+            profiler.stop()
+
+        for line in profiler.summary(args.profile_top):
+            print(line)
+
+        if args.profile_trace:
+            profiler.dump(args.profile_trace)
+            logger.info('wrote the profile trace to {}'.format(args.profile_trace))
+    else:
+        generate(args)
+
+
+def generate(args):
+    iface = parse_specification(Parser(), args.specification, args.stream, make_ir_cache(args))
+
+    if args.jobs > 1 and len(args.generators) > 1:
+        with profile.phase('generate (parallel)'):
+            all_counts = run_generators_parallel(args.generators,
+                                                 iface,
+                                                 args.jobs,
+                                                 args.out_directory,
+                                                 args.update,
+                                                 args.incremental)
+    else:
+        all_counts = [run_generator(generator, iface, args.out_directory, args.update, args.incremental)
+                      for generator in args.generators]
+
+    if args.incremental:
+        totals = [sum(counts) for counts in zip(*all_counts)]
+        logger.info('{} written, {} skipped, {} deleted'.format(*totals))
+
+
+def make_ir_cache(args):
+    """:return: The IRCache of the --ir-cache directory, None if it is not set."""
+    if not args.ir_cache:
+        return None
+
+    from parser.cache import IRCache
 
-    for generator in args.generators:
-        for file_path, content in generator.generate(iface).items():
-            write_generated_file(path.join(generator.name, file_path),
-                                 content,
-                                 args.out_directory,
-                                 args.update)
+    return IRCache(args.ir_cache, args.ir_cache_max_entries, args.ir_cache_max_mb << 20)
 
 
 def available_generators_keys_list():
@@ -87,6 +324,29 @@ if __name__ == '__main__':
     parser.add_argument('specification', type=FileType('r'))
     parser.add_argument('out_directory', type=str)
     parser.add_argument('--update', '-u', action='store_true', default=False)
+    parser.add_argument('--incremental', '-i', action='store_true', default=False,
+                        help='only rewrite files whose content changed and remove stale files')
+    parser.add_argument('--stream', action='store_true', default=False,
+                        help='parse the specification incrementally instead of loading it at once')
+    parser.add_argument('--ir-cache', type=str, default=None, metavar='DIRECTORY',
+                        help='load the parsed specification from this cache directory when it did not change; '
+                             'the entries are pickles, only use a directory that you trust')
+    parser.add_argument('--ir-cache-max-entries', type=int, default=64,
+                        help='the number of specifications that the IR cache keeps')
+    parser.add_argument('--ir-cache-max-mb', type=int, default=256,
+                        help='the size in MB that the IR cache keeps')
+    parser.add_argument('--jobs', '-j', type=int, default=1,
+                        help='run the generators over a pool of N processes')
+    parser.add_argument('--watch', '-w', action='store_true', default=False,
+                        help='keep running and regenerate incrementally whenever the specification changes')
+    parser.add_argument('--watch-interval', type=float, default=0.2,
+                        help='the seconds between checks of the specification in watch mode')
+    parser.add_argument('--profile', action='store_true', default=False,
+                        help='print the time and allocations of every phase and the slowest namespaces/classes')
+    parser.add_argument('--profile-top', type=int, default=10,
+                        help='the number of slowest namespaces/classes to print')
+    parser.add_argument('--profile-trace', type=str, default=None,
+                        help='also write a Chrome trace (chrome://tracing, Perfetto) of the profile to this file')
 
     parser.add_argument('-g', '--add-generator', dest='generators',
                         # choices=available_generators_keys_list(),
@@ -0,0 +1,162 @@
+"""
+An on-disk cache of parsed interfaces, so a specification that did not change is loaded instead of parsed
+and validated again.
+"""
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+
+from . import classes, parser, stream
+from .classes import Interface
+
+logger = logging.getLogger(__name__)
+
+# Part of every key, the entries of another format are never read.
+CACHE_FORMAT = 1
+
+DEFAULT_MAX_ENTRIES = 64
+DEFAULT_MAX_BYTES = 256 << 20
+
+_SUFFIX = '.ir'
+
+
+def _parser_digest():
+    """The digest of the sources of the parser and the IR classes, any change to them invalidates the cache"""
+    digest = hashlib.sha256()
+    for module in (classes, parser, stream):
+        with open(module.__file__, 'rb') as source:
+            digest.update(source.read())
+
+    return digest.hexdigest()
+
+
+# Part of every key, the entries of another parser are never read.
+PARSER_DIGEST = _parser_digest()
+
+
+class IRCache:
+    """
+    A directory of pickled interfaces keyed by the sha256 of the specification text and PARSER_DIGEST.
+
+    Loading an entry touches it, and storing one evicts the least recently used entries over max_entries
+    or max_bytes, so the directory can be shared by the many specifications of a repository.
+    An entry that can not be read is removed and counted as a miss.
+
+    Loading an entry unpickles it, which can run arbitrary code: only use a directory that nobody else
+    can write to, never one shared with untrusted users or restored from an untrusted artifact.
+    """
+
+    def __init__(self, directory, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(chunks):
+        """:return: The key of a specification from its text chunks."""
+        digest = hashlib.sha256('{}:{}:'.format(PARSER_DIGEST, CACHE_FORMAT).encode())
+        for chunk in chunks:
+            digest.update(chunk.encode('utf-8') if isinstance(chunk, str) else chunk)
+
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + _SUFFIX)
+
+    def load(self, key):
+        """:return: The cached interface, None if it is not cached."""
+        entry_path = self._path(key)
+
+        try:
+            with open(entry_path, 'rb') as entry:
+                interface = pickle.load(entry)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except Exception as err:
+            logger.warning('dropping the unreadable IR cache entry {}: {}'.format(entry_path, err))
+            self._remove(entry_path)
+            self.misses += 1
+            return None
+
+        if not isinstance(interface, Interface):
+            self._remove(entry_path)
+            self.misses += 1
+            return None
+
+        try:
+            os.utime(entry_path)
+        except OSError:
+            pass
+
+        self.hits += 1
+        return interface
+
+    def store(self, key, interface: Interface):
+        """Write an entry atomically, then evict the entries over the limits"""
+        os.makedirs(self.directory, exist_ok=True)
+
+        descriptor, temporary_path = tempfile.mkstemp(suffix='.tmp', dir=self.directory)
+        try:
+            with os.fdopen(descriptor, 'wb') as entry:
+                pickle.dump(interface, entry, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporary_path, self._path(key))
+        except BaseException:
+            self._remove(temporary_path)
+            raise
+
+        self.evict()
+
+    def entries(self):
+        """:return: The (path, size, mtime) of every entry, the most recently used first."""
+        entries = []
+
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return entries
+
+        for name in names:
+            if not name.endswith(_SUFFIX):
+                continue
+
+            entry_path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(entry_path)
+            except FileNotFoundError:
+                continue
+
+            entries.append((entry_path, stat.st_size, stat.st_mtime))
+
+        entries.sort(key=lambda entry: entry[2], reverse=True)
+        return entries
+
+    def evict(self):
+        """:return: The number of entries removed to get under max_entries and max_bytes."""
+        total = 0
+        evicted = 0
+
+        for index, (entry_path, size, _) in enumerate(self.entries()):
+            total += size
+
+            # The newest entry is kept even when it is over max_bytes by itself.
+            if index and (index >= self.max_entries or total > self.max_bytes):
+                self._remove(entry_path)
+                evicted += 1
+
+        return evicted
+
+    def clear(self):
+        for entry_path, _, _ in self.entries():
+            self._remove(entry_path)
+
+    @staticmethod
+    def _remove(entry_path):
+        try:
+            os.remove(entry_path)
+        except FileNotFoundError:
+            pass
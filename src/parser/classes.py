@@ -1,43 +1,116 @@
+from sys import intern
+
+
+def _name(name):
+    if name is None:
+        return None
+
+    return intern(name)
+
+
+def _set_named_state(node, state):
+    """Unpickle a node (e.g. from the IR cache), interning its name again as the constructor does"""
+    _, slots = state
+
+    for slot, value in slots.items():
+        setattr(node, slot, value)
+
+    node.name = _name(node.name)
+
+
+def _children(children):
+    """Keep children as a tuple, nodes without children all share the empty tuple"""
+    if not children:
+        return ()
+
+    return tuple(children)
+
+
 class ClassName:
+    __slots__ = ('name', 'namespaces')
+    __setstate__ = _set_named_state
+
     def __init__(self, **kwargs):
-        self.name = kwargs.get('name')
-        self.namespaces = list(kwargs.get('namespaces', ()))
+        self.name = _name(kwargs.get('name'))
+        self.namespaces = _children(kwargs.get('namespaces'))
 
 
 class Namespace:
+    __slots__ = ('name', 'methods', 'classes', 'namespaces')
+    __setstate__ = _set_named_state
+
     def __init__(self, **kwargs):
-        self.name = kwargs.get('name')
-        self.methods = list(kwargs.get('methods', ()))
-        self.classes = list(kwargs.get('classes', ()))
-        self.namespaces = list(kwargs.get('namespaces', ()))
+        self.name = _name(kwargs.get('name'))
+        self.methods = _children(kwargs.get('methods'))
+        self.classes = _children(kwargs.get('classes'))
+        self.namespaces = _children(kwargs.get('namespaces'))
 
 
 class Method:
+    __slots__ = ('name', 'return_value', 'arguments', 'executor')
+    __setstate__ = _set_named_state
+
     def __init__(self, **kwargs):
-        self.name = kwargs.get('name')
+        self.name = _name(kwargs.get('name'))
         self.return_value = kwargs.get('return_value')
-        self.arguments = list(kwargs.get('arguments', ()))
+        self.arguments = _children(kwargs.get('arguments'))
+        self.executor = kwargs.get('executor')
 
 
 class Class:
+    __slots__ = ('name', 'methods', 'attributes')
+    __setstate__ = _set_named_state
+
     def __init__(self, **kwargs):
-        self.name = kwargs.get('name')
-        self.methods = list(kwargs.get('methods', ()))
-        self.attributes = list(kwargs.get('attributes', ()))
+        self.name = _name(kwargs.get('name'))
+        self.methods = _children(kwargs.get('methods'))
+        self.attributes = _children(kwargs.get('attributes'))
 
 
 class Attribute:
+    __slots__ = ('name', 'type', 'cache')
+    __setstate__ = _set_named_state
+
+    def __init__(self, **kwargs):
+        self.name = _name(kwargs.get('name'))
+        self.type = kwargs.get('type')
+        self.cache = kwargs.get('cache')
+
+
+class Cache:
+    """
+    The response cache policy of an attribute: the value is kept ttl seconds, and at most max_size of the
+    bodies that it is encoded to (one per content type and content encoding) are kept with it.
+    """
+    __slots__ = ('ttl', 'max_size')
+
+    def __init__(self, **kwargs):
+        self.ttl = kwargs.get('ttl')
+        self.max_size = kwargs.get('max_size')
+
+
+class Executor:
+    """Where the servers run a method, methods without an executor run in the request's worker"""
+    __slots__ = ('type', 'timeout')
+
+    PROCESS = 'process'
+
     def __init__(self, **kwargs):
-        self.name = kwargs.get('name')
         self.type = kwargs.get('type')
+        self.timeout = kwargs.get('timeout')
 
 
 class Interface(Namespace):
+    __slots__ = ()
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs, name='Interface')
 
 
 class Argument:
+    __slots__ = ('name', 'type')
+    __setstate__ = _set_named_state
+
     def __init__(self, **kwargs):
-        self.name = kwargs.get('name')
+        self.name = _name(kwargs.get('name'))
         self.type = kwargs.get('type')
@@ -0,0 +1,113 @@
+import hashlib
+
+from .classes import Interface
+
+# The children that make a namespace/class a node of its own when diffing.
+_NODE_FIELDS = ('namespaces', 'classes')
+
+
+def _fields(node):
+    """The slots of a node, including the ones of its bases (e.g. an Interface is a Namespace)"""
+    for cls in reversed(type(node).__mro__):
+        yield from getattr(cls, '__slots__', ())
+
+
+def _is_node(value):
+    return hasattr(type(value), '__slots__')
+
+
+def _digest(parts):
+    return hashlib.sha1('\x00'.join(parts).encode()).hexdigest()
+
+
+def fingerprint(node, result=None):
+    """
+    Fingerprint a node by its whole subtree.
+    :param result: An id(node)->fingerprint dict to also store the fingerprints of the subtree's nodes in.
+    """
+    parts = [type(node).__name__]
+
+    for field in _fields(node):
+        value = getattr(node, field)
+        parts.append(field)
+
+        if isinstance(value, tuple):
+            parts.extend(fingerprint(child, result) for child in value)
+        elif _is_node(value):
+            parts.append(fingerprint(value, result))
+        else:
+            parts.append(repr(value))
+
+    digest = _digest(parts)
+    if result is not None:
+        result[id(node)] = digest
+
+    return digest
+
+
+def fingerprints(interface: Interface):
+    """
+    Fingerprint every node of an interface, the fingerprint of a node covers its whole subtree.
+    :return: An id(node)->fingerprint dict.
+    """
+    result = {}
+    fingerprint(interface, result)
+    return result
+
+
+def _own_fingerprints(interface: Interface):
+    """
+    Fingerprint every namespace and class by its own content, nested namespaces and classes count by name only.
+    :return: A path->fingerprint dict.
+    """
+    node_fingerprints = fingerprints(interface)
+    result = {}
+
+    def walk(node, path):
+        parts = [type(node).__name__]
+
+        for field in _fields(node):
+            value = getattr(node, field)
+            parts.append(field)
+
+            if field in _NODE_FIELDS:
+                parts.extend(child.name for child in value)
+                for child in value:
+                    walk(child, path + (child.name,))
+            elif isinstance(value, tuple):
+                parts.extend(node_fingerprints[id(child)] for child in value)
+            elif _is_node(value):
+                parts.append(node_fingerprints[id(value)])
+            else:
+                parts.append(repr(value))
+
+        result['/'.join(path)] = _digest(parts)
+
+    walk(interface, ())
+    return result
+
+
+class Changes:
+    """The paths of the namespaces and classes that differ between two interfaces"""
+
+    def __init__(self, added, removed, changed):
+        self.added = added
+        self.removed = removed
+        self.changed = changed
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.changed)
+
+    def __str__(self):
+        return '{} added, {} removed, {} changed'.format(len(self.added), len(self.removed), len(self.changed))
+
+
+def diff(old: Interface, new: Interface):
+    """Diff two interfaces at namespace/class granularity"""
+    old_fingerprints = _own_fingerprints(old)
+    new_fingerprints = _own_fingerprints(new)
+
+    return Changes(added=sorted(new_fingerprints.keys() - old_fingerprints.keys()),
+                   removed=sorted(old_fingerprints.keys() - new_fingerprints.keys()),
+                   changed=sorted(path for path, fingerprint in new_fingerprints.items()
+                                  if path in old_fingerprints and old_fingerprints[path] != fingerprint))
@@ -1,6 +1,7 @@
 import json
 
-from .classes import Interface, Namespace, Class, Attribute, Method, Argument
+from .classes import Interface, Namespace, Class, Attribute, Method, Argument, Cache, Executor
+from .stream import ChunkReader, JsonStreamError
 
 
 class Parser:
@@ -12,6 +13,11 @@ class Parser:
     class ParserError(RuntimeError):
         pass
 
+    DEFAULT_CACHE_TTL = 60
+    DEFAULT_CACHE_MAX_SIZE = 8
+
+    EXECUTOR_INLINE = 'inline'
+
     _STR_TYPE_TO_REAL = {
         'int': int,
         'dict': dict,
@@ -44,6 +50,111 @@ class Parser:
                          namespaces=namespaces,
                          methods=methods)
 
+    def parse_file(self, stream, chunk_size=1 << 16):
+        """
+        Parse a specification file incrementally, without loading the whole json.
+        :param stream: A text or binary file object.
+        :return: The parsed Interface.
+        """
+        interface = None
+        for interface in self.iterparse(stream, chunk_size):
+            pass
+
+        return interface
+
+    def iterparse(self, stream, chunk_size=1 << 16):
+        """
+        Parse a specification file incrementally.
+        Yield every method, class and namespace as soon as it is parsed, the last object is the Interface.
+        """
+        reader = ChunkReader(stream, chunk_size)
+
+        try:
+            if reader.peek() != '{':
+                reader.read_value()
+                raise Parser.ParserError("The first object is not a dict")
+
+            interface = yield from self._stream_namespace(reader, is_root=True)
+            reader.expect_end()
+        except JsonStreamError:
+            raise Parser.ParserError("Not a valid json")
+
+        yield interface
+
+    def _stream_list(self, reader, parse_element, is_streamed):
+        """
+        Parse a json array element by element.
+        :param parse_element: Gets the decoded element, or the reader itself if is_streamed
+                              (and then it is a generator function).
+        """
+        elements = []
+        for _ in reader.iter_array():
+            if is_streamed:
+                element = yield from parse_element(reader)
+            else:
+                element = parse_element(reader.read_value())
+
+            elements.append(element)
+            yield element
+
+        return elements
+
+    def _stream_fields(self, reader, list_parsers: dict, error_message):
+        """
+        Read an object, lists whose name is in list_parsers are parsed element by element.
+        :param list_parsers: A name->(parse_element, is_streamed) dict.
+        """
+        if reader.peek() != '{':
+            reader.read_value()
+            raise Parser.ParserError(error_message)
+
+        fields = {}
+        for key in reader.iter_object():
+            list_parser = list_parsers.get(key)
+
+            if list_parser is not None and reader.peek() == '[':
+                fields[key] = yield from self._stream_list(reader, *list_parser)
+            else:
+                fields[key] = reader.read_value()
+
+        return fields
+
+    def _stream_namespace(self, reader, is_root=False):
+        fields = yield from self._stream_fields(reader, {
+            'namespaces': (self._stream_namespace, True),
+            'classes': (self._stream_class, True),
+            'methods': (self._parse_method, False),
+        }, "Namespace must be a dict")
+
+        elements = [self.Element(name='classes', required=False, type=list),
+                    self.Element(name='namespaces', required=False, type=list),
+                    self.Element(name='methods', required=False, type=list)]
+
+        if is_root:
+            classes, namespaces, methods = self._check_elements(fields, *elements)
+            return Interface(classes=classes, namespaces=namespaces, methods=methods)
+
+        name, classes, namespaces, methods = self._check_elements(fields,
+                                                                  self.Element(name='name', required=True, type=str),
+                                                                  *elements)
+        return Namespace(name=name,
+                         classes=classes,
+                         methods=methods,
+                         namespaces=namespaces)
+
+    def _stream_class(self, reader):
+        fields = yield from self._stream_fields(reader, {
+            'methods': (self._parse_method, False),
+            'attributes': (self._parse_attribute, False),
+        }, "Class must be a dict")
+
+        name, methods, attributes = self._check_elements(fields,
+                                                         self.Element(name='name', required=True, type=str),
+                                                         self.Element(name='methods', required=False, type=list),
+                                                         self.Element(name='attributes', required=False, type=list))
+
+        return Class(name=name, methods=methods, attributes=attributes)
+
     def _parse_namespaces(self, namespaces):
         """
         Parse a list of namespaces
@@ -101,17 +212,44 @@ class Parser:
     def _parse_method(self, method):
         self._assert_type_is(method, dict)
 
-        name, arguments, return_type = self._check_elements(method,
-                                                            self.Element(name='name', required=True, type=str),
-                                                            self.Element(name='return_type', required=False, type=str),
-                                                            self.Element(name='arguments', required=True, type=list))
+        name, return_type, arguments, executor = self._check_elements(
+            method,
+            self.Element(name='name', required=True, type=str),
+            self.Element(name='return_type', required=False, type=str),
+            self.Element(name='arguments', required=True, type=list),
+            self.Element(name='executor', required=False, type=dict))
 
         if return_type:
             return_type = self._parse_type(return_type)
 
+        if 'executor' in method:
+            executor = self._parse_executor(executor)
+        else:
+            executor = None
+
         return Method(name=name,
                       return_value=return_type,
-                      arguments=[self._parse_argument(argument) for argument in arguments])
+                      arguments=[self._parse_argument(argument) for argument in arguments],
+                      executor=executor)
+
+    def _parse_executor(self, executor):
+        """
+        Parse where a method runs, e.g. {"type": "process", "timeout": 30}.
+        :return: The Executor, None for "inline" (the default).
+        """
+        executor_type = executor.get('type')
+        timeout = executor.get('timeout')
+
+        if executor_type == self.EXECUTOR_INLINE:
+            return None
+
+        if executor_type != Executor.PROCESS:
+            raise Parser.ParserError("Invalid executor type: {}".format(executor_type))
+
+        if timeout is not None and not self._is_positive_number(timeout):
+            raise Parser.ParserError("Invalid executor timeout: {}".format(timeout))
+
+        return Executor(type=executor_type, timeout=timeout)
 
     def _parse_argument(self, argument):
         self._assert_type_is(argument, dict)
@@ -177,10 +315,35 @@ class Parser:
     def _parse_attribute(self, attribute):
         self._assert_type_is(attribute, dict)
 
-        name, attr_type = self._check_elements(attribute,
-                                               self.Element(name='name', required=True, type=str),
-                                               self.Element(name='type', required=True, type=str))
+        name, attr_type, cache = self._check_elements(attribute,
+                                                      self.Element(name='name', required=True, type=str),
+                                                      self.Element(name='type', required=True, type=str),
+                                                      self.Element(name='cache', required=False, type=dict))
 
         attr_type = self._parse_type(attr_type)
 
-        return Attribute(name=name, type=attr_type)
+        if 'cache' in attribute:
+            cache = self._parse_cache(cache)
+        else:
+            cache = None
+
+        return Attribute(name=name, type=attr_type, cache=cache)
+
+    @staticmethod
+    def _is_positive_number(obj):
+        return type(obj) in (int, float) and obj > 0
+
+    def _parse_cache(self, cache):
+        """
+        Parse the cache policy of an attribute, e.g. {"ttl": 60, "max_size": 8}.
+        """
+        ttl = cache.get('ttl', self.DEFAULT_CACHE_TTL)
+        max_size = cache.get('max_size', self.DEFAULT_CACHE_MAX_SIZE)
+
+        if not self._is_positive_number(ttl):
+            raise Parser.ParserError("Invalid cache ttl: {}".format(ttl))
+
+        if type(max_size) is not int or max_size <= 0:
+            raise Parser.ParserError("Invalid cache max_size: {}".format(max_size))
+
+        return Cache(ttl=ttl, max_size=max_size)
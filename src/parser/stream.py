@@ -0,0 +1,150 @@
+import codecs
+import json
+
+
+class JsonStreamError(ValueError):
+    pass
+
+
+class ChunkReader:
+    """
+    A pull reader over a json text that is read from a file in chunks.
+
+    Containers can be walked one element at a time with iter_object/iter_array while
+    the elements themselves are decoded with read_value, so only the element that is
+    currently being decoded has to be kept in memory.
+    """
+    _WHITESPACE = ' \t\n\r'
+
+    def __init__(self, stream, chunk_size=1 << 16):
+        self._stream = stream
+        self._chunk_size = chunk_size
+        self._buffer = ''
+        self._position = 0
+        self._eof = False
+        self._decoder = json.JSONDecoder()
+        # Binary streams are decoded incrementally, a character may be split between chunks.
+        self._utf8 = codecs.getincrementaldecoder('utf-8')()
+
+    def _fill(self, size=None):
+        """
+        Read more data into the buffer, dropping the consumed part.
+        :return: False if the stream is exhausted.
+        """
+        if self._eof:
+            return False
+
+        while True:
+            data = self._stream.read(size or self._chunk_size)
+
+            if isinstance(data, bytes):
+                try:
+                    chunk = self._utf8.decode(data, final=not data)
+                except UnicodeDecodeError as err:
+                    raise JsonStreamError(str(err))
+            else:
+                chunk = data
+
+            if chunk:
+                break
+
+            if not data:
+                self._eof = True
+                return False
+
+        self._buffer = self._buffer[self._position:] + chunk
+        self._position = 0
+        return True
+
+    def peek(self):
+        """
+        Skip whitespace and get the next character without consuming it ('' at the end of the stream).
+        """
+        while True:
+            buffer = self._buffer
+            while self._position < len(buffer) and buffer[self._position] in self._WHITESPACE:
+                self._position += 1
+
+            if self._position < len(buffer):
+                return buffer[self._position]
+
+            if not self._fill():
+                return ''
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise JsonStreamError('Expected {!r}'.format(char))
+
+        self._position += 1
+
+    def expect_end(self):
+        if self.peek() != '':
+            raise JsonStreamError('Extra data')
+
+    def read_value(self):
+        """Decode the next complete json value"""
+        self.peek()
+
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._position)
+            except json.JSONDecodeError as err:
+                # Grow the read size with the pending value so retries stay linear.
+                if not self._fill(max(self._chunk_size, len(self._buffer) - self._position)):
+                    raise JsonStreamError(str(err))
+                continue
+
+            # A value that ends with the buffer (e.g. a number) may continue in the next chunk.
+            if end == len(self._buffer) and self._fill():
+                continue
+
+            self._position = end
+            return value
+
+    def iter_object(self):
+        """
+        Iterate over the keys of an object.
+        The value of every key must be consumed before advancing the iterator.
+        """
+        self.expect('{')
+        if self.peek() == '}':
+            self._position += 1
+            return
+
+        while True:
+            if self.peek() != '"':
+                raise JsonStreamError('Expected an object key')
+
+            key = self.read_value()
+            self.expect(':')
+
+            yield key
+
+            char = self.peek()
+            self._position += 1
+
+            if char == '}':
+                return
+            elif char != ',':
+                raise JsonStreamError("Expected ',' or '}'")
+
+    def iter_array(self):
+        """
+        Iterate over the elements of an array.
+        Every element must be consumed before advancing the iterator.
+        """
+        self.expect('[')
+        if self.peek() == ']':
+            self._position += 1
+            return
+
+        while True:
+            yield
+
+            char = self.peek()
+            self._position += 1
+
+            if char == ']':
+                return
+            elif char != ',':
+                raise JsonStreamError("Expected ',' or ']'")